@@ -1,11 +1,22 @@
 import streamlit as st
-from views import admin, calendar
+import profiler
+import scheduler
+import views
+from views import data
 
 # Set page config to hide the sidebar by default
 st.set_page_config(page_title="Seminar Organizer", layout="wide", initial_sidebar_state="collapsed")
 
-# Custom CSS to adjust the width of the sidebar and main content
-st.markdown("""
+profiler.start_rerun()
+
+# Reminders and digests run in a background thread, never inside a rerun
+if scheduler.enabled():
+    data.start_scheduler()
+
+# Custom CSS for the sidebar, the main content and the seminar detail panel; one stylesheet per
+# run (Streamlit removes whatever a run does not send again) instead of one per panel
+with profiler.phase("app: css"):
+    st.markdown("""
 <style>
     [data-testid="stSidebar"][aria-expanded="true"] > div:first-child {
         width: 300px;
@@ -20,18 +31,45 @@ st.markdown("""
     }
     #MainMenu {visibility: hidden;}
     footer {visibility: hidden;}
+    /* Seminar detail panel; explicit background and text colors for all themes */
+    .seminar-details {
+        background-color: #f0f2f6;
+        color: #000000;
+        border-radius: 10px;
+        padding: 20px;
+        margin-bottom: 20px;
+        border: 1px solid #ccc;
+    }
+    .seminar-details h4 {
+        color: #1f77b4;
+        margin-bottom: 15px;
+    }
+    .seminar-details .label {
+        font-weight: bold;
+        color: #2c3e50;
+    }
+    .seminar-info {
+        display: flex;
+        flex-wrap: wrap;
+        justify-content: space-between;
+    }
+    .seminar-info div {
+        width: 45%;
+        margin-bottom: 10px;
+        color: #000000;
+    }
 </style>
 """, unsafe_allow_html=True)
 
 # Sidebar navigation
 st.sidebar.title("Navigation")
-selection = st.sidebar.radio("Go to", ["Calendar", "Admin"])
+selection = st.sidebar.radio("Go to", list(views.PAGES))
 
-# Main content
-if selection == "Calendar":
-    calendar.show()
-elif selection == "Admin":
-    admin.show()
+# Main content; the page module is imported the first time it is shown
+try:
+    views.page(selection).show()
+finally:
+    profiler.end_rerun(selection)
 
 # Run the selected page
 if __name__ == "__main__":
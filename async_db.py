@@ -0,0 +1,128 @@
+# async_db.py
+#
+# AsyncSeminarDB: the SeminarDB API as coroutines, for asyncio services such as the portal feed or
+# a chat bot. Every call runs on one dedicated DB thread that keeps a single SQLite connection open,
+# so any number of concurrent awaiters are queued onto that thread instead of each getting a thread
+# and a connection of their own. Emails go through an AsyncMailer, so SMTP never holds up the DB
+# thread.
+#
+#     async with AsyncSeminarDB() as db:
+#         seminars = await db.fetch_future_seminars()
+
+import asyncio
+import functools
+import inspect
+import itertools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from database import SeminarDB
+from mailer import AsyncMailer
+
+log = logging.getLogger('seminar_organizer.async_db')
+
+
+class _PersistentSeminarDB(SeminarDB):
+    # Only ever used from the DB thread. SeminarDB's `with self.connect() as conn:` blocks commit or
+    # roll back but do not close, so handing out the same connection each time is safe.
+    _connection = None
+    mailer = None
+
+    def connect(self):
+        if self.backend.dialect != 'sqlite':
+            # Pooled backends hand out a connection per block already
+            return super().connect()
+        if self._connection is None:
+            self._connection = super().connect()
+        return self._connection
+
+    def _send(self, msg):
+        # Queue on the mailer thread and return at once; failures are logged there
+        self.mailer.submit(msg).add_done_callback(_log_failure)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        super().close()
+
+
+def _log_failure(future):
+    if future.exception() is not None:
+        log.warning("email delivery failed: %s", future.exception())
+
+
+def _take(iterator, count):
+    return list(itertools.islice(iterator, count))
+
+
+class AsyncSeminarDB:
+    def __init__(self, db_file='seminars.db'):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='seminar-db')
+        # Opening runs on the DB thread too; calls made meanwhile queue up behind it
+        self._opened = self._executor.submit(_PersistentSeminarDB, db_file)
+        self.mailer = None
+
+    async def __aenter__(self):
+        await self.ready()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _call(self, name, *args, **kwargs):
+        db = self._opened.result()
+        return getattr(db, name)(*args, **kwargs)
+
+    async def _run(self, name, *args, **kwargs):
+        return await asyncio.wrap_future(self._executor.submit(self._call, name, *args, **kwargs))
+
+    async def ready(self):
+        db = await asyncio.wrap_future(self._opened)
+        if self.mailer is None:
+            self.mailer = db.mailer = AsyncMailer(db.email_config)
+        return self
+
+    async def iter_seminars(self, batch_size=1000):
+        # The cursor lives on the DB thread; batches are fetched there and yielded here
+        await self.ready()
+        rows = await self._run('iter_seminars', batch_size)
+        while True:
+            batch = await asyncio.wrap_future(self._executor.submit(_take, rows, batch_size))
+            if not batch:
+                break
+            for row in batch:
+                yield row
+
+    async def send_calendar_invitation(self, seminar_id, recipient_emails):
+        # Unlike the fire-and-forget notifications, the caller learns whether this was delivered
+        await self.ready()
+        msg = await self._run('calendar_invitation', seminar_id, recipient_emails)
+        if msg is None:
+            return False, "Seminar not found."
+        try:
+            await self.mailer.send_message(msg)
+            return True, f"Calendar invitations sent to {', '.join(recipient_emails)}"
+        except Exception as e:
+            return False, f"Error sending calendar invitations: {str(e)}"
+
+    async def close(self):
+        if self._opened.done() and self._opened.exception() is None:
+            await self._run('close')
+        if self.mailer is not None:
+            await self.mailer.aclose()
+        self._executor.shutdown(wait=False)
+
+
+def _coroutine(name, func):
+    @functools.wraps(func)
+    async def method(self, *args, **kwargs):
+        await self.ready()
+        return await self._run(name, *args, **kwargs)
+    return method
+
+
+# Mirror the rest of SeminarDB's public API as coroutines
+for _name, _func in vars(SeminarDB).items():
+    if not _name.startswith('_') and inspect.isfunction(_func) and _name not in vars(AsyncSeminarDB) and _name != 'connect':
+        setattr(AsyncSeminarDB, _name, _coroutine(_name, _func))
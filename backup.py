@@ -0,0 +1,89 @@
+# backup.py
+#
+# Rotating online snapshots of seminars.db, built on SeminarDB.backup (SQLite's backup API), and
+# the tooling to check and restore them:
+#
+#     python backup.py snapshot --dir backups --keep 7
+#     python backup.py list --dir backups
+#     python backup.py verify backups/seminars-20250101-080000.db
+#     python backup.py restore backups/seminars-20250101-080000.db
+#
+# The scheduler takes a daily snapshot when SEMINAR_BACKUP_DIR is set.
+
+import argparse
+import glob
+import os
+import sqlite3
+import sys
+from contextlib import closing
+from datetime import datetime
+
+from database import SeminarDB, quick_check
+
+# Snapshots kept by rotation unless told otherwise
+KEEP = int(os.environ.get('SEMINAR_BACKUP_KEEP', '7'))
+
+SNAPSHOT_PREFIX = 'seminars-'
+
+
+def backup_dir():
+    return os.environ.get('SEMINAR_BACKUP_DIR')
+
+
+def list_snapshots(directory):
+    # Oldest first; the timestamped names sort chronologically
+    return sorted(glob.glob(os.path.join(directory, f'{SNAPSHOT_PREFIX}*.db')))
+
+
+def snapshot(db, directory, keep=KEEP, pages_per_step=256):
+    """Write a timestamped snapshot into directory, then delete all but the newest keep snapshots."""
+    os.makedirs(directory, exist_ok=True)
+    dest = os.path.join(directory, f"{SNAPSHOT_PREFIX}{datetime.now().strftime('%Y%m%d-%H%M%S')}.db")
+    success, message = db.backup(dest, pages_per_step=pages_per_step)
+    if success:
+        for old in list_snapshots(directory)[:-keep]:
+            os.remove(old)
+    return success, message
+
+
+def verify(path):
+    with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as conn:
+        return quick_check(conn)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create, rotate, verify and restore database snapshots.")
+    parser.add_argument("--db", default="seminars.db", help="SQLite database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("snapshot", help="take a snapshot and rotate old ones")
+    create.add_argument("--dir", default=backup_dir() or "backups")
+    create.add_argument("--keep", type=int, default=KEEP)
+    create.add_argument("--pages-per-step", type=int, default=256)
+    listing = commands.add_parser("list", help="list snapshots, oldest first")
+    listing.add_argument("--dir", default=backup_dir() or "backups")
+    check = commands.add_parser("verify", help="run PRAGMA quick_check on a snapshot")
+    check.add_argument("path")
+    restore = commands.add_parser("restore", help="replace the database with a snapshot")
+    restore.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for path in list_snapshots(args.dir):
+            print(f"{path}\t{os.path.getsize(path)}")
+        return 0
+    if args.command == "verify":
+        problems = verify(args.path)
+        print("ok" if not problems else "\n".join(problems))
+        return 1 if problems else 0
+
+    db = SeminarDB(args.db)
+    if args.command == "snapshot":
+        success, message = snapshot(db, args.dir, args.keep, args.pages_per_step)
+    else:
+        success, message = db.restore(args.path)
+    print(message)
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""Run the same SeminarDB scenario against each storage backend and report the results as JSON.
+
+    python -m benchmarks.backends
+    python -m benchmarks.backends --url postgresql://localhost/seminars_scratch
+
+SQLite always runs, on a temporary file. With --url the scenario also runs against that
+database, which must be a throwaway one with no seminars in it yet (a local `createdb`, or a
+disposable container). Every check has a fixed expected value; the exit status is 1 when any
+backend disagrees with one, or when other than exactly one of --racers simultaneous bookings of
+one slot succeeds (the database decides: a trigger on SQLite, an exclusion constraint on
+PostgreSQL). The interval checks cover adjacent, nested, enclosing, equal and partially
+overlapping bookings, and an insert that bypasses SeminarDB.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from unittest import mock
+
+from benchmarks.run import NullSMTP
+
+EXPECTED = {
+    "create": True,
+    "conflict_other_spelling": False,
+    "create_other_room": True,
+    "update": True,
+    "create_past": True,
+    "series": True,
+    "move_occurrence": True,
+    "move_occurrence_again": True,
+    "moved_occurrence_time": "15:00:00",
+    "job_first_run": 2,
+    "job_same_slot": None,
+    "job_next_slot": 1,
+    "future_seminars": 6,
+    "past_seminars": 1,
+    "streamed_seminars": 3,
+    # Three one-off seminars and the series' four hour-long occurrences
+    "statistics_seminars": 7,
+    "statistics_minutes": 420,
+    "rooms": 3,
+    "version_bumped": True,
+    "adjacent_before": True,
+    "adjacent_after": True,
+    "nested": False,
+    "enclosing": False,
+    "equal": False,
+    "overlap_start": False,
+    "direct_insert": False,
+    "move_onto_booking": False,
+    "archived": 1,
+    "archive_rerun": 0,
+    "archive_keeps_statistics": True,
+    "past_pages": [["Compilers"]],
+    "soft_delete_statistics": 1,
+    "first_change": [["seminars", "insert", "Engines"]],
+    "approval_changes": [["seminar_requests", "insert"], ["seminar_requests", "update", "approved"], ["seminars", "insert"],
+                         ["seminar_requests", "delete", "approved"]],
+}
+
+
+def scenario(db, racers):
+    day = datetime.now().date() + timedelta(days=30)
+    date = day.strftime("%Y-%m-%d")
+    past = (day - timedelta(days=60)).strftime("%Y-%m-%d")
+    results = {}
+    seq = db.last_change_seq()
+
+    results["create"] = db.create_seminar(date, "10:00:00", "11:00:00", "Ada Lovelace", "ada@example.org", "", "Engines",
+                                          "", "Room 1", "Others")[0]
+    version = db.data_version("seminars")
+    results["first_change"] = [[table, op, row["topic"]] for _, table, _, op, _, row in db.changes_since(seq)]
+    results["conflict_other_spelling"] = db.create_seminar(date, "10:30:00", "11:30:00", "Alan Turing", "alan@example.org", "",
+                                                           "Machines", "", " room  1 ", "Others")[0]
+    results["create_other_room"] = db.create_seminar(date, "10:30:00", "11:30:00", "Alan Turing", "alan@example.org", "",
+                                                     "Machines", "", "Room 2", "Others")[0]
+    results["version_bumped"] = db.data_version("seminars") > version
+    seminar_id = next(row[0] for row in db.read_seminars() if row[7] == "Engines")
+    results["update"] = db.update_seminar(seminar_id, date, "12:00:00", "13:00:00", "Ada Lovelace", "ada@example.org", "",
+                                          "Engines", "", "Room 1", "Others")[0]
+    results["create_past"] = db.create_seminar(past, "09:00:00", "10:00:00", "Grace Hopper", "grace@example.org", "",
+                                               "Compilers", "", "Room 1", "Others")[0]
+
+    series_start = (day + timedelta(days=1)).strftime("%Y-%m-%d")
+    results["series"] = db.create_seminar_series("FREQ=WEEKLY;COUNT=4", series_start, "14:00:00", "15:00:00", "Reading group",
+                                                 "", "", "Papers", "", "Room 3", "Others")[0]
+    series_id = db.read_seminar_series()[0][0]
+    # Twice on the same occurrence, which replaces the stored override
+    results["move_occurrence"] = db.update_series_occurrence(series_id, series_start, series_start, "16:00:00", "17:00:00",
+                                                             "Reading group", "", "", "Papers", "", "Room 3")[0]
+    results["move_occurrence_again"] = db.update_series_occurrence(series_id, series_start, series_start, "15:00:00",
+                                                                   "16:00:00", "Reading group", "", "", "Papers", "", "Room 3")[0]
+    occurrences = db.fetch_series_occurrences(series_start, series_start)
+    results["moved_occurrence_time"] = occurrences[0][2] if occurrences else None
+
+    messages = [("k1", "a@example.org", "s", "b"), ("k2", "b@example.org", "s", "b")]
+    results["job_first_run"] = db.run_scheduled_job("check", "slot-1", messages)
+    results["job_same_slot"] = db.run_scheduled_job("check", "slot-1", messages)
+    results["job_next_slot"] = db.run_scheduled_job("check", "slot-2", messages[1:] + [("k3", "c@example.org", "s", "b")])
+
+    results["future_seminars"] = len(db.fetch_future_seminars())
+    results["past_seminars"] = len(db.fetch_past_seminars())
+    results["streamed_seminars"] = sum(1 for _ in db.iter_seminars(batch_size=2))
+    statistics = db.read_statistics("month")
+    results["statistics_seminars"] = sum(row[3] for row in statistics)
+    results["statistics_minutes"] = sum(row[4] for row in statistics)
+    results["rooms"] = len(db.read_rooms())
+
+    # An approval is visible in the change feed, outcome included, although the request row is gone
+    seq = db.last_change_seq()
+    request_date = (day + timedelta(days=60)).strftime("%Y-%m-%d")
+    db.create_seminar_request(request_date, "10:00:00", "11:00:00", "Barbara Liskov", "barbara@example.org", "", "Abstraction",
+                              "", "Room 4", "Submitter", "submitter@example.org", "Others")
+    db.approve_seminar_request(db.read_seminar_requests()[0][0])
+    results["approval_changes"] = [[table, op] + ([row["status"]] if op != "insert" and table == "seminar_requests" else [])
+                                   for _, table, _, op, _, row in db.changes_since(seq)]
+
+    # Interval edge cases against the 12:00-13:00 booking in Room 1; touching is not overlapping
+    for name, start, end in (("adjacent_before", "11:00:00", "12:00:00"), ("adjacent_after", "13:00:00", "14:00:00"),
+                             ("nested", "12:15:00", "12:45:00"), ("enclosing", "11:30:00", "13:30:00"),
+                             ("equal", "12:00:00", "13:00:00"), ("overlap_start", "12:30:00", "13:30:00")):
+        results[name] = db.create_seminar(date, start, end, "Edge case", "", "", f"Edge {name}", "", "Room 1", "Others")[0]
+    # Writes that skip SeminarDB's methods are rejected by the database itself
+    with db.connect() as conn:
+        try:
+            conn.execute('''
+                INSERT INTO seminars (date, start_time, end_time, speaker_name, speaker_email, topic, room, start_min, end_min, room_id)
+                SELECT date, start_time, end_time, 'Direct', '', 'Direct insert', room, start_min, end_min, room_id
+                FROM seminars WHERE topic = 'Engines'
+            ''')
+            results["direct_insert"] = True
+        except db.backend.IntegrityError:
+            conn.rollback()
+            results["direct_insert"] = False
+    moved_id = next(row[0] for row in db.read_seminars() if row[7] == "Edge adjacent_after")
+    results["move_onto_booking"] = db.update_seminar(moved_id, date, "12:30:00", "13:30:00", "Edge case", "", "", "Edge moved",
+                                                     "", "Room 1", "Others")[0]
+
+    # The past seminar moves to the archive, once, and stays in the history and the statistics;
+    # a deleted seminar is kept in the archive but stops counting
+    statistics = db.read_statistics("month")
+    results["archived"] = db.archive_past_seminars(after_days=7)
+    results["archive_rerun"] = db.archive_past_seminars(after_days=7)
+    results["archive_keeps_statistics"] = db.read_statistics("month") == statistics
+    pages, cursor = [], None
+    while True:
+        rows, cursor = db.fetch_past_seminars_page(cursor, limit=1)
+        pages.append([row[7] for row in rows])
+        if cursor is None:
+            break
+    results["past_pages"] = [page for page in pages if page]
+    seminars = sum(row[3] for row in statistics)
+    db.delete_seminar(next(row[0] for row in db.read_seminars() if row[7] == "Machines"))
+    results["soft_delete_statistics"] = seminars - sum(row[3] for row in db.read_statistics("month"))
+
+    # Simultaneous bookings of one free slot; only the database can arbitrate between them
+    race_date = (day + timedelta(days=90)).strftime("%Y-%m-%d")
+    barrier = threading.Barrier(racers)
+    outcomes = []
+
+    def book(i):
+        barrier.wait()
+        try:
+            outcomes.append(db.create_seminar(race_date, "10:00:00", "11:00:00", f"Racer {i}", "", "", f"Race {i}", "",
+                                              "Race room", "Others")[0])
+        except Exception as e:
+            outcomes.append(repr(e))
+
+    threads = [threading.Thread(target=book, args=(i,)) for i in range(racers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    race = {"racers": racers, "succeeded": outcomes.count(True), "errors": [o for o in outcomes if not isinstance(o, bool)]}
+    return results, race
+
+
+def check(name, db, racers):
+    if db.read_seminars():
+        return {"backend": name, "error": "database is not empty; point --url at a throwaway database", "ok": False}
+    # SeminarDB prints a line per email; keep stdout for the report
+    with mock.patch("smtplib.SMTP", NullSMTP), contextlib.redirect_stdout(sys.stderr):
+        results, race = scenario(db, racers)
+    mismatches = {key: {"expected": expected, "got": results.get(key)}
+                  for key, expected in EXPECTED.items() if results.get(key) != expected}
+    ok = not mismatches and not race["errors"] and race["succeeded"] == 1
+    return {"backend": name, "results": results, "race": race, "mismatches": mismatches, "ok": ok}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="also run against this (throwaway) database URL")
+    parser.add_argument("--racers", type=int, default=8, help="threads booking the same slot at once")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    from database import SeminarDB
+    from storage import backend_from_url
+
+    reports = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SeminarDB(os.path.join(tmp, "backends.db"))
+        reports.append(check("sqlite", db, args.racers))
+        db.close()
+    if args.url:
+        db = SeminarDB(backend=backend_from_url(args.url))
+        reports.append(check(args.url.split("@")[-1], db, args.racers))
+        db.close()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "backends": reports,
+        "ok": all(r["ok"] for r in reports),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
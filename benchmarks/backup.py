@@ -0,0 +1,124 @@
+"""Check that writers keep going while SeminarDB.backup runs, and report the numbers as JSON.
+
+    python -m benchmarks.backup --size 100k --pages-per-step 64
+
+A writer thread keeps adding seminars (each in its own connection, as the app does) while the
+main thread takes a snapshot. After each of the backup's first --hold-steps steps the backup waits
+until a write that started during it has committed, so writes land between steps however small
+the database is and however fast the copy would otherwise be (each one restarts the copy, which is
+the restart logic under test too). The report gives the backup time, how many writes committed
+during it, the write latencies, and the snapshot's integrity check. The exit status is 1 when no
+write committed during the backup, a write failed, or the snapshot is unusable.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.run import summarize
+from benchmarks.synthetic import SIZES, generate
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=SIZES, default="100k", help="number of synthetic seminars")
+    parser.add_argument("--pages-per-step", type=int, default=64, help="pages copied per backup step")
+    parser.add_argument("--hold-steps", type=int, default=3, help="steps after which the backup waits for a write")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    from backup import verify
+    from database import SeminarDB
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "backup.db")
+        generate(db_file, SIZES[args.size])
+        db = SeminarDB(db_file)
+
+        stop = threading.Event()
+        committed = threading.Condition()
+        writes = []
+        failures = []
+        backup_start = None
+
+        def writer():
+            day = datetime.now().date() + timedelta(days=3650)
+            i = 0
+            while not stop.is_set():
+                start = time.perf_counter()
+                success, message = db.create_seminar((day + timedelta(days=i)).strftime("%Y-%m-%d"), "10:00:00", "11:00:00",
+                                                     "Writer", "", "", f"Backup write {i}", "", "Backup room", "Others")
+                end = time.perf_counter()
+                with committed:
+                    (writes if success else failures).append((start, end) if success else message)
+                    committed.notify_all()
+                i += 1
+
+        held = 0
+
+        def hold(remaining, total):
+            # Wait, with no lock held, for a write that started during the backup to commit
+            nonlocal held
+            if held >= args.hold_steps or not remaining:
+                return
+            held += 1
+            with committed:
+                committed.wait_for(lambda: failures or any(start >= backup_start for start, _ in writes[-2:]), timeout=10)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        time.sleep(0.2)
+        dest = os.path.join(tmp, "snapshot.db")
+        backup_start = time.perf_counter()
+        success, message = db.backup(dest, pages_per_step=args.pages_per_step, on_step=hold)
+        backup_end = time.perf_counter()
+        time.sleep(0.2)
+        stop.set()
+        thread.join()
+
+        problems = verify(dest) if success else [message]
+        with sqlite3.connect(dest) as conn:
+            snapshot_seminars = conn.execute('SELECT COUNT(*) FROM seminars').fetchone()[0] if success else 0
+
+    during = [end - start for start, end in writes if start >= backup_start and end <= backup_end]
+    report = {
+        "meta": {
+            "size": args.size,
+            "seminars": SIZES[args.size],
+            "pages_per_step": args.pages_per_step,
+            "hold_steps": args.hold_steps,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "backup": {"ok": success, "message": message, "seconds": backup_end - backup_start,
+                   "quick_check": problems or ["ok"], "snapshot_seminars": snapshot_seminars},
+        "results": {
+            "write_during_backup": summarize(during) if during else None,
+            "write_overall": summarize([end - start for start, end in writes]) if writes else None,
+        },
+        "writes_during_backup": len(during),
+        "held_steps": held,
+        "write_failures": failures[:5],
+    }
+    report["ok"] = success and not problems and bool(during) and not failures
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Check that caches in several processes sharing one database refresh after writes, as JSON.
+
+    python -m benchmarks.coherence --readers 4 --writes 50 --bound-ms 250
+
+Reader processes poll SeminarDB.data_version() like a Streamlit rerun would, and keep a
+per-process cache of the seminar count keyed by that version. The writer process adds seminars
+and records when each commit happened. The report gives, per write, the delay until every reader
+saw the new version, and whether every reader's cache ended up matching the database. The exit
+status is 1 when a delay exceeds --bound-ms or a cache is stale.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.run import summarize
+
+
+def reader(db_file, poll_interval, rerun_ms, stop, results):
+    from coherence import VersionWatcher
+    from database import SeminarDB
+
+    db = SeminarDB(db_file)
+    db.versions = VersionWatcher(db_file, poll_interval)
+    cache = {}
+    seen = []
+    last = None
+    while True:
+        done = stop.is_set()
+        version = db.data_version('seminars')
+        if version != last:
+            seen.append((version, time.time()))
+            last = version
+        if version not in cache:
+            cache.clear()
+            cache[version] = len(db.read_seminars())
+        if done:
+            break
+        time.sleep(rerun_ms / 1000)
+    results.put({"pid": os.getpid(), "seen": seen, "cached": cache[last], "checks": db.versions.checks,
+                 "refreshes": db.versions.refreshes})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4, help="reader processes")
+    parser.add_argument("--writes", type=int, default=50, help="seminars the writer adds")
+    parser.add_argument("--write-interval-ms", type=float, default=50, help="pause between writes")
+    parser.add_argument("--rerun-ms", type=float, default=5, help="pause between reader polls")
+    parser.add_argument("--poll-ms", type=float, default=0, help="VersionWatcher poll interval in the readers")
+    parser.add_argument("--bound-ms", type=float, default=250, help="maximum acceptable refresh delay")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    from database import SeminarDB
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "coherence.db")
+        db = SeminarDB(db_file)
+
+        stop = context.Event()
+        results = context.Queue()
+        readers = [context.Process(target=reader, args=(db_file, args.poll_ms / 1000, args.rerun_ms, stop, results))
+                   for _ in range(args.readers)]
+        for process in readers:
+            process.start()
+        # Give every reader time to open the database and see the initial version
+        time.sleep(3)
+
+        writes = []
+        day = datetime.now().date() + timedelta(days=1)
+        for i in range(args.writes):
+            db.create_seminar((day + timedelta(days=i)).strftime("%Y-%m-%d"), "10:00:00", "11:00:00", "Writer", "",
+                              "", f"Coherence {i}", "", "Coherence room", "Others")
+            writes.append((db.data_version('seminars'), time.time()))
+            time.sleep(args.write_interval_ms / 1000)
+
+        time.sleep(max(args.bound_ms / 1000, 0.5))
+        stop.set()
+        reports = [results.get(timeout=60) for _ in readers]
+        for process in readers:
+            process.join()
+
+        with sqlite3.connect(db_file) as conn:
+            actual = conn.execute('SELECT COUNT(*) FROM seminars').fetchone()[0]
+
+    delays = []
+    for version, written_at in writes:
+        for report in reports:
+            seen_at = min((at for v, at in report["seen"] if v >= version), default=None)
+            delays.append(float("inf") if seen_at is None else max(seen_at - written_at, 0.0))
+
+    stale = [report["pid"] for report in reports if report["cached"] != actual]
+    report = {
+        "meta": {
+            "readers": args.readers,
+            "writes": args.writes,
+            "rerun_ms": args.rerun_ms,
+            "poll_ms": args.poll_ms,
+            "bound_ms": args.bound_ms,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "results": {
+            "refresh_delay": summarize(delays),
+            "version_checks": sum(r["checks"] for r in reports),
+            "version_refreshes": sum(r["refreshes"] for r in reports),
+        },
+        "stale_readers": stale,
+        "ok": not stale and max(delays) * 1000 <= args.bound_ms,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""Compare two benchmark JSON reports and flag regressions.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 1.2
+
+Exits with status 1 when any benchmark's median slowed down by more than the threshold ratio.
+"""
+
+import argparse
+import json
+import sys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=1.2, help="median ratio that counts as a regression")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    with open(args.candidate) as f:
+        candidate = json.load(f)["results"]
+
+    regressed = False
+    print(f"{'benchmark':<45} {'baseline ms':>12} {'candidate ms':>13} {'ratio':>7}")
+    for name in sorted(set(baseline) | set(candidate)):
+        if name not in baseline or name not in candidate:
+            print(f"{name:<45} {'(only in one report)':>34}")
+            continue
+        old, new = baseline[name]["median_ms"], candidate[name]["median_ms"]
+        ratio = new / old if old else float("inf")
+        flag = "  REGRESSION" if ratio > args.threshold else ""
+        regressed = regressed or bool(flag)
+        print(f"{name:<45} {old:>12.3f} {new:>13.3f} {ratio:>7.2f}{flag}")
+
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
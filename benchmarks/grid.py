@@ -0,0 +1,90 @@
+"""Measure the seminars grid payload and the calendar page's rerun time per click, as JSON.
+
+    python -m benchmarks.grid --size 1k --output grid-1k.json
+
+A click on a grid row triggers a full rerun with unchanged data, so warm reruns of the page
+(driven through Streamlit's AppTest) stand in for clicks.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.run import summarize
+from benchmarks.synthetic import SIZES, generate
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=SIZES, default="1k", help="number of synthetic seminars")
+    parser.add_argument("--clicks", type=int, default=20, help="warm reruns to time")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    from streamlit.testing.v1 import AppTest
+    from views.calendar import GRID_COLUMNS, build_grid_options
+    from views.data import prepare_seminars_dataframe
+    from database import SeminarDB
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app opens seminars.db relative to the working directory
+        os.chdir(tmp)
+        try:
+            generate("seminars.db", SIZES[args.size])
+
+            df = prepare_seminars_dataframe(SeminarDB("seminars.db").fetch_future_seminars())
+            display = df[[column for column, _ in GRID_COLUMNS]]
+            payload = {
+                "rows": len(display),
+                "row_data_bytes": len(display.to_json(orient="records").encode()),
+                "grid_options_bytes": len(json.dumps(build_grid_options(GRID_COLUMNS, display.head(0))).encode()),
+            }
+
+            at = AppTest.from_file(APP, default_timeout=600)
+            start = time.perf_counter()
+            at.run()
+            cold = time.perf_counter() - start
+            if at.exception:
+                raise SystemExit(f"app raised: {at.exception}")
+
+            samples = []
+            for _ in range(args.clicks):
+                start = time.perf_counter()
+                at.run()
+                samples.append(time.perf_counter() - start)
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "meta": {
+            "size": args.size,
+            "seminars": SIZES[args.size],
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "payload": payload,
+        "results": {
+            "calendar.first_rerun": summarize([cold]),
+            "calendar.rerun_per_click": summarize(samples),
+        },
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
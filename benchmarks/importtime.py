@@ -0,0 +1,123 @@
+"""Measure cold-start import time and the app's first paint, and check what stays deferred, as JSON.
+
+    python -m benchmarks.importtime --repeat 5 --output importtime.json
+    python -m benchmarks.compare importtime-old.json importtime.json
+
+Every sample runs in a fresh interpreter. `python -X importtime` times the import of each entry
+module; the report lists its slowest imports too. First paint is the app's first AppTest run in a
+new process, which imports the page modules just as a server's first session does, against a
+synthetic database; the warm rerun after it is there for comparison. The exit status is 1 when an
+entry module loads something that should only load on first use (bcrypt, email, iCalendar).
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+from benchmarks.run import summarize
+from benchmarks.synthetic import SIZES, generate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+
+ENTRY_MODULES = ("database", "views.calendar", "views.admin", "scheduler", "seminar_organizer")
+
+# Modules the entries in CHECKED must not import; they are loaded by the code that uses them
+DEFERRED = ("bcrypt", "icalendar", "smtplib", "mailer", "ics", "bulk", "views.admin")
+CHECKED = ("database", "views.calendar", "scheduler")
+
+FIRST_PAINT = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=600).run()
+first = time.perf_counter() - start
+start = time.perf_counter()
+at.run()
+rerun = time.perf_counter() - start
+print(json.dumps({{"first_paint": first, "rerun": rerun, "exception": [str(e.value) for e in at.exception]}}))
+"""
+
+
+def import_times(module):
+    # {module name: cumulative microseconds} for one cold import of module
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def first_paint(cwd):
+    result = subprocess.run([sys.executable, "-c", FIRST_PAINT.format(root=ROOT, app=APP)], cwd=cwd,
+                            capture_output=True, text=True, check=True)
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    if sample["exception"]:
+        raise SystemExit(f"app raised: {sample['exception']}")
+    return sample
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--size", choices=SIZES, default="1k", help="synthetic seminars behind the first paint")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports listed per entry module")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    # Imported by the interpreter itself (site and the like), so left out of the slowest lists
+    startup = set(import_times("sys"))
+    results, modules, deferred = {}, {}, {}
+    for module in ENTRY_MODULES:
+        runs = [import_times(module) for _ in range(args.repeat)]
+        results[f"import.{module}"] = summarize([run[module] / 1e6 for run in runs])
+        # Each import's median over the runs; the entry itself heads the list
+        names = set.intersection(*(set(run) for run in runs)) - startup
+        medians = {name: statistics.median(run[name] for run in runs) / 1000 for name in names}
+        modules[module] = {name: round(ms, 3) for name, ms in sorted(medians.items(), key=lambda item: -item[1])[:args.top]}
+        loaded = [name for name in DEFERRED if name in runs[0] and name != module]
+        if module in CHECKED:
+            deferred[module] = loaded
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app opens seminars.db relative to the working directory
+        generate(os.path.join(tmp, "seminars.db"), SIZES[args.size])
+        samples = [first_paint(tmp) for _ in range(args.repeat)]
+    results["app.first_paint"] = summarize([sample["first_paint"] for sample in samples])
+    results["app.warm_rerun"] = summarize([sample["rerun"] for sample in samples])
+
+    report = {
+        "meta": {
+            "size": args.size,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+        "slowest_imports_ms": modules,
+        "deferred_but_loaded": deferred,
+        "ok": not any(deferred.values()),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""Drive the app with concurrent simulated sessions and report rerun latency and throughput, as JSON.
+
+    python -m benchmarks.loadtest --sessions 1,2,4,8,16 --actions 20 --output load.json
+    python -m benchmarks.compare load-old.json load.json
+
+Each session is a Streamlit AppTest of app.py with its own session state, run in its own thread,
+as the server runs each browser session's reruns in a thread of one process. Sessions open the
+calendar, then pick actions at random: browse upcoming seminars, browse past ones (sometimes
+paging back), submit a seminar request, or log in as admin and approve the oldest pending ones.
+Every rerun is timed. For each number of sessions the report gives p50/p95/p99 rerun latency,
+reruns per second and how much p50 has grown since the first level; when reruns start queueing
+behind one another, latency rises with the session count while throughput levels off.
+
+AppTest keeps the Streamlit runtime in a process-wide global while a rerun runs, so reruns are
+serialised through one lock: a rerun waits for the one in progress, much as the server's reruns
+contend for the interpreter lock. Latencies include that wait, which is also reported on its own.
+
+Every level starts with fresh request form rate limits and its own submitter addresses, so a
+level is not measuring the limits the one before it used up; --request-burst and
+--request-per-hour set the limits (by default the app's). Submits turned away by them are counted
+apart from the requests that went through.
+
+The database is a synthetic one in a temporary directory and SMTP is stubbed out. The exit
+status is 1 when any rerun raised or any session stopped on an exception of its own.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from benchmarks.run import NullSMTP, summarize
+from benchmarks.synthetic import SIZES, generate
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+# Relative weights of the actions a session picks from
+ACTIONS = {"upcoming": 4, "past": 3, "request": 2, "approve": 1}
+
+# Held for every AppTest rerun; AppTest.run sets and clears streamlit's global Runtime instance
+RUN_LOCK = threading.Lock()
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] * 1000
+
+
+def latency(samples):
+    return dict(summarize(samples), p99_ms=percentile(samples, 0.99))
+
+
+class Session:
+    """One simulated visitor; every rerun it causes is timed under the action that caused it."""
+
+    def __init__(self, level, number, rng):
+        from streamlit.testing.v1 import AppTest
+
+        self.level = level
+        self.number = number
+        self.rng = rng
+        self.at = AppTest.from_file(APP, default_timeout=600)
+        self.samples = []
+        self.waits = []
+        self.errors = []
+        self.crashed = False
+        self.requests = 0
+        # Outcomes the app reported, so a run that only showed validation errors stands out
+        self.submitted = 0
+        self.approved = 0
+        self.conflicts = 0
+
+    def run(self, action, element=None):
+        start = time.perf_counter()
+        with RUN_LOCK:
+            started = time.perf_counter()
+            (element or self.at).run()
+        self.samples.append((action, time.perf_counter() - start))
+        self.waits.append(started - start)
+        if self.at.exception:
+            self.errors.append(f"{action}: {self.at.exception[0].value}")
+
+    def widget(self, kind, key=None, label=None):
+        return next(w for w in getattr(self.at, kind) if (key is None or w.key == key) and (label is None or w.label == label))
+
+    def page(self, name, action):
+        radio = self.at.sidebar.radio[0]
+        if radio.value != name:
+            self.run(action, radio.set_value(name))
+
+    def calendar(self, view, action):
+        self.page("Calendar", action)
+        radio = self.widget("radio", key="calendar_view")
+        if radio.value != view:
+            self.run(action, radio.set_value(view))
+
+    def upcoming(self):
+        self.calendar("Upcoming Seminar", "upcoming")
+        self.run("upcoming")  # A click on the grid is a rerun with the same data
+
+    def past(self):
+        self.calendar("Past Seminar", "past")
+        older = self.widget("button", key="past_older")
+        if not older.disabled and self.rng.random() < 0.5:
+            self.run("past", older.click())
+
+    def request(self):
+        self.calendar("Request Seminar", "request")
+        self.requests += 1
+        # Spread over the next few years so most requests do not collide
+        day = date.today() + timedelta(days=self.rng.randint(30, 1000))
+        hour = self.rng.randint(8, 17)
+        self.widget("text_input", key="request_room").input(f"Load room {self.rng.randint(1, 20)}")
+        self.run("request")
+        self.widget("date_input").set_value(day)
+        self.widget("text_input", label="Topic *").input(f"Load test {self.number}.{self.requests}")
+        self.widget("text_input", label="Your Name *").input(f"Visitor {self.number}")
+        self.widget("text_input", label="Your Email *").input(f"visitor{self.level}-{self.number}@example.org")
+        self.widget("number_input", label="Start Time * (Hour)").set_value(hour)
+        self.widget("number_input", label="End Time * (Hour)").set_value(hour + 1)
+        self.run("request", self.widget("button", label="Submit Request").click())
+        self.submitted += len(self.at.success)
+
+    def approve(self):
+        self.page("Admin", "approve")
+        if not self.at.session_state["admin_logged_in"]:
+            self.widget("text_input", label="Username").input("admin")
+            self.widget("text_input", label="Password").input("nimda1234")
+            self.run("approve", self.widget("button", label="Login").click())
+        radio = self.widget("radio", key="admin_view")
+        if radio.value != "Pending Seminar Requests":
+            self.run("approve", radio.set_value("Pending Seminar Requests"))
+        buttons = [b for b in self.at.button if (b.key or "").startswith("approve_")]
+        if buttons:
+            request_id = buttons[0].key[len("approve_"):]
+            self.run("approve", buttons[0].click())
+            # A successful approval reruns at once; an error stays on the page
+            if not self.at.error:
+                self.approved += 1
+            else:
+                # The slot was taken meanwhile; reject it, as an admin would, so it does not block the queue
+                self.conflicts += 1
+                reject = [b for b in self.at.button if b.key == f"reject_{request_id}"]
+                if reject:
+                    self.run("approve", reject[0].click())
+
+    def browse(self, actions, think, start):
+        start.wait()
+        action = "open"
+        try:
+            self.run(action)
+            names, weights = list(ACTIONS), list(ACTIONS.values())
+            for _ in range(actions):
+                if think:
+                    time.sleep(self.rng.uniform(0, think))
+                action = self.rng.choices(names, weights)[0]
+                getattr(self, action)()
+        except Exception as e:
+            # A widget missing from the page, or AppTest failing; the session ends here and the run fails
+            self.crashed = True
+            self.errors.append(f"{action}: session stopped: {e!r}")
+
+
+def level(count, args, seed):
+    # count sessions browsing at once; (sessions, wall-clock seconds)
+    start = threading.Barrier(count + 1)
+    sessions = [Session(count, i, random.Random(seed + i)) for i in range(count)]
+    threads = [threading.Thread(target=session.browse, args=(args.actions, args.think, start)) for session in sessions]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return sessions, time.perf_counter() - began
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", default="1,2,4,8", help="comma-separated numbers of concurrent sessions, one level each")
+    parser.add_argument("--actions", type=int, default=20, help="actions per session after opening the calendar")
+    parser.add_argument("--think", type=float, default=0.0, help="up to this many seconds of idle time before each action")
+    parser.add_argument("--size", choices=SIZES, default="1k", help="number of synthetic seminars")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--request-burst", type=int, help="request form submits in a row per session and email")
+    parser.add_argument("--request-per-hour", type=float, help="request form refill rate per session and email")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+    counts = [int(count) for count in args.sessions.split(",")]
+
+    from streamlit.testing.v1 import AppTest
+    import ratelimit
+    from instrumentation import metrics
+    from views import data
+
+    results, scaling, errors = {}, [], []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app opens seminars.db relative to the working directory
+        os.chdir(tmp)
+        # SeminarDB prints a line per email; keep stdout for the report
+        with mock.patch("smtplib.SMTP", NullSMTP), contextlib.redirect_stdout(sys.stderr), \
+                mock.patch.object(ratelimit, "BURST", args.request_burst or ratelimit.BURST), \
+                mock.patch.object(ratelimit, "PER_HOUR", args.request_per_hour or ratelimit.PER_HOUR):
+            try:
+                generate("seminars.db", SIZES[args.size])
+                # Imports and caches are warmed first, as on a server that has been up for a while
+                AppTest.from_file(APP, default_timeout=600).run()
+                for count in counts:
+                    # A new limiter, built from the settings above, for every level
+                    data.request_limiter.clear()
+                    before = metrics.snapshot()["counters"]
+                    sessions, seconds = level(count, args, args.seed + 1000 * count)
+                    # The request form's rate limit and outbox backoff apply under load too
+                    form = {name: value - before.get(name, 0) for name, value in metrics.snapshot()["counters"].items()
+                            if name.startswith("request_form.")}
+                    samples = [sample for session in sessions for sample in session.samples]
+                    reruns = [seconds for _, seconds in samples]
+                    waits = [wait for session in sessions for wait in session.waits]
+                    results[f"sessions_{count}.rerun"] = latency(reruns)
+                    results[f"sessions_{count}.queued"] = latency(waits)
+                    for action in ["open"] + list(ACTIONS):
+                        timings = [seconds for name, seconds in samples if name == action]
+                        if timings:
+                            results[f"sessions_{count}.{action}"] = latency(timings)
+                    failed = [error for session in sessions for error in session.errors]
+                    errors.extend(f"{count} sessions: {error}" for error in failed)
+                    scaling.append({
+                        "sessions": count,
+                        "reruns": len(reruns),
+                        "seconds": round(seconds, 3),
+                        "reruns_per_second": round(len(reruns) / seconds, 2),
+                        "p50_ms": round(percentile(reruns, 0.50), 1),
+                        "p95_ms": round(percentile(reruns, 0.95), 1),
+                        "p99_ms": round(percentile(reruns, 0.99), 1),
+                        "p50_slowdown": round(percentile(reruns, 0.50) / scaling[0]["p50_ms"], 2) if scaling else 1.0,
+                        "queued_p50_ms": round(percentile(waits, 0.50), 1),
+                        "queued_p95_ms": round(percentile(waits, 0.95), 1),
+                        "requests_submitted": sum(session.submitted for session in sessions),
+                        "requests_rate_limited": sum(value for name, value in form.items()
+                                                     if name.startswith("request_form.limited.")),
+                        "approvals": sum(session.approved for session in sessions),
+                        "approval_conflicts": sum(session.conflicts for session in sessions),
+                        "request_form": form,
+                        "crashed_sessions": sum(session.crashed for session in sessions),
+                        "errors": len(failed),
+                    })
+            finally:
+                os.chdir(cwd)
+
+    report = {
+        "meta": {
+            "size": args.size,
+            "seminars": SIZES[args.size],
+            "actions_per_session": args.actions,
+            "think_seconds": args.think,
+            "seed": args.seed,
+            "request_burst": args.request_burst or ratelimit.BURST,
+            "request_per_hour": args.request_per_hour or ratelimit.PER_HOUR,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "platform": platform.platform(),
+        },
+        "scaling": scaling,
+        "results": results,
+        "errors": errors[:20],
+        "ok": not errors,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""Time the SeminarDB hot paths against a synthetic database and print the results as JSON.
+
+Usage (from the repository root):
+
+    python -m benchmarks.run --size 100k --output bench-100k.json
+    python -m benchmarks.compare bench-old.json bench-new.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from unittest import mock
+
+from benchmarks.synthetic import SIZES, generate
+from database import SeminarDB
+
+
+class NullSMTP:
+    """Stand-in for smtplib.SMTP so email sends cost nothing and touch no network."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        pass
+
+    def send_message(self, msg):
+        pass
+
+    def quit(self):
+        pass
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "min_ms": samples[0] * 1000,
+        "median_ms": statistics.median(samples) * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+
+
+def measure(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def run(db_file, rooms, repeat, list_repeat):
+    db = SeminarDB(db_file)
+    rng = random.Random(42)
+    results = {}
+
+    with sqlite3.connect(db_file) as conn:
+        dates = [row[0] for row in conn.execute('SELECT DISTINCT date FROM seminars')]
+        request_ids = [row[0] for row in conn.execute('SELECT id FROM seminar_requests ORDER BY id')]
+
+    def check_time_conflict():
+        db.check_time_conflict(rng.choice(dates), "12:30:00", "13:30:00", rng.choice(rooms))
+
+    def create_seminar_request():
+        n = rng.randrange(10 ** 9)
+        db.create_seminar_request("2099-01-01", "10:00:00", "11:00:00", f"Bench {n}", "bench@example.org", "",
+                                  f"Bench topic {n}", "", rng.choice(rooms), "Bench", "bench@example.org", "Others")
+
+    pending = iter(request_ids)
+
+    def approve_seminar_request():
+        db.approve_seminar_request(next(pending))
+
+    from views.calendar import prepare_seminars_dataframe
+    upcoming = db.fetch_future_seminars()
+
+    # SeminarDB prints a line per email; keep stdout clean for the JSON report
+    with mock.patch("smtplib.SMTP", NullSMTP), contextlib.redirect_stdout(sys.stderr):
+        results["check_time_conflict"] = measure(check_time_conflict, repeat)
+        results["fetch_future_seminars"] = measure(db.fetch_future_seminars, list_repeat)
+        results["fetch_past_seminars"] = measure(db.fetch_past_seminars, list_repeat)
+        results["create_seminar_request"] = measure(create_seminar_request, repeat)
+        results["approve_seminar_request"] = measure(approve_seminar_request, min(repeat, len(request_ids)))
+        results["display_seminars_table.prepare_dataframe"] = measure(lambda: prepare_seminars_dataframe(upcoming), list_repeat)
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=SIZES, default="1k", help="number of synthetic seminars")
+    parser.add_argument("--repeat", type=int, default=50, help="runs of each point operation")
+    parser.add_argument("--list-repeat", type=int, default=5, help="runs of each full-list operation")
+    parser.add_argument("--db", help="reuse or create the synthetic database at this path")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = args.db or os.path.join(tmp, f"bench-{args.size}.db")
+        if args.db and os.path.exists(args.db):
+            with sqlite3.connect(db_file) as conn:
+                rooms = [row[0] for row in conn.execute('SELECT DISTINCT room FROM seminars')]
+        else:
+            generate_start = time.perf_counter()
+            rooms = generate(db_file, SIZES[args.size])
+            print(f"generated {args.size} in {time.perf_counter() - generate_start:.1f}s", file=sys.stderr)
+
+        report = {
+            "meta": {
+                "size": args.size,
+                "seminars": SIZES[args.size],
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+            },
+            "results": run(db_file, rooms, args.repeat, args.list_repeat),
+        }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/synthetic.py
+
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+from database import SeminarDB, epoch_minutes
+from lookup import bio_key, room_key, speaker_key
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+SEMINAR_TYPES = ["Economics of Green Transition Seminar", "CEP Division Seminar", "Others"]
+
+# Eight one-hour slots per room and day keep the generated schedule free of conflicts
+SLOTS = [(f"{hour:02d}:00:00", f"{hour + 1:02d}:00:00") for hour in range(9, 17)]
+
+
+def room_names(count):
+    return [f"B{300 + i // 20}-R{i % 20:03d}" for i in range(count)]
+
+
+def seminar_rows(count, rooms, today=None, seed=0):
+    """Yield conflict-free seminar tuples (seminars layout without id), half in the past and half upcoming."""
+    rng = random.Random(seed)
+    today = today or datetime.now().date()
+    per_day = len(rooms) * len(SLOTS)
+    first_day = today - timedelta(days=count // per_day // 2)
+    for i in range(count):
+        day = first_day + timedelta(days=i // per_day)
+        room = rooms[i % len(rooms)]
+        start_time, end_time = SLOTS[(i // len(rooms)) % len(SLOTS)]
+        speaker = f"Speaker {rng.randrange(count // 5 + 1)}"
+        yield (
+            day.strftime("%Y-%m-%d"), start_time, end_time,
+            speaker, f"{speaker.lower().replace(' ', '.')}@example.org", f"Bio of {speaker}. " * 5,
+            f"Synthetic topic {i}", f"Abstract for synthetic topic {i}. " * 10,
+            room, rng.choice(SEMINAR_TYPES),
+        )
+
+
+def request_rows(count, rooms, today=None, seed=1):
+    """Yield pending seminar request tuples (seminar_requests layout without id and status)."""
+    rng = random.Random(seed)
+    today = today or datetime.now().date()
+    for i in range(count):
+        day = today + timedelta(days=rng.randrange(1, 365))
+        start_time, end_time = rng.choice(SLOTS)
+        yield (
+            day.strftime("%Y-%m-%d"), start_time, end_time,
+            f"Guest {i}", f"guest{i}@example.org", "Guest bio.",
+            f"Requested topic {i}", "Requested abstract.", rng.choice(rooms),
+            f"Submitter {i}", f"submitter{i}@example.org", rng.choice(SEMINAR_TYPES),
+        )
+
+
+def generate(db_file, seminars, requests=None, rooms=None):
+    """Create a SeminarDB at db_file populated with synthetic rooms, speakers, seminars and requests."""
+    requests = seminars // 10 if requests is None else requests
+    rooms = room_names(rooms or max(10, min(seminars // 1000, 200)))
+    SeminarDB(db_file)
+
+    with sqlite3.connect(db_file) as conn:
+        cursor = conn.cursor()
+
+        # Register the lookup rows up front so every inserted row is already linked
+        cursor.executemany('INSERT INTO rooms (name, key) VALUES (?, ?)', ((room, room_key(room)) for room in rooms))
+        room_ids = dict(cursor.execute('SELECT name, id FROM rooms'))
+        cursor.executemany('INSERT INTO speakers (name, email, key) VALUES (?, ?, ?)', (
+            (name, email, speaker_key(name, email))
+            for name, email in {row[3:5] for rows in (seminar_rows(seminars, rooms), request_rows(requests, rooms)) for row in rows}
+        ))
+        speaker_ids = dict(cursor.execute('SELECT email, id FROM speakers'))
+        cursor.executemany('INSERT INTO speaker_bios (hash, bio) VALUES (?, ?)', (
+            (bio_key(bio), bio)
+            for bio in {row[5] for rows in (seminar_rows(seminars, rooms), request_rows(requests, rooms)) for row in rows}
+        ))
+        bio_ids = dict(cursor.execute('SELECT bio, id FROM speaker_bios'))
+
+        cursor.executemany('''
+            INSERT INTO seminars (date, start_time, end_time, speaker_name, speaker_email, bio_id, topic, abstract, room, seminar_type, start_min, end_min, room_id, speaker_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (row[:5] + (bio_ids[row[5]],) + row[6:] + (epoch_minutes(row[0], row[1]), epoch_minutes(row[0], row[2]), room_ids[row[8]], speaker_ids[row[4]])
+              for row in seminar_rows(seminars, rooms)))
+        cursor.executemany('''
+            INSERT INTO seminar_requests (date, start_time, end_time, speaker_name, speaker_email, bio_id, topic, abstract, room, submitter_name, submitter_email, seminar_type, room_id, speaker_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (row[:5] + (bio_ids[row[5]],) + row[6:] + (room_ids[row[8]], speaker_ids[row[4]]) for row in request_rows(requests, rooms)))
+        conn.commit()
+
+    return rooms
@@ -0,0 +1,122 @@
+# bulk.py
+
+import csv
+import re
+from datetime import datetime, date as date_type
+from icalendar import Event
+import pytz
+
+import ics
+from database import DEFAULT_TIMEZONE
+
+# Column order shared by the CSV format and the seminars table (minus id)
+SEMINAR_COLUMNS = ['date', 'start_time', 'end_time', 'speaker_name', 'speaker_email', 'speaker_bio', 'topic', 'abstract', 'room', 'seminar_type']
+
+# Zone used for timezone-aware DTSTART/DTEND values in imported calendars
+LOCAL_TIMEZONE = pytz.timezone(DEFAULT_TIMEZONE)
+
+
+# strptime dominates import time, so dates and times are parsed by hand
+TIME_PATTERN = re.compile(r'^(\d{1,2}):(\d{2})(?::(\d{2}))?$')
+
+
+def _parse_time(value):
+    match = TIME_PATTERN.match(value)
+    if not match or int(match.group(1)) > 23 or int(match.group(2)) > 59 or int(match.group(3) or 0) > 59:
+        raise ValueError(f"invalid time '{value}'")
+    return f"{int(match.group(1)):02d}:{match.group(2)}:{match.group(3) or '00'}"
+
+
+def validate_row(row):
+    """Normalise one seminar dict into a seminars tuple, raising ValueError when it is unusable."""
+    values = {column: (row.get(column) or '').strip() for column in SEMINAR_COLUMNS}
+    for column in ('date', 'start_time', 'end_time', 'topic', 'room'):
+        if not values[column]:
+            raise ValueError(f"missing {column}")
+    try:
+        values['date'] = date_type.fromisoformat(values['date']).isoformat()
+    except ValueError:
+        raise ValueError(f"invalid date '{values['date']}'")
+    values['start_time'] = _parse_time(values['start_time'])
+    values['end_time'] = _parse_time(values['end_time'])
+    if values['start_time'] >= values['end_time']:
+        raise ValueError("end time must be after start time")
+    values['seminar_type'] = values['seminar_type'] or 'Others'
+    return tuple(values[column] for column in SEMINAR_COLUMNS)
+
+
+def read_csv(fileobj):
+    """Yield (line_number, row_dict) from a CSV text stream with a SEMINAR_COLUMNS header."""
+    reader = csv.DictReader(fileobj)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _event_to_row(event):
+    def local(value):
+        value = value.dt
+        if isinstance(value, datetime):
+            if value.tzinfo is not None:
+                value = value.astimezone(LOCAL_TIMEZONE).replace(tzinfo=None)
+            return value
+        if isinstance(value, date_type):
+            return datetime.combine(value, datetime.min.time())
+        raise ValueError("invalid DTSTART/DTEND")
+
+    if 'DTSTART' not in event:
+        raise ValueError("missing DTSTART")
+    start = local(event['DTSTART'])
+    end = local(event['DTEND']) if 'DTEND' in event else start
+    organizer = event.get('ORGANIZER')
+    return {
+        'date': start.strftime("%Y-%m-%d"),
+        'start_time': start.strftime("%H:%M:%S"),
+        'end_time': end.strftime("%H:%M:%S"),
+        'speaker_name': str(event.get('X-SPEAKER-NAME') or (organizer.params.get('CN') if organizer else '') or ''),
+        'speaker_email': str(event.get('X-SPEAKER-EMAIL') or (str(organizer).replace('mailto:', '') if organizer else '')),
+        'speaker_bio': str(event.get('X-SPEAKER-BIO', '')),
+        'topic': str(event.get('SUMMARY', '')),
+        'abstract': str(event.get('DESCRIPTION', '')),
+        'room': str(event.get('LOCATION', '')),
+        'seminar_type': str(event.get('X-SEMINAR-TYPE', '')),
+    }
+
+
+def read_ics(fileobj):
+    """Yield (line_number, row_dict) for each VEVENT of an ICS text stream.
+
+    Events are cut out of the stream one at a time, so the whole calendar is never parsed at once.
+    An event that cannot be parsed is yielded as a ValueError in place of its row_dict.
+    """
+    lines = None
+    start_line = 0
+    for line_number, line in enumerate(fileobj, start=1):
+        stripped = line.rstrip('\r\n')
+        if stripped == 'BEGIN:VEVENT':
+            lines, start_line = [stripped], line_number
+        elif lines is not None:
+            lines.append(stripped)
+            if stripped == 'END:VEVENT':
+                try:
+                    yield start_line, _event_to_row(Event.from_ical('\r\n'.join(lines)))
+                except Exception as e:
+                    yield start_line, ValueError(f"unreadable event: {e}")
+                lines = None
+
+
+def write_csv(rows, fileobj):
+    """Stream seminar tuples (seminars layout without id) to a CSV text stream."""
+    writer = csv.writer(fileobj)
+    writer.writerow(SEMINAR_COLUMNS)
+    for row in rows:
+        writer.writerow(row)
+
+
+def write_ics(rows, fileobj):
+    """Stream seminar tuples (seminars layout with id, then timezone) to an ICS text stream, one VEVENT at a time.
+
+    Times are written with the seminar's TZID, as in invitations, and each zone's VTIMEZONE once.
+    """
+    events = ((ics.export_event(*row[:12]), row[11]) for row in rows)
+    for chunk in ics.stream_calendar(events):
+        fileobj.write(chunk.decode('utf-8'))
@@ -0,0 +1,63 @@
+# coherence.py
+#
+# Cross-process cache invalidation for replicas sharing one seminars.db. Caches are keyed by the
+# data_versions counters, which triggers bump on every write from any process. A VersionWatcher
+# keeps one read connection open and asks SQLite for PRAGMA data_version, which changes only when
+# another connection (in this or any other process) has committed; the counters are re-read only
+# then. A check is a few microseconds, so by default every call checks and caches refresh on the
+# next rerun after a write anywhere. SEMINAR_VERSION_POLL_MS trades that for at most one check per
+# interval, bounding staleness by the interval.
+
+import os
+import sqlite3
+import threading
+import time
+
+POLL_INTERVAL = float(os.environ.get('SEMINAR_VERSION_POLL_MS', '0')) / 1000
+
+
+class VersionWatcher:
+    def __init__(self, db_file, poll_interval=POLL_INTERVAL):
+        self.db_file = db_file
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._conn = None
+        self._data_version = None
+        self._versions = {}
+        self._checked_at = float('-inf')
+        self.checks = 0
+        self.refreshes = 0
+
+    def _connection(self):
+        if self._conn is None:
+            # Autocommit, so no read transaction stays open between checks; shared by all threads
+            self._conn = sqlite3.connect(self.db_file, check_same_thread=False, isolation_level=None)
+        return self._conn
+
+    def versions(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at >= self.poll_interval:
+                self._checked_at = now
+                self.checks += 1
+                conn = self._connection()
+                data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+                if data_version != self._data_version:
+                    self._data_version = data_version
+                    self._versions = dict(conn.execute('SELECT name, version FROM data_versions').fetchall())
+                    self.refreshes += 1
+            return self._versions
+
+    def version(self, name):
+        return self.versions().get(name, 0)
+
+    def invalidate(self):
+        # Force the next call to check, even within the poll interval
+        with self._lock:
+            self._checked_at = float('-inf')
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
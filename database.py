@@ -1,20 +1,162 @@
+import heapq
+import json
+import os
+import secrets
 import sqlite3
-from datetime import datetime
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
-from icalendar import Calendar, Event
+from contextlib import closing
+from datetime import datetime, timedelta
 import pytz
-import bcrypt
+from recurrence import iter_occurrences, last_occurrence, horizon_end
+from lookup import bio_key, room_key, speaker_key
+from instrumentation import metrics
+from storage import ROOM_CONFLICT, SQLiteBackend
 
+# bcrypt, the email and iCalendar machinery (mailer, ics, bulk) and markup are imported where they
+# are first used: most processes, and every calendar page view, never need them
+
+# Per-occurrence fields a series exception may override, in seminars column order
+SERIES_OVERRIDE_FIELDS = ('date', 'start_time', 'end_time', 'speaker_name', 'speaker_email', 'speaker_bio', 'topic', 'abstract', 'room')
+
+# Trigger statements that add (sign '+') or remove (sign '-') one seminars row (NEW or OLD)
+# from the statistics tables
+STATS_TRIGGER_BODY = '''
+    INSERT INTO seminar_stats (month, seminar_type, room, seminars, minutes)
+    VALUES (substr({row}.date, 1, 7), {row}.seminar_type, {row}.room, {sign}1,
+            {sign}((strftime('%s', {row}.date || ' ' || {row}.end_time) - strftime('%s', {row}.date || ' ' || {row}.start_time)) / 60))
+    ON CONFLICT (month, seminar_type, room) DO UPDATE
+    SET seminars = seminars + excluded.seminars, minutes = minutes + excluded.minutes;
+    DELETE FROM seminar_stats
+    WHERE seminars <= 0 AND month = substr({row}.date, 1, 7) AND seminar_type = {row}.seminar_type AND room = {row}.room;
+    INSERT INTO seminar_stats_speakers (month, seminar_type, room, speaker_name, seminars)
+    VALUES (substr({row}.date, 1, 7), {row}.seminar_type, {row}.room, {row}.speaker_name, {sign}1)
+    ON CONFLICT (month, seminar_type, room, speaker_name) DO UPDATE
+    SET seminars = seminars + excluded.seminars;
+    DELETE FROM seminar_stats_speakers
+    WHERE seminars <= 0 AND month = substr({row}.date, 1, 7) AND seminar_type = {row}.seminar_type
+    AND room = {row}.room AND speaker_name = {row}.speaker_name;
+'''
+
+# SQL expression mapping a 'YYYY-MM' month to its term
+TERM_SQL = "substr(month, 1, 4) || CASE WHEN CAST(substr(month, 6, 2) AS INTEGER) <= 6 THEN ' Spring' ELSE ' Autumn' END"
+
+# Zone seminar times are entered in
+DEFAULT_TIMEZONE = 'Europe/Copenhagen'
+
+# Upper bound on a seminar's length, so conflict checks can scan a bounded start_min range
+MAX_SEMINAR_MINUTES = 24 * 60
+
+# Trigger condition: NEW overlaps another seminar in the same room. Touching intervals do not
+# overlap; the lower bound on start_min keeps it a bounded range scan of (room_id, start_min)
+ROOM_OVERLAP_SQL = f'''
+    NEW.room_id IS NOT NULL AND EXISTS (
+        SELECT 1 FROM seminars
+        WHERE room_id = NEW.room_id AND start_min < NEW.end_min AND start_min > NEW.start_min - {MAX_SEMINAR_MINUTES}
+        AND end_min > NEW.start_min AND id IS NOT NEW.id
+    )
+'''
+
+# Speaker bios are stored once each in speaker_bios and referenced by bio_id; speaker_bio is left
+# NULL, except in rows written around SeminarDB, which the next start moves over
+SPEAKER_BIO_SQL = 'COALESCE(speaker_bio, (SELECT bio FROM speaker_bios WHERE speaker_bios.id = bio_id))'
+
+# Tables whose rows reference speaker_bios
+BIO_TABLES = ('seminars', 'seminar_requests', 'seminars_archive')
+
+# Explicit seminars column list in the tuple layout the views expect (the table has more columns)
+SEMINAR_COLUMNS = f'id, date, start_time, end_time, speaker_name, speaker_email, {SPEAKER_BIO_SQL} AS speaker_bio, topic, abstract, room, seminar_type'
+
+# Seminar requests in the table's original column order
+REQUEST_COLUMNS = (f'id, date, start_time, end_time, speaker_name, speaker_email, {SPEAKER_BIO_SQL} AS speaker_bio, topic, abstract, '
+                   'room, submitter_name, submitter_email, status, seminar_type, room_id, speaker_id')
+
+# Seminars that started more than this many days ago are moved to seminars_archive
+ARCHIVE_AFTER_DAYS = int(os.environ.get('SEMINAR_ARCHIVE_AFTER_DAYS', '365'))
+
+# Days of series occurrences a short history page expands at first; the window grows fourfold
+# until the page is full or reaches the oldest series
+PAST_SERIES_WINDOW_DAYS = 90
+
+# Columns a seminar keeps when it moves to the archive
+ARCHIVED_COLUMNS = ('id, date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room, seminar_type, '
+                    'start_min, end_min, timezone, sequence, room_id, speaker_id, bio_id')
+
+
+def epoch_minutes(date, time_of_day, timezone=DEFAULT_TIMEZONE):
+    # Minutes since the Unix epoch (UTC) of a local 'YYYY-MM-DD' date and 'HH:MM:SS' time
+    local = datetime.fromisoformat(f"{date}T{time_of_day}")
+    return int(pytz.timezone(timezone).localize(local).timestamp()) // 60
+
+
+def local_date(minutes, timezone=DEFAULT_TIMEZONE):
+    # The local 'YYYY-MM-DD' date of a point in epoch minutes
+    return datetime.fromtimestamp(minutes * 60, pytz.timezone(timezone)).strftime("%Y-%m-%d")
+
+
+def _book(booked, room_id, start_min, end_min):
+    # File a booking under each local date it touches; one held in another zone can run past midnight here
+    for date in {local_date(start_min), local_date(end_min - 1)}:
+        booked.setdefault((room_id, date), []).append((start_min, end_min))
+
+
+def _overlaps(slots, start_min, end_min):
+    return any(s < end_min and e > start_min for s, e in slots)
+
+
+# Seminar coordinator, who approves requests and receives the weekly digest
+COORDINATOR_NAME = "Xiaobing"
+COORDINATOR_EMAIL = "xiazhan@dtu.dk"
+
+# Outbox messages are given up on after this many failed delivery attempts
+MAX_EMAIL_ATTEMPTS = 5
+
+# Seconds a deliverer holds the outbox rows it claimed; a crashed deliverer's rows are claimable again after this
+EMAIL_CLAIM_SECONDS = 600
+
+def quick_check(conn):
+    # Problems reported by PRAGMA quick_check; empty when the database is intact
+    rows = [row[0] for row in conn.execute('PRAGMA quick_check').fetchall()]
+    return [] if rows == ['ok'] else rows
+
+
+class BackupRestarted(Exception):
+    pass
+
+
+# Tables whose writes bump a data version, and the version they bump
+VERSIONED_TABLES = {
+    'seminars': 'seminars',
+    'seminar_series': 'seminars',
+    'seminar_series_exceptions': 'seminars',
+    'seminars_archive': 'seminars',
+    'seminar_requests': 'seminar_requests',
+    'rooms': 'lookups',
+    'speakers': 'lookups',
+}
+
+# Tables whose every write is recorded in change_log, and the column identifying the row
+CHANGE_LOG_TABLES = {
+    'seminars': 'id',
+    'seminar_requests': 'id',
+    'seminar_series': 'id',
+    'seminar_series_exceptions': 'series_id',
+    'seminars_archive': 'id',
+}
+
+# Tables whose room and speaker are linked to the rooms and speakers lookup tables
+LINKED_TABLES = ('seminars', 'seminar_requests', 'seminar_series')
+
+@metrics.instrument_class
 class SeminarDB:
-    def __init__(self, db_file='seminars.db'):
+    def __init__(self, db_file='seminars.db', backend=None):
         self.db_file = db_file
+        # Where the data lives; see storage.py. The SQL below is written for SQLite and runs
+        # unchanged on PostgreSQL, except for the SQLite-only schema migrations and backups.
+        self.backend = backend or SQLiteBackend(db_file)
         self.conn = None
         self.cursor = None
         self.initialize_database()
+        # Shared view of the data_versions counters, refreshed when any process commits
+        self.versions = self.backend.version_watcher()
         self.email_config = {
             'username': 'scicloudadm',
             'app_passwd': 'ywgyayhvoonpvcey',
@@ -23,9 +165,22 @@ class SeminarDB:
         }
 
     def initialize_database(self):
+        if self.backend.dialect != 'sqlite':
+            # Other backends create their complete, current schema themselves
+            self.backend.create_schema()
+            with self.connect() as conn:
+                self._dedupe_bios(conn.cursor())
+                conn.commit()
+            self._ensure_admin_account()
+            return
+
         # Use context manager to handle the connection
         with self.connect() as conn:
             cursor = conn.cursor()
+            # Take the write lock up front: processes starting together then wait their turn for the
+            # migration instead of failing to upgrade a read lock halfway through it
+            cursor.execute('PRAGMA busy_timeout = 30000')
+            cursor.execute('BEGIN IMMEDIATE')
             
             # Create seminars table
             cursor.execute('''
@@ -44,6 +199,16 @@ class SeminarDB:
                 )
             ''')
             
+            # Integer shadow columns: start/end as UTC epoch minutes, and the zone the text times are in;
+            # sequence is the iCalendar SEQUENCE, bumped on every update so invites replace the old event
+            self._add_columns(cursor, 'seminars', (('start_min', 'INTEGER'), ('end_min', 'INTEGER'),
+                                                   ('timezone', f"TEXT NOT NULL DEFAULT '{DEFAULT_TIMEZONE}'"),
+                                                   ('sequence', 'INTEGER NOT NULL DEFAULT 0')))
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_seminars_start ON seminars (start_min)')
+            # Partial index that makes finding rows still missing the integer columns free
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_seminars_unmigrated ON seminars (id) WHERE start_min IS NULL OR end_min IS NULL')
+            self._backfill_epoch_minutes(cursor)
+
             # Create seminar requests table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS seminar_requests (
@@ -64,6 +229,274 @@ class SeminarDB:
                 )
             ''')
             
+            # Create recurring seminar series table; occurrences are expanded from the rule on read
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS seminar_series (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    rrule TEXT NOT NULL,
+                    dtstart TEXT NOT NULL,
+                    until_date TEXT,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT NOT NULL,
+                    speaker_name TEXT NOT NULL,
+                    speaker_email TEXT NOT NULL,
+                    speaker_bio TEXT,
+                    topic TEXT NOT NULL,
+                    abstract TEXT,
+                    room TEXT NOT NULL,
+                    seminar_type TEXT NOT NULL DEFAULT 'Others'
+                )
+            ''')
+
+            # Lookup tables for rooms and speakers; key is the normalised name (or speaker email)
+            # used to dedupe spellings, name the canonical spelling shown everywhere
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS rooms (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    key TEXT NOT NULL UNIQUE
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS speakers (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    email TEXT NOT NULL DEFAULT '',
+                    key TEXT NOT NULL UNIQUE
+                )
+            ''')
+            # Each distinct bio text once, keyed by its content hash
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS speaker_bios (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    hash TEXT NOT NULL UNIQUE,
+                    bio TEXT NOT NULL
+                )
+            ''')
+            # Sanitised HTML of bios and abstracts (markup.py), rendered once per distinct text when
+            # it is written and keyed by markup.fragment_key
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS rendered_fragments (
+                    hash TEXT PRIMARY KEY,
+                    html TEXT NOT NULL
+                )
+            ''')
+            # The text columns stay as the denormalised canonical names the views and statistics read
+            for table in LINKED_TABLES:
+                self._add_columns(cursor, table, (('room_id', 'INTEGER REFERENCES rooms(id)'),
+                                                  ('speaker_id', 'INTEGER REFERENCES speakers(id)')))
+                # Rows not linked yet (only before the migration below has run)
+                cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_unlinked ON {table} (room, speaker_name, speaker_email) WHERE room_id IS NULL')
+            # Conflict checks and imports look seminars up by room and time
+            cursor.execute('DROP INDEX IF EXISTS idx_seminars_room_start')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_seminars_room_id_start ON seminars (room_id, start_min)')
+
+            # Sparse per-occurrence overrides; NULL columns inherit from the series
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS seminar_series_exceptions (
+                    series_id INTEGER NOT NULL REFERENCES seminar_series(id) ON DELETE CASCADE,
+                    occurrence_date TEXT NOT NULL,
+                    cancelled INTEGER NOT NULL DEFAULT 0,
+                    date TEXT,
+                    start_time TEXT,
+                    end_time TEXT,
+                    speaker_name TEXT,
+                    speaker_email TEXT,
+                    speaker_bio TEXT,
+                    topic TEXT,
+                    abstract TEXT,
+                    room TEXT,
+                    PRIMARY KEY (series_id, occurrence_date)
+                )
+            ''')
+            # Occurrences moved to a new date are found by it, even outside their series' span
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_series_exceptions_date ON seminar_series_exceptions (date)')
+
+            # Seminars moved out of the hot table: past ones by archive_past_seminars, and deleted ones
+            # (deleted_at set), which are kept but no longer shown or counted
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS seminars_archive (
+                    id INTEGER PRIMARY KEY,
+                    date TEXT NOT NULL,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT NOT NULL,
+                    speaker_name TEXT NOT NULL,
+                    speaker_email TEXT NOT NULL,
+                    speaker_bio TEXT,
+                    topic TEXT NOT NULL,
+                    abstract TEXT,
+                    room TEXT NOT NULL,
+                    seminar_type TEXT NOT NULL DEFAULT 'Others',
+                    start_min INTEGER NOT NULL,
+                    end_min INTEGER NOT NULL,
+                    timezone TEXT NOT NULL DEFAULT '{DEFAULT_TIMEZONE}',
+                    sequence INTEGER NOT NULL DEFAULT 0,
+                    room_id INTEGER REFERENCES rooms(id),
+                    speaker_id INTEGER REFERENCES speakers(id),
+                    bio_id INTEGER REFERENCES speaker_bios(id),
+                    archived_at TEXT NOT NULL,
+                    deleted_at TEXT
+                )
+            ''')
+            # Keyset pagination of the history walks this index newest first
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_seminars_archive_start ON seminars_archive (start_min, id) WHERE deleted_at IS NULL')
+
+            # Move bios stored inline into speaker_bios; the partial indexes make finding such rows free
+            for table in BIO_TABLES:
+                self._add_columns(cursor, table, (('bio_id', 'INTEGER REFERENCES speaker_bios(id)'),))
+                cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_inline_bio ON {table} (id) WHERE speaker_bio IS NOT NULL')
+            self._dedupe_bios(cursor)
+
+            # Per-table data versions, bumped by triggers on every write, so views can cache reads
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS data_versions (
+                    name TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            cursor.execute("INSERT INTO data_versions (name) VALUES ('seminars'), ('seminar_requests'), ('lookups') ON CONFLICT DO NOTHING")
+            for table, name in VERSIONED_TABLES.items():
+                for event in ('INSERT', 'UPDATE', 'DELETE'):
+                    cursor.execute(f'''
+                        CREATE TRIGGER IF NOT EXISTS bump_version_{table}_{event.lower()} AFTER {event} ON {table}
+                        BEGIN
+                            UPDATE data_versions SET version = version + 1 WHERE name = '{name}';
+                        END
+                    ''')
+
+            # Per-month aggregates by seminar type and room, kept current by the triggers below
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS seminar_stats (
+                    month TEXT NOT NULL,
+                    seminar_type TEXT NOT NULL,
+                    room TEXT NOT NULL,
+                    seminars INTEGER NOT NULL DEFAULT 0,
+                    minutes INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (month, seminar_type, room)
+                )
+            ''')
+            # Per-speaker counts behind the distinct-speaker aggregates
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS seminar_stats_speakers (
+                    month TEXT NOT NULL,
+                    seminar_type TEXT NOT NULL,
+                    room TEXT NOT NULL,
+                    speaker_name TEXT NOT NULL,
+                    seminars INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (month, seminar_type, room, speaker_name)
+                )
+            ''')
+            for row, sign, event in (('NEW', '+', 'INSERT'), ('OLD', '-', 'DELETE')):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS seminar_stats_{event.lower()} AFTER {event} ON seminars
+                    BEGIN
+                        {STATS_TRIGGER_BODY.format(row=row, sign=sign)}
+                    END
+                ''')
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS seminar_stats_update
+                AFTER UPDATE OF date, start_time, end_time, speaker_name, room, seminar_type ON seminars
+                BEGIN
+                    {STATS_TRIGGER_BODY.format(row='OLD', sign='-')}
+                    {STATS_TRIGGER_BODY.format(row='NEW', sign='+')}
+                END
+            ''')
+
+            # Archived seminars keep counting, so moving a row there leaves the aggregates unchanged;
+            # deleted ones do not
+            for row, sign, event in (('NEW', '+', 'INSERT'), ('OLD', '-', 'DELETE')):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS seminars_archive_stats_{event.lower()} AFTER {event} ON seminars_archive
+                    WHEN {row}.deleted_at IS NULL
+                    BEGIN
+                        {STATS_TRIGGER_BODY.format(row=row, sign=sign)}
+                    END
+                ''')
+
+            # Backfill the aggregates for seminars that predate the statistics tables
+            cursor.execute('SELECT (SELECT COUNT(*) FROM seminar_stats) = 0 AND EXISTS (SELECT 1 FROM seminars)')
+            if cursor.fetchone()[0]:
+                self._rebuild_statistics(cursor)
+
+            # Link rows that predate the lookup tables, merging spellings of the same room or speaker;
+            # runs after the statistics backfill so the stats triggers move counts to the canonical names
+            self._link_lookups(cursor)
+            # Superseded by the integer (room_id, start_min) index
+            cursor.execute('DROP INDEX IF EXISTS idx_seminars_room_date')
+
+            # Reject double bookings of a room whichever code path writes the row; created after
+            # the linking above, which may merge rooms of seminars that overlap already
+            for event, columns in (('INSERT', ''), ('UPDATE', ' OF room_id, start_min, end_min')):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS seminars_room_conflict_{event.lower()} BEFORE {event}{columns} ON seminars
+                    WHEN {ROOM_OVERLAP_SQL}
+                    BEGIN
+                        SELECT RAISE(ABORT, '{ROOM_CONFLICT}');
+                    END
+                ''')
+
+            # Append-only feed of every write to the tables above, each entry a JSON copy of the row
+            # as written (as it was, for deletes); seq orders entries and is the sync cursor
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS change_log (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    table_name TEXT NOT NULL,
+                    row_id INTEGER NOT NULL,
+                    op TEXT NOT NULL,
+                    changed_at TEXT NOT NULL,
+                    data TEXT NOT NULL
+                )
+            ''')
+            # Recreated only when the copied columns no longer match the table's, after a schema change
+            for table, key in CHANGE_LOG_TABLES.items():
+                columns = [row[1] for row in cursor.execute(f'PRAGMA table_info({table})').fetchall()]
+                for event, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+                    name = f'change_log_{table}_{event.lower()}'
+                    sql = f'''
+                        CREATE TRIGGER {name} AFTER {event} ON {table}
+                        BEGIN
+                            INSERT INTO change_log (table_name, row_id, op, changed_at, data)
+                            VALUES ('{table}', {row}.{key}, '{event.lower()}', strftime('%Y-%m-%dT%H:%M:%fZ', 'now'),
+                                    json_object({', '.join(f"'{column}', {row}.{column}" for column in columns)}));
+                        END
+                    '''.strip()
+                    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,))
+                    existing = cursor.fetchone()
+                    if existing is None or existing[0].strip() != sql:
+                        cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+                        cursor.execute(sql)
+
+            # Outgoing emails queued by scheduled jobs and request submits; dedup_key makes queueing
+            # idempotent per recipient.
+            # A deliverer leases the rows it sends (claimed_by/claimed_until), so no two send one email.
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS email_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    dedup_key TEXT NOT NULL UNIQUE,
+                    recipient TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    sent_at TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    claimed_by TEXT,
+                    claimed_until TEXT
+                )
+            ''')
+            self._add_columns(cursor, 'email_outbox', (('claimed_by', 'TEXT'), ('claimed_until', 'TEXT')))
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_email_outbox_pending ON email_outbox (id) WHERE sent_at IS NULL')
+
+            # Last slot each scheduled job ran for, so restarts neither skip nor repeat runs
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS scheduled_jobs (
+                    name TEXT PRIMARY KEY,
+                    last_slot TEXT,
+                    last_run_at TEXT,
+                    queued INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+
             # Create admin accounts table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS admin_accounts (
@@ -72,35 +505,177 @@ class SeminarDB:
                 )
             ''')
             
-            # Hash the default admin password
-            hashed_password = bcrypt.hashpw('nimda1234'.encode('utf-8'), bcrypt.gensalt())
-            
-            # Insert the hardcoded admin account if not already present
-            cursor.execute('''
-                INSERT OR IGNORE INTO admin_accounts (username, password)
-                VALUES (?, ?)
-            ''', ('admin', hashed_password.decode('utf-8')))
-            
-            # Commit the transaction
+            # Commit the schema before hashing, so replicas starting together do not wait on a
+            # write lock held through bcrypt
             conn.commit()
 
+        self._ensure_admin_account()
+
+
+    def _ensure_admin_account(self):
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM admin_accounts WHERE username = 'admin'")
+            if cursor.fetchone() is None:
+                import bcrypt
+
+                # Hash the default admin password
+                with metrics.span('bcrypt.hashpw'):
+                    hashed_password = bcrypt.hashpw('nimda1234'.encode('utf-8'), bcrypt.gensalt())
+
+                # Insert the hardcoded admin account if not already present
+                cursor.execute('''
+                    INSERT INTO admin_accounts (username, password)
+                    VALUES (?, ?)
+                    ON CONFLICT (username) DO NOTHING
+                ''', ('admin', hashed_password.decode('utf-8')))
+
+                # Commit the transaction
+                conn.commit()
+
 
     def connect(self):
-        return sqlite3.connect(self.db_file)
+        return self.backend.connect()
+
+
+    def data_version(self, name='seminars'):
+        # Changes whenever the named group of tables is written, from any connection or process
+        return self.versions.version(name)
+
+
+    def _add_columns(self, cursor, table, definitions):
+        columns = {row[1] for row in cursor.execute(f'PRAGMA table_info({table})').fetchall()}
+        for column, definition in definitions:
+            if column not in columns:
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+    def _room(self, cursor, name):
+        # Returns (room_id, canonical name), registering the room on first use
+        key = room_key(name)
+        if not key:
+            return None, name
+        cursor.execute('INSERT INTO rooms (name, key) VALUES (?, ?) ON CONFLICT (key) DO NOTHING', (name.strip(), key))
+        cursor.execute('SELECT id, name FROM rooms WHERE key = ?', (key,))
+        return cursor.fetchone()
+
+
+    def _speaker(self, cursor, name, email):
+        # Returns (speaker_id, canonical name); requests may leave the speaker out entirely
+        if not (name or '').strip() and not (email or '').strip():
+            return None, name
+        key = speaker_key(name, email)
+        cursor.execute('INSERT INTO speakers (name, email, key) VALUES (?, ?, ?) ON CONFLICT (key) DO NOTHING',
+                       (' '.join((name or '').split()), (email or '').strip(), key))
+        cursor.execute('SELECT id, name FROM speakers WHERE key = ?', (key,))
+        return cursor.fetchone()
+
+
+    def _bio(self, cursor, bio):
+        # Returns the speaker_bios id of a bio text, storing each distinct text once
+        if bio is None:
+            return None
+        key = bio_key(bio)
+        cursor.execute('INSERT INTO speaker_bios (hash, bio) VALUES (?, ?) ON CONFLICT (hash) DO NOTHING', (key, bio))
+        cursor.execute('SELECT id FROM speaker_bios WHERE hash = ?', (key,))
+        return cursor.fetchone()[0]
+
+
+    def _dedupe_bios(self, cursor):
+        bios = {}
+        for table in BIO_TABLES:
+            # Nothing is read or written unless a bio is still stored inline (the usual case at startup)
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {table} WHERE speaker_bio IS NOT NULL)')
+            if not cursor.fetchone()[0]:
+                continue
+            cursor.execute(f'SELECT id, speaker_bio FROM {table} WHERE speaker_bio IS NOT NULL')
+            rows = cursor.fetchall()
+            for _, bio in rows:
+                if bio not in bios:
+                    bios[bio] = self._bio(cursor, bio)
+            cursor.executemany(f'UPDATE {table} SET speaker_bio = NULL, bio_id = ? WHERE id = ?',
+                               [(bios[bio], row_id) for row_id, bio in rows])
+
+
+    def _render_fragments(self, cursor, *texts):
+        import markup
+        for text in texts:
+            if not (text or '').strip():
+                continue
+            key = markup.fragment_key(text)
+            cursor.execute('SELECT 1 FROM rendered_fragments WHERE hash = ?', (key,))
+            if cursor.fetchone() is None:
+                cursor.execute('INSERT INTO rendered_fragments (hash, html) VALUES (?, ?) ON CONFLICT (hash) DO NOTHING',
+                               (key, markup.render(text)))
+
+
+    def read_rendered_fragment(self, key):
+        # Stored HTML for a markup.fragment_key, or None when that text has not been rendered
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT html FROM rendered_fragments WHERE hash = ?', (key,))
+            row = cursor.fetchone()
+
+        return row[0] if row else None
+
+
+    def _link_lookups(self, cursor):
+        for table in LINKED_TABLES:
+            # Most frequent spellings first, so they become the canonical names
+            cursor.execute(f'''
+                SELECT room, speaker_name, speaker_email FROM {table} WHERE room_id IS NULL
+                GROUP BY 1, 2, 3 ORDER BY COUNT(*) DESC
+            ''')
+            updates = []
+            for room, speaker_name, speaker_email in cursor.fetchall():
+                room_id, canonical_room = self._room(cursor, room)
+                speaker_id, canonical_speaker = self._speaker(cursor, speaker_name, speaker_email)
+                updates.append((room_id, canonical_room, speaker_id, canonical_speaker, room, speaker_name, speaker_email))
+            cursor.executemany(f'''
+                UPDATE {table} SET room_id = ?, room = ?, speaker_id = ?, speaker_name = ?
+                WHERE room_id IS NULL AND room = ? AND speaker_name = ? AND speaker_email = ?
+            ''', updates)
 
 
-    def check_time_conflict(self, date, start_time, end_time, room, exclude_id=None):
+    def read_rooms(self):
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id, name FROM rooms ORDER BY name')
+            rooms = cursor.fetchall()
+
+        return rooms
+
+
+    def read_speakers(self):
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id, name, email FROM speakers ORDER BY name')
+            speakers = cursor.fetchall()
+
+        return speakers
+
+
+    def _backfill_epoch_minutes(self, cursor):
+        cursor.execute('SELECT id, date, start_time, end_time, timezone FROM seminars WHERE start_min IS NULL OR end_min IS NULL')
+        rows = cursor.fetchall()
+        if rows:
+            cursor.executemany('UPDATE seminars SET start_min = ?, end_min = ? WHERE id = ?', [
+                (epoch_minutes(date, start_time, timezone), epoch_minutes(date, end_time, timezone), seminar_id)
+                for seminar_id, date, start_time, end_time, timezone in rows
+            ])
+
+
+    def check_time_conflict(self, date, start_time, end_time, room, exclude_id=None, timezone=DEFAULT_TIMEZONE):
+        # Overlap test on integer keys and minutes; the lower bound on start_min keeps it a single
+        # bounded range scan of the (room_id, start_min) index
+        start_min, end_min = epoch_minutes(date, start_time, timezone), epoch_minutes(date, end_time, timezone)
         query = '''
-        SELECT COUNT(*) FROM seminars 
-        WHERE date = ? 
-        AND room = ?
-        AND (
-            (start_time < ? AND end_time > ?) OR
-            (start_time < ? AND end_time > ?) OR
-            (start_time >= ? AND end_time <= ?)
-        )
+        SELECT COUNT(*) FROM seminars
+        WHERE room_id = (SELECT id FROM rooms WHERE key = ?)
+        AND start_min < ? AND start_min > ?
+        AND end_min > ?
         '''
-        params = [date, room, end_time, start_time, start_time, start_time, start_time, end_time]
+        params = [room_key(room), end_min, start_min - MAX_SEMINAR_MINUTES, start_min]
         
         if exclude_id is not None:
             query += ' AND id != ?'
@@ -111,6 +686,13 @@ class SeminarDB:
             cursor = conn.cursor()
             cursor.execute(query, params)
             count = cursor.fetchone()[0]
+
+            # Occurrences of recurring series are not rows in seminars, so expand them for this date
+            if count == 0:
+                cursor.execute('SELECT name FROM rooms WHERE key = ?', (room_key(room),))
+                row = cursor.fetchone()
+                if row:
+                    count = len(self._series_overlaps(cursor, date, start_time, end_time, row[0], timezone=timezone))
         
         return count > 0
 
@@ -122,14 +704,19 @@ class SeminarDB:
             cursor = conn.cursor()
             
             # Fetch all seminars happening today or later
-            cursor.execute('''
-                SELECT * FROM seminars 
-                WHERE date >= ? 
-                ORDER BY date ASC, start_time ASC
-            ''', (now.strftime("%Y-%m-%d"),))
+            cursor.execute(f'''
+                SELECT {SEMINAR_COLUMNS} FROM seminars
+                WHERE start_min >= ?
+                ORDER BY start_min ASC
+            ''', (epoch_minutes(now, "00:00:00"),))
             
             # Fetch all results
             seminars = cursor.fetchall()
+
+            # Merge in recurring series occurrences from today up to the expansion horizon
+            occurrences = [row for _, _, row in self._expand_series(cursor, now.strftime("%Y-%m-%d"), horizon_end(now))]
+            if occurrences:
+                seminars = sorted(seminars + occurrences, key=lambda s: (s[1], s[2]))
             
             # Reformat the seminars to renumber the IDs
             renumbered_seminars = []
@@ -148,15 +735,27 @@ class SeminarDB:
         with self.connect() as conn:
             cursor = conn.cursor()
             
-            # Fetch all seminars happening today or later
-            cursor.execute('''
-                SELECT * FROM seminars 
-                WHERE date < ? 
-                ORDER BY date DESC, start_time DESC
-            ''', (now.strftime("%Y-%m-%d"),))
+            # Fetch all seminars that happened before today, archived ones included; the history
+            # grows without bound, so it is read through a streaming cursor
+            today = epoch_minutes(now, "00:00:00")
+            history = self.backend.stream_cursor(conn)
+            history.execute(f'''
+                SELECT {SEMINAR_COLUMNS}, start_min FROM seminars
+                WHERE start_min < ?
+                UNION ALL
+                SELECT {SEMINAR_COLUMNS}, start_min FROM seminars_archive
+                WHERE deleted_at IS NULL AND start_min < ?
+                ORDER BY start_min DESC
+            ''', (today, today))
             
             # Fetch all results
-            seminars = cursor.fetchall()
+            seminars = [row[:-1] for row in history]
+
+            # Merge in recurring series occurrences that took place before today
+            yesterday = (now - timedelta(days=1)).strftime("%Y-%m-%d")
+            occurrences = [row for _, _, row in self._expand_series(cursor, '0001-01-01', yesterday)]
+            if occurrences:
+                seminars = sorted(seminars + occurrences, key=lambda s: (s[1], s[2]), reverse=True)
             
             # Reformat the seminars to renumber the IDs
             renumbered_seminars = []
@@ -169,10 +768,84 @@ class SeminarDB:
         return renumbered_seminars
 
 
+    def fetch_past_seminars_page(self, before=None, limit=50):
+        # One page of the history, newest first, from the hot table and the archive together.
+        # before is the cursor returned with the previous page (None for the newest page); returns
+        # (rows, cursor of the next page, or None after the last). Series occurrences are merged in
+        # and only expanded over the page's own time span, so a page costs about the same however
+        # long the history; it holds limit rows, or a few more when several start at once.
+        upper, seminar_id = before or (epoch_minutes(datetime.now().date(), "00:00:00"), 0)
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            # Keyset reads: each table is an index range scan from the cursor, whatever the page
+            cursor.execute(f'''
+                SELECT {SEMINAR_COLUMNS}, start_min FROM seminars
+                WHERE (start_min, id) < (?, ?)
+                UNION ALL
+                SELECT {SEMINAR_COLUMNS}, start_min FROM seminars_archive
+                WHERE deleted_at IS NULL AND (start_min, id) < (?, ?)
+                ORDER BY start_min DESC, id DESC
+                LIMIT ?
+            ''', (upper, seminar_id, upper, seminar_id, limit))
+            rows = cursor.fetchall()
+
+            last = rows[-1] if len(rows) == limit else None
+            if last:
+                # The page's span is [oldest start on it, before)
+                lower = last[-1]
+                occurrences = self._occurrences_between(cursor, lower, upper)
+                exhausted = False
+            else:
+                # No more rows, so nothing bounds the span: widen it back from before until it holds
+                # a page of occurrences or reaches back past the oldest series
+                cursor.execute('''
+                    SELECT MIN(day) FROM (
+                        SELECT MIN(dtstart) AS day FROM seminar_series
+                        UNION ALL
+                        SELECT MIN(date) FROM seminar_series_exceptions
+                    ) AS days
+                ''')
+                earliest = cursor.fetchone()[0]
+                days = PAST_SERIES_WINDOW_DAYS
+                while True:
+                    lower = upper - days * 1440
+                    exhausted = earliest is None or local_date(lower) < earliest
+                    occurrences = self._occurrences_between(cursor, lower, upper) if earliest else []
+                    if exhausted or len(occurrences) >= limit:
+                        break
+                    days *= 4
+
+        # Rows older than the span are only placed right once its occurrences are known
+        page = [(row[-1], row[:-1]) for row in rows if exhausted or row[-1] >= lower]
+        page += [(epoch_minutes(row[1], row[2]), row) for row in occurrences]
+        page.sort(key=lambda item: (item[0], item[1][0] or 0), reverse=True)
+        cut = page[limit - 1][0] if len(page) > limit else None
+        if last and cut == last[-1]:
+            # Only ties at the oldest row's start are over; the row cursor already resumes there
+            cut = None
+        if cut is None and page and not last and not exhausted:
+            cut = page[-1][0]
+        if cut is not None:
+            # Cut after limit, but keep everything starting at the cut together: the next page
+            # starts strictly before it
+            return [row for start, row in page if start >= cut], (cut, 0)
+        return [row for _, row in page], ((last[-1], last[0]) if last else None)
+
+
+    def _occurrences_between(self, cursor, lower, upper):
+        # Series occurrences starting in [lower, upper), both epoch minutes
+        return [
+            row for _, _, row in self._expand_series(cursor, local_date(lower), local_date(upper))
+            if lower <= epoch_minutes(row[1], row[2]) < upper
+        ]
+
+
     def create_seminar_request(self, date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room, submitter_name, submitter_email, seminar_type):
         # Use a context manager to manage the connection
         with self.connect() as conn:
             cursor = conn.cursor()
+            room_id, room = self._room(cursor, room)
+            speaker_id, speaker_name = self._speaker(cursor, speaker_name, speaker_email)
             
             # Check if a similar request already exists
             cursor.execute('''
@@ -186,23 +859,32 @@ class SeminarDB:
                 return False, "A similar seminar request already exists."
             
             # If no similar request exists, insert the new request
+            self._render_fragments(cursor, speaker_bio, abstract)
+            cursor.execute('''
+                INSERT INTO seminar_requests (date, start_time, end_time, speaker_name, speaker_email, bio_id, topic, abstract, room, submitter_name, submitter_email, seminar_type, room_id, speaker_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                RETURNING id
+            ''', (date, start_time, end_time, speaker_name, speaker_email, self._bio(cursor, speaker_bio), topic, abstract, room, submitter_name, submitter_email, seminar_type, room_id, speaker_id))
+            request_id = cursor.fetchone()[0]
+
+            # The coordinator's notification is queued with the request, never sent from here, so
+            # the form does not wait on SMTP; the scheduler or the app's deliverer sends it
+            subject, body = self._coordinator_email(speaker_name, speaker_email, topic, date, start_time, end_time, room)
             cursor.execute('''
-                INSERT INTO seminar_requests (date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room, submitter_name, submitter_email, seminar_type)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room, submitter_name, submitter_email, seminar_type))
+                INSERT INTO email_outbox (dedup_key, recipient, subject, body, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (dedup_key) DO NOTHING
+            ''', (f"request:{request_id}:coordinator", COORDINATOR_EMAIL, subject, body, datetime.now().isoformat(timespec='seconds')))
             
             # Commit the transaction
             conn.commit()
-            
-        # After committing, send an email notification to the seminar coordinator
-        self.send_email_to_coordinator(speaker_name, speaker_email, topic, date, start_time, end_time, room)
 
         return True, "Seminar request submitted successfully."
 
     def read_seminar_requests(self):
         with self.connect() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM seminar_requests')
+            cursor.execute(f'SELECT {REQUEST_COLUMNS} FROM seminar_requests')
             seminar_requests = cursor.fetchall()
         
         return seminar_requests
@@ -227,20 +909,25 @@ class SeminarDB:
                     # Send rejection email notification BEFORE deleting the request
                     self.send_email_notification(submitter_name, submitter_email, topic, status)
                     
-                    # After email is sent, delete the seminar request
-                    self.delete_seminar_request(request_id)
+                    # After email is sent, delete the seminar request, recording the outcome in the change log
+                    cursor.execute("UPDATE seminar_requests SET status = 'rejected' WHERE id = ?", (request_id,))
+                    cursor.execute('DELETE FROM seminar_requests WHERE id = ?', (request_id,))
                     
                     # Commit the changes to the database
                     conn.commit()
                     
                     return True, "Seminar request rejected and removed from the list."
                 else:
+                    room_id, room = self._room(cursor, room)
+                    speaker_id, speaker_name = self._speaker(cursor, speaker_name, speaker_email)
+
                     # Update the seminar request with the provided details
                     cursor.execute('''
                         UPDATE seminar_requests
-                        SET date = ?, start_time = ?, end_time = ?, speaker_name = ?, speaker_email = ?, speaker_bio = ?, topic = ?, abstract = ?, room = ?, status = ?, seminar_type=? 
+                        SET date = ?, start_time = ?, end_time = ?, speaker_name = ?, speaker_email = ?, speaker_bio = NULL, bio_id = ?, topic = ?, abstract = ?, room = ?, status = ?, seminar_type=?,
+                            room_id = ?, speaker_id = ?
                         WHERE id = ?
-                    ''', (date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room, status, seminar_type, request_id))
+                    ''', (date, start_time, end_time, speaker_name, speaker_email, self._bio(cursor, speaker_bio), topic, abstract, room, status, seminar_type, room_id, speaker_id, request_id))
                     
                     # Commit the changes to the database
                     conn.commit()
@@ -258,9 +945,17 @@ class SeminarDB:
             # Use context manager to handle the connection
             with self.connect() as conn:
                 cursor = conn.cursor()
-                
+
+                # Mark the request first: the write lock (row lock on PostgreSQL) makes a concurrent
+                # approval of the same request wait, then find it gone. Marking it also leaves the
+                # outcome in the change log.
+                cursor.execute("UPDATE seminar_requests SET status = 'approved' WHERE id = ?", (request_id,))
+                if cursor.rowcount == 0:
+                    conn.rollback()
+                    return False, "Seminar request not found."
+
                 # Fetch the seminar request
-                cursor.execute('SELECT * FROM seminar_requests WHERE id = ?', (request_id,))
+                cursor.execute(f'SELECT {REQUEST_COLUMNS} FROM seminar_requests WHERE id = ?', (request_id,))
                 request = cursor.fetchone()
                 
                 if request:
@@ -269,13 +964,17 @@ class SeminarDB:
                     submitter_email = request[11]
                     topic = request[7]
                     
-                    # Create a new seminar using the relevant request data (excluding id and status)
-                    self.create_seminar(*request[1:11])
+                    # Create a new seminar from the request's details and seminar type, on this
+                    # connection and in this transaction; a clash rolls back the mark, keeping the
+                    # request pending so it can be edited and approved again
+                    success, message = self._insert_seminar(conn, cursor, *request[1:10], request[13])
+                    if not success:
+                        return False, message
                     
                     # After creating the seminar, delete the request from the seminar_requests table
                     cursor.execute('DELETE FROM seminar_requests WHERE id = ?', (request_id,))
                     
-                    # Commit the changes to the database
+                    # Seminar, mark and delete commit together
                     conn.commit()
                     
                     # Send an email to notify the submitter about the approval
@@ -300,39 +999,91 @@ class SeminarDB:
         return count > 0
 
 
-    def create_seminar(self, date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room, seminar_type):
-        # First, check if there is a time conflict in the room
-        if self.check_time_conflict(date, start_time, end_time, room):
-            return False, "Time conflict: Another seminar is scheduled in the same room during this time slot."
-        
+    def create_seminar(self, date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room, seminar_type,
+                       timezone=DEFAULT_TIMEZONE):
         # Use context manager to handle connection and ensure it is properly closed
         with self.connect() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO seminars (date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room, seminar_type)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room, seminar_type))
-            
+            success, message = self._insert_seminar(conn, cursor, date, start_time, end_time, speaker_name, speaker_email,
+                                                    speaker_bio, topic, abstract, room, seminar_type, timezone)
+            if not success:
+                return False, message
+
             # Commit the transaction to save the new seminar
             conn.commit()
         
         return True, "Seminar added successfully."
 
 
-    def update_seminar(self, seminar_id, date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room, seminar_type):
-        # Check if there's a time conflict with other seminars
-        if self.check_time_conflict(date, start_time, end_time, room, exclude_id=seminar_id):
+    def _insert_seminar(self, conn, cursor, date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room, seminar_type,
+                        timezone=DEFAULT_TIMEZONE):
+        # Insert a seminar in the caller's transaction; on a time conflict the transaction is
+        # rolled back and (False, message) returned. The caller commits.
+        # date and times are wall-clock times in timezone.
+        if timezone not in pytz.all_timezones_set:
+            return False, f"Unknown time zone: {timezone}."
+        room_id, room = self._room(cursor, room)
+        speaker_id, speaker_name = self._speaker(cursor, speaker_name, speaker_email)
+
+        # Series occurrences are not rows, so the database cannot see them; check them here
+        if self._series_overlaps(cursor, date, start_time, end_time, room, timezone=timezone):
+            conn.rollback()
             return False, "Time conflict: Another seminar is scheduled in the same room during this time slot."
-        
+
+        # Overlaps with other seminars are rejected by the database (trigger or exclusion constraint)
+        try:
+            cursor.execute('''
+                INSERT INTO seminars (date, start_time, end_time, speaker_name, speaker_email, bio_id, topic, abstract, room, seminar_type, start_min, end_min, timezone, room_id, speaker_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (date, start_time, end_time, speaker_name, speaker_email, self._bio(cursor, speaker_bio), topic, abstract, room, seminar_type,
+                  epoch_minutes(date, start_time, timezone), epoch_minutes(date, end_time, timezone), timezone, room_id, speaker_id))
+        except self.backend.IntegrityError as e:
+            if not self.backend.is_booking_conflict(e):
+                raise
+            conn.rollback()
+            return False, "Time conflict: Another seminar is scheduled in the same room during this time slot."
+
+        # Render bio and abstract now, so the detail panel never parses them
+        self._render_fragments(cursor, speaker_bio, abstract)
+        return True, "Seminar added successfully."
+
+
+    def update_seminar(self, seminar_id, date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room, seminar_type,
+                       timezone=None):
         # Use context manager to handle connection
         with self.connect() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE seminars
-                SET date = ?, start_time = ?, end_time = ?, speaker_name = ?, speaker_email = ?, speaker_bio = ?, topic = ?, abstract = ?, room = ?, seminar_type=?
-                WHERE id = ?
-            ''', (date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room, seminar_type, seminar_id))
+            # Without a timezone the seminar keeps the one it has
+            if timezone is None:
+                cursor.execute('SELECT timezone FROM seminars WHERE id = ?', (seminar_id,))
+                row = cursor.fetchone()
+                timezone = row[0] if row else DEFAULT_TIMEZONE
+            if timezone not in pytz.all_timezones_set:
+                return False, f"Unknown time zone: {timezone}."
+            room_id, room = self._room(cursor, room)
+            speaker_id, speaker_name = self._speaker(cursor, speaker_name, speaker_email)
+
+            if self._series_overlaps(cursor, date, start_time, end_time, room, timezone=timezone):
+                conn.rollback()
+                return False, "Time conflict: Another seminar is scheduled in the same room during this time slot."
+
+            try:
+                cursor.execute('''
+                    UPDATE seminars
+                    SET date = ?, start_time = ?, end_time = ?, speaker_name = ?, speaker_email = ?, speaker_bio = NULL, bio_id = ?, topic = ?, abstract = ?, room = ?, seminar_type=?,
+                        start_min = ?, end_min = ?, timezone = ?, sequence = sequence + 1, room_id = ?, speaker_id = ?
+                    WHERE id = ?
+                ''', (date, start_time, end_time, speaker_name, speaker_email, self._bio(cursor, speaker_bio), topic, abstract, room, seminar_type,
+                      epoch_minutes(date, start_time, timezone), epoch_minutes(date, end_time, timezone), timezone, room_id, speaker_id, seminar_id))
+            except self.backend.IntegrityError as e:
+                if not self.backend.is_booking_conflict(e):
+                    raise
+                conn.rollback()
+                return False, "Time conflict: Another seminar is scheduled in the same room during this time slot."
             
+            # Render bio and abstract now, so the detail panel never parses them
+            self._render_fragments(cursor, speaker_bio, abstract)
+
             # Commit the transaction to save the updates
             conn.commit()
         
@@ -343,18 +1094,285 @@ class SeminarDB:
         # Use context manager to handle connection
         with self.connect() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM seminars')
+            cursor.execute(f'SELECT {SEMINAR_COLUMNS} FROM seminars')
             seminars = cursor.fetchall()        
         return seminars
 
 
+    def iter_seminars(self, batch_size=1000, with_timezone=False, with_series=False):
+        # Stream seminars, archived ones included, in batches so exports never hold the whole
+        # table in memory; with_timezone appends each seminar's zone, for calendar exports.
+        # with_series merges in the occurrences of recurring series, in start order, with ids
+        # 'series-<series id>-<occurrence date>'.
+        columns = f'{SEMINAR_COLUMNS}, timezone' if with_timezone else SEMINAR_COLUMNS
+        with self.connect() as conn:
+            cursor = self.backend.stream_cursor(conn)
+            cursor.execute(f'''
+                SELECT {columns}, start_min FROM seminars_archive WHERE deleted_at IS NULL
+                UNION ALL
+                SELECT {columns}, start_min FROM seminars
+                ORDER BY start_min ASC
+            ''')
+            rows = self._fetch_batches(cursor, batch_size)
+            if with_series:
+                occurrences = self._iter_all_occurrences(conn.cursor(), with_timezone)
+                rows = heapq.merge(rows, occurrences, key=lambda row: row[-1])
+            for row in rows:
+                yield row[:-1]
+
+
+    def _fetch_batches(self, cursor, batch_size):
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield from batch
+
+
+    def _iter_all_occurrences(self, cursor, with_timezone, window_days=366):
+        # Every series occurrence, with start_min last, expanded a window at a time; open-ended
+        # series run to the horizon, as everywhere else
+        cursor.execute('SELECT MIN(dtstart), MAX(until_date), COUNT(*) - COUNT(until_date) FROM seminar_series')
+        first, last, open_ended = cursor.fetchone()
+        if first is None:
+            return
+        cursor.execute('SELECT MIN(date), MAX(date) FROM seminar_series_exceptions')
+        moved = [day for day in cursor.fetchone() if day]
+        first = min([first] + moved)
+        last = max([last or first] + moved + ([horizon_end()] if open_ended else []))
+
+        start = datetime.strptime(first, "%Y-%m-%d")
+        while start.strftime("%Y-%m-%d") <= last:
+            end = start + timedelta(days=window_days - 1)
+            window = []
+            for series_id, occurrence_date, row in self._expand_series(cursor, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")):
+                window.append((f'series-{series_id}-{occurrence_date}', *row[1:], *([DEFAULT_TIMEZONE] if with_timezone else []),
+                               epoch_minutes(row[1], row[2])))
+            yield from sorted(window, key=lambda row: row[-1])
+            start = end + timedelta(days=1)
+
+
+    def import_seminars(self, rows, chunk_size=5000):
+        # rows yields (line_number, row_dict) as produced by bulk.read_csv / bulk.read_ics.
+        # Bad rows are reported and skipped; each chunk is validated, conflict-checked and
+        # inserted in its own transaction.
+        from bulk import validate_row
+        imported = 0
+        errors = []
+
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('CREATE TEMP TABLE IF NOT EXISTS import_keys (room_id INTEGER, day_start INTEGER)')
+
+            chunk = []
+            for line_number, row in rows:
+                try:
+                    if isinstance(row, Exception):
+                        raise row
+                    chunk.append((line_number, validate_row(row)))
+                except ValueError as e:
+                    errors.append((line_number, str(e)))
+                    continue
+                if len(chunk) >= chunk_size:
+                    imported += self._import_chunk(conn, cursor, chunk, errors)
+                    chunk = []
+            if chunk:
+                imported += self._import_chunk(conn, cursor, chunk, errors)
+
+        return imported, errors
+
+
+    def _import_chunk(self, conn, cursor, chunk, errors, retried=False):
+        # Resolve each distinct room, speaker and bio of the chunk once, to its id (and canonical name)
+        rooms = {}
+        speakers = {}
+        bios = {}
+        for _, row in chunk:
+            if row[8] not in rooms:
+                rooms[row[8]] = self._room(cursor, row[8])
+            if (row[3], row[4]) not in speakers:
+                speakers[(row[3], row[4])] = self._speaker(cursor, row[3], row[4])
+            if row[5] not in bios:
+                bios[row[5]] = self._bio(cursor, row[5])
+
+        # Look up existing bookings for every (room, day) in the chunk with a single join
+        cursor.execute('DELETE FROM import_keys')
+        cursor.executemany('INSERT INTO import_keys (room_id, day_start) VALUES (?, ?)',
+                           {(rooms[row[8]][0], epoch_minutes(row[0], '00:00:00')) for _, row in chunk})
+        cursor.execute('''
+            SELECT DISTINCT s.room_id, s.start_min, s.end_min
+            FROM import_keys k JOIN seminars s
+            ON s.room_id = k.room_id AND s.start_min >= k.day_start - ? AND s.start_min < k.day_start + ?
+        ''', (MAX_SEMINAR_MINUTES, MAX_SEMINAR_MINUTES))
+        booked = {}
+        for room_id, start_min, end_min in cursor.fetchall():
+            _book(booked, room_id, start_min, end_min)
+        room_ids = {name: room_id for room_id, name in rooms.values()}
+        dates = [row[0] for _, row in chunk]
+        for _, _, row in self._expand_series(cursor, min(dates), max(dates)):
+            booked.setdefault((room_ids.get(row[9]), row[1]), []).append((epoch_minutes(row[1], row[2]), epoch_minutes(row[1], row[3])))
+
+        accepted = []
+        conflicts = []
+        for line_number, row in chunk:
+            room_id, room = rooms[row[8]]
+            speaker_id, speaker_name = speakers[(row[3], row[4])]
+            slots = booked.setdefault((room_id, row[0]), [])
+            start_min, end_min = epoch_minutes(row[0], row[1]), epoch_minutes(row[0], row[2])
+            if _overlaps(slots, start_min, end_min):
+                conflicts.append((line_number, f"time conflict in room {room} on {row[0]}"))
+                continue
+            slots.append((start_min, end_min))
+            accepted.append(row[:3] + (speaker_name, row[4], bios[row[5]]) + row[6:8] + (room, row[9],
+                            start_min, end_min, room_id, speaker_id))
+
+        try:
+            cursor.executemany('''
+                INSERT INTO seminars (date, start_time, end_time, speaker_name, speaker_email, bio_id, topic, abstract, room, seminar_type, start_min, end_min, room_id, speaker_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', accepted)
+        except self.backend.IntegrityError as e:
+            # Another writer booked one of these slots since the lookup above; redo the chunk once
+            # against the bookings as they are now
+            if retried or not self.backend.is_booking_conflict(e):
+                raise
+            conn.rollback()
+            return self._import_chunk(conn, cursor, chunk, errors, retried=True)
+        conn.commit()
+        errors.extend(conflicts)
+        return len(accepted)
+
+
+    def _rebuild_statistics(self, cursor):
+        # Minutes as the triggers of each backend count them
+        if self.backend.dialect == 'sqlite':
+            minutes = "(strftime('%s', date || ' ' || end_time) - strftime('%s', date || ' ' || start_time)) / 60"
+        else:
+            minutes = 'end_min - start_min'
+        counted = '''(
+            SELECT date, start_time, end_time, start_min, end_min, seminar_type, room, speaker_name FROM seminars
+            UNION ALL
+            SELECT date, start_time, end_time, start_min, end_min, seminar_type, room, speaker_name FROM seminars_archive
+            WHERE deleted_at IS NULL
+        ) AS counted'''
+        cursor.execute('DELETE FROM seminar_stats')
+        cursor.execute('DELETE FROM seminar_stats_speakers')
+        cursor.execute(f'''
+            INSERT INTO seminar_stats (month, seminar_type, room, seminars, minutes)
+            SELECT substr(date, 1, 7), seminar_type, room, COUNT(*), SUM({minutes})
+            FROM {counted}
+            GROUP BY 1, 2, 3
+        ''')
+        cursor.execute(f'''
+            INSERT INTO seminar_stats_speakers (month, seminar_type, room, speaker_name, seminars)
+            SELECT substr(date, 1, 7), seminar_type, room, speaker_name, COUNT(*)
+            FROM {counted}
+            GROUP BY 1, 2, 3, 4
+        ''')
+
+
+    def rebuild_statistics(self):
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            self._rebuild_statistics(cursor)
+            conn.commit()
+
+
+    def reindex(self):
+        # Rebuild the statistics tables and every index, then refresh the query planner's statistics
+        self.rebuild_statistics()
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            if self.backend.dialect == 'sqlite':
+                cursor.execute('REINDEX')
+            cursor.execute('ANALYZE')
+            conn.commit()
+
+
+    def read_statistics(self, period='month'):
+        # Aggregates per period ('month' or 'term'), seminar type and room: (period, seminar_type,
+        # room, seminars, minutes, distinct speakers). One-off seminars come from the statistics
+        # tables; series occurrences, which are not rows the triggers see, are expanded and added.
+        period_sql = 'month' if period == 'month' else TERM_SQL
+        groups = {}
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT {period_sql}, seminar_type, room, SUM(seminars), SUM(minutes) FROM seminar_stats GROUP BY 1, 2, 3')
+            for name, seminar_type, room, seminars, minutes in cursor.fetchall():
+                groups[(name, seminar_type, room)] = [seminars, minutes, set()]
+            cursor.execute(f'SELECT DISTINCT {period_sql}, seminar_type, room, speaker_name FROM seminar_stats_speakers')
+            for name, seminar_type, room, speaker_name in cursor.fetchall():
+                groups.setdefault((name, seminar_type, room), [0, 0, set()])[2].add(speaker_name)
+            for row in self._iter_all_occurrences(cursor, False):
+                month = row[1][:7]
+                name = month if period == 'month' else f"{month[:4]} {'Spring' if int(month[5:7]) <= 6 else 'Autumn'}"
+                group = groups.setdefault((name, row[10], row[9]), [0, 0, set()])
+                group[0] += 1
+                group[1] += epoch_minutes(row[1], row[3]) - row[-1]
+                group[2].add(row[4])
+
+        statistics = [(*key, seminars, minutes, len(speakers)) for key, (seminars, minutes, speakers) in groups.items()]
+        # Newest period first, then by type and room
+        statistics.sort(key=lambda row: (row[1], row[2]))
+        statistics.sort(key=lambda row: row[0], reverse=True)
+        return statistics
+
+
+    def read_speaker_frequency(self, limit=20):
+        # Seminars per speaker, series occurrences included, most frequent first
+        counts = {}
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT speaker_name, SUM(seminars) FROM seminar_stats_speakers GROUP BY speaker_name')
+            counts.update(cursor.fetchall())
+            for row in self._iter_all_occurrences(cursor, False):
+                counts[row[4]] = counts.get(row[4], 0) + 1
+
+        return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
     def delete_seminar(self, seminar_id):
-        # Use context manager to handle connection
+        # Soft delete: the seminar moves to the archive marked as deleted, out of every list and
+        # the statistics, but kept for the record
+        deleted_at = datetime.now().isoformat(timespec='seconds')
         with self.connect() as conn:
             cursor = conn.cursor()
+            cursor.execute(f'''
+                INSERT INTO seminars_archive ({ARCHIVED_COLUMNS}, archived_at, deleted_at)
+                SELECT {ARCHIVED_COLUMNS}, ?, ? FROM seminars WHERE id = ?
+                ON CONFLICT (id) DO NOTHING
+            ''', (deleted_at, deleted_at, seminar_id))
             cursor.execute('DELETE FROM seminars WHERE id = ?', (seminar_id,))
             conn.commit()
 
+
+    def archive_past_seminars(self, after_days=ARCHIVE_AFTER_DAYS, batch_size=500):
+        # Moves seminars that started more than after_days ago into seminars_archive, keeping the
+        # hot table small for conflict checks and upcoming lists. Each batch is copied and deleted
+        # in one transaction, so the job can be stopped at any point and simply run again.
+        # Returns the number of seminars moved.
+        cutoff = epoch_minutes(datetime.now().date() - timedelta(days=after_days), "00:00:00")
+        archived_at = datetime.now().isoformat(timespec='seconds')
+        moved = 0
+        while True:
+            with self.connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT id FROM seminars WHERE start_min < ? ORDER BY start_min LIMIT ?', (cutoff, batch_size))
+                ids = [row[0] for row in cursor.fetchall()]
+                if not ids:
+                    break
+                placeholders = ', '.join('?' for _ in ids)
+                cursor.execute(f'''
+                    INSERT INTO seminars_archive ({ARCHIVED_COLUMNS}, archived_at)
+                    SELECT {ARCHIVED_COLUMNS}, ? FROM seminars WHERE id IN ({placeholders})
+                    ON CONFLICT (id) DO NOTHING
+                ''', (archived_at, *ids))
+                cursor.execute(f'DELETE FROM seminars WHERE id IN ({placeholders})', ids)
+                conn.commit()
+            moved += len(ids)
+
+        return moved
+
     def delete_seminar_request(self, request_id):
         # Use context manager to handle connection
         with self.connect() as conn:
@@ -363,6 +1381,340 @@ class SeminarDB:
             conn.commit()
 
 
+    def _expand_series(self, cursor, window_start, window_end, exclude=None):
+        # Returns (series_id, occurrence_date, seminar_row) for every occurrence in the window,
+        # with exceptions applied. seminar_row has the seminars column layout and id None. A series
+        # whose span misses the window still counts when one of its occurrences was moved into it.
+        cursor.execute('''
+            SELECT id, rrule, dtstart, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room, seminar_type
+            FROM seminar_series
+            WHERE (dtstart <= ? AND (until_date IS NULL OR until_date >= ?))
+               OR id IN (SELECT series_id FROM seminar_series_exceptions WHERE date >= ? AND date <= ?)
+        ''', (window_end, window_start, window_start, window_end))
+        series_rows = cursor.fetchall()
+        if not series_rows:
+            return []
+
+        # Load the sparse exceptions of all matching series in one query
+        placeholders = ', '.join('?' for _ in series_rows)
+        cursor.execute(f'''
+            SELECT series_id, occurrence_date, cancelled, {', '.join(SERIES_OVERRIDE_FIELDS)}
+            FROM seminar_series_exceptions
+            WHERE series_id IN ({placeholders})
+        ''', [row[0] for row in series_rows])
+        exceptions = {}
+        for row in cursor.fetchall():
+            exceptions.setdefault(row[0], {})[row[1]] = row
+
+        occurrences = []
+        for series in series_rows:
+            series_id, rule, dtstart = series[0:3]
+            series_exceptions = exceptions.get(series_id, {})
+            dates = list(iter_occurrences(rule, dtstart, window_start, window_end))
+
+            # Overrides can move an occurrence into the window from outside it
+            in_window = set(dates)
+            dates += [d for d, ex in series_exceptions.items()
+                      if d not in in_window and ex[3] and window_start <= ex[3] <= window_end]
+
+            for occurrence_date in dates:
+                if exclude == (series_id, occurrence_date):
+                    continue
+                row = [None, occurrence_date, *series[3:12]]
+                exception = series_exceptions.get(occurrence_date)
+                if exception:
+                    if exception[2]:
+                        continue
+                    for i, value in enumerate(exception[3:], start=1):
+                        if value is not None:
+                            row[i] = value
+                    if not window_start <= row[1] <= window_end:
+                        continue
+                occurrences.append((series_id, occurrence_date, tuple(row)))
+
+        return occurrences
+
+
+    def _series_overlaps(self, cursor, date, start_time, end_time, room, exclude=None, timezone=DEFAULT_TIMEZONE):
+        # Series run in DEFAULT_TIMEZONE, so compare in epoch minutes; a slot held in another
+        # zone can fall on a different local date here
+        start_min, end_min = epoch_minutes(date, start_time, timezone), epoch_minutes(date, end_time, timezone)
+        return [
+            (series_id, occurrence_date)
+            for series_id, occurrence_date, row in self._expand_series(cursor, local_date(start_min), local_date(end_min - 1), exclude)
+            if row[9] == room and epoch_minutes(row[1], row[2]) < end_min and epoch_minutes(row[1], row[3]) > start_min
+        ]
+
+
+    def fetch_series_occurrences(self, window_start, window_end):
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            occurrences = self._expand_series(cursor, window_start, window_end)
+
+        return sorted((row for _, _, row in occurrences), key=lambda s: (s[1], s[2]))
+
+
+    def create_seminar_series(self, rrule, dtstart, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room, seminar_type):
+        # Expand the whole series once; open-ended rules are checked up to the horizon
+        until_date = last_occurrence(rrule, dtstart)
+        dates = list(iter_occurrences(rrule, dtstart, dtstart, until_date or horizon_end()))
+        if not dates:
+            return False, "The recurrence rule does not produce any occurrences."
+
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            room_id, room = self._room(cursor, room)
+            speaker_id, speaker_name = self._speaker(cursor, speaker_name, speaker_email)
+
+            # Collect everything already booked in this room across the series span in one pass
+            booked = {}
+            cursor.execute('''
+                SELECT start_min, end_min FROM seminars
+                WHERE room_id = ? AND start_min >= ? AND start_min < ?
+            ''', (room_id, epoch_minutes(dates[0], '00:00:00') - MAX_SEMINAR_MINUTES,
+                  epoch_minutes(dates[-1], '00:00:00') + MAX_SEMINAR_MINUTES))
+            for booked_start, booked_end in cursor.fetchall():
+                _book(booked, None, booked_start, booked_end)
+            for _, _, row in self._expand_series(cursor, dates[0], dates[-1]):
+                if row[9] == room:
+                    booked.setdefault((None, row[1]), []).append((epoch_minutes(row[1], row[2]), epoch_minutes(row[1], row[3])))
+
+            conflicts = [date for date in dates
+                         if _overlaps(booked.get((None, date), []), epoch_minutes(date, start_time), epoch_minutes(date, end_time))]
+            if conflicts:
+                shown = ', '.join(conflicts[:5]) + (', ...' if len(conflicts) > 5 else '')
+                # Do not keep lookup rows registered for a series that was not created
+                conn.rollback()
+                return False, f"Time conflict: {len(conflicts)} occurrence(s) clash with existing seminars in this room ({shown})."
+
+            cursor.execute('''
+                INSERT INTO seminar_series (rrule, dtstart, until_date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room, seminar_type, room_id, speaker_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (rrule, dtstart, until_date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room, seminar_type, room_id, speaker_id))
+
+            # Commit the whole series as a single transaction
+            conn.commit()
+
+        return True, f"Seminar series with {len(dates)} occurrences added successfully."
+
+
+    def read_seminar_series(self):
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM seminar_series')
+            series = cursor.fetchall()
+
+        return series
+
+
+    def update_series_occurrence(self, series_id, occurrence_date, date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room):
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT {", ".join(SERIES_OVERRIDE_FIELDS[1:])} FROM seminar_series WHERE id = ?', (series_id,))
+            series = cursor.fetchone()
+            if not series:
+                return False, "Seminar series not found."
+
+            room_id, room = self._room(cursor, room)
+            _, speaker_name = self._speaker(cursor, speaker_name, speaker_email)
+
+            # Check the moved occurrence against single seminars and the other occurrences
+            start_min, end_min = epoch_minutes(date, start_time), epoch_minutes(date, end_time)
+            cursor.execute('''
+                SELECT COUNT(*) FROM seminars
+                WHERE room_id = ? AND start_min < ? AND start_min > ? AND end_min > ?
+            ''', (room_id, end_min, start_min - MAX_SEMINAR_MINUTES, start_min))
+            if cursor.fetchone()[0] > 0 or self._series_overlaps(cursor, date, start_time, end_time, room, exclude=(series_id, occurrence_date)):
+                # Nothing of this call is kept, not even a room it registered
+                conn.rollback()
+                return False, "Time conflict: Another seminar is scheduled in the same room during this time slot."
+
+            # Only store the fields that differ from the series
+            inherited = (occurrence_date, *series)
+            values = (date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room)
+            overrides = [value if value != base else None for value, base in zip(values, inherited)]
+            cursor.execute(f'''
+                INSERT INTO seminar_series_exceptions (series_id, occurrence_date, cancelled, {', '.join(SERIES_OVERRIDE_FIELDS)})
+                VALUES (?, ?, 0, {', '.join('?' for _ in SERIES_OVERRIDE_FIELDS)})
+                ON CONFLICT (series_id, occurrence_date) DO UPDATE
+                SET cancelled = 0, {', '.join(f'{field} = excluded.{field}' for field in SERIES_OVERRIDE_FIELDS)}
+            ''', (series_id, occurrence_date, *overrides))
+            conn.commit()
+
+        return True, "Seminar occurrence updated successfully."
+
+
+    def cancel_series_occurrence(self, series_id, occurrence_date):
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO seminar_series_exceptions (series_id, occurrence_date, cancelled)
+                VALUES (?, ?, 1)
+                ON CONFLICT (series_id, occurrence_date) DO UPDATE SET cancelled = 1
+            ''', (series_id, occurrence_date))
+            conn.commit()
+
+
+    def delete_seminar_series(self, series_id):
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM seminar_series_exceptions WHERE series_id = ?', (series_id,))
+            cursor.execute('DELETE FROM seminar_series WHERE id = ?', (series_id,))
+            conn.commit()
+
+
+    def fetch_seminars_between(self, start, end):
+        # Seminars and series occurrences starting in [start, end) (local datetimes), in start order;
+        # single seminars come from a range scan of the start_min index
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT {SEMINAR_COLUMNS} FROM seminars
+                WHERE start_min >= ? AND start_min < ?
+                ORDER BY start_min
+            ''', (epoch_minutes(start.strftime("%Y-%m-%d"), start.strftime("%H:%M:%S")),
+                  epoch_minutes(end.strftime("%Y-%m-%d"), end.strftime("%H:%M:%S"))))
+            seminars = cursor.fetchall()
+
+            lower, upper = start.strftime("%Y-%m-%d %H:%M:%S"), end.strftime("%Y-%m-%d %H:%M:%S")
+            seminars += [row for _, _, row in self._expand_series(cursor, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+                         if lower <= f"{row[1]} {row[2]}" < upper]
+
+        return sorted(seminars, key=lambda s: (s[1], s[2]))
+
+
+    def changes_since(self, seq=0, limit=1000, tables=None):
+        # Change log entries after seq, oldest first: (seq, table_name, row_id, op, changed_at, row).
+        # Pass the last seq seen to get only what changed since; row is the row as a dict.
+        query = 'SELECT seq, table_name, row_id, op, changed_at, data FROM change_log WHERE seq > ?'
+        params = [seq]
+        if tables:
+            query += f" AND table_name IN ({', '.join('?' for _ in tables)})"
+            params += list(tables)
+        query += ' ORDER BY seq LIMIT ?'
+        params.append(limit)
+
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            changes = [(*row[:5], json.loads(row[5])) for row in cursor.fetchall()]
+
+        return changes
+
+
+    def last_change_seq(self):
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM change_log')
+            seq = cursor.fetchone()[0]
+
+        return seq
+
+
+    def run_scheduled_job(self, name, slot, messages):
+        # Claims the job's slot and queues its messages in one transaction. Returns the number of
+        # newly queued messages, or None when the slot was already run (here or by another process).
+        # messages are (dedup_key, recipient, subject, body); keys already queued are skipped.
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('INSERT INTO scheduled_jobs (name) VALUES (?) ON CONFLICT (name) DO NOTHING', (name,))
+            cursor.execute('''
+                UPDATE scheduled_jobs SET last_slot = ?, last_run_at = ?
+                WHERE name = ? AND (last_slot IS NULL OR last_slot < ?)
+            ''', (slot, datetime.now().isoformat(timespec='seconds'), name, slot))
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return None
+
+            created_at = datetime.now().isoformat(timespec='seconds')
+            cursor.executemany('''
+                INSERT INTO email_outbox (dedup_key, recipient, subject, body, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (dedup_key) DO NOTHING
+            ''', [(key, recipient, subject, body, created_at) for key, recipient, subject, body in messages])
+            queued = cursor.rowcount
+            cursor.execute('UPDATE scheduled_jobs SET queued = ? WHERE name = ?', (queued, name))
+            conn.commit()
+
+        return queued
+
+
+    def read_scheduled_jobs(self):
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT name, last_slot, last_run_at, queued FROM scheduled_jobs ORDER BY name')
+            jobs = cursor.fetchall()
+
+        return jobs
+
+
+    def claim_emails(self, limit=100, lease_seconds=EMAIL_CLAIM_SECONDS):
+        # Lease up to limit unsent emails nobody else holds. Returns (claim, [(id, recipient,
+        # subject, body)]); only the holder of the claim can mark the emails sent or failed.
+        claim = secrets.token_hex(8)
+        now = datetime.now()
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            # The lease test is repeated outside the subquery: a PostgreSQL UPDATE that waited on a
+            # row another deliverer was claiming re-checks it against the committed row and skips it
+            cursor.execute('''
+                UPDATE email_outbox SET claimed_by = ?, claimed_until = ?
+                WHERE id IN (
+                    SELECT id FROM email_outbox
+                    WHERE sent_at IS NULL AND attempts < ? AND (claimed_until IS NULL OR claimed_until < ?)
+                    ORDER BY id LIMIT ?
+                ) AND sent_at IS NULL AND (claimed_until IS NULL OR claimed_until < ?)
+            ''', (claim, (now + timedelta(seconds=lease_seconds)).isoformat(timespec='seconds'), MAX_EMAIL_ATTEMPTS,
+                  now.isoformat(timespec='seconds'), limit, now.isoformat(timespec='seconds')))
+            cursor.execute('SELECT id, recipient, subject, body FROM email_outbox WHERE claimed_by = ? ORDER BY id', (claim,))
+            emails = cursor.fetchall()
+            conn.commit()
+
+        return claim, emails
+
+
+    def outbox_depth(self):
+        # Emails still waiting for delivery; the request form backs off while there are many
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM email_outbox WHERE sent_at IS NULL AND attempts < ?', (MAX_EMAIL_ATTEMPTS,))
+            depth = cursor.fetchone()[0]
+
+        return depth
+
+
+    def mark_email_sent(self, email_id, claim):
+        # False when the claim had lapsed and another deliverer took the email over
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('UPDATE email_outbox SET sent_at = ?, attempts = attempts + 1 WHERE id = ? AND claimed_by = ?',
+                           (datetime.now().isoformat(timespec='seconds'), email_id, claim))
+            marked = cursor.rowcount == 1
+            conn.commit()
+
+        return marked
+
+
+    def mark_email_failed(self, email_id, claim, error):
+        # Counts the attempt and releases the email for the next delivery run
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE email_outbox SET attempts = attempts + 1, last_error = ?, claimed_by = NULL, claimed_until = NULL
+                WHERE id = ? AND claimed_by = ?
+            ''', (error, email_id, claim))
+            conn.commit()
+
+
+    def release_emails(self, claim):
+        # Hand back the claimed emails that were not sent, so the next run need not wait for the lease
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('UPDATE email_outbox SET claimed_by = NULL, claimed_until = NULL WHERE claimed_by = ? AND sent_at IS NULL',
+                           (claim,))
+            conn.commit()
+
+
     def verify_admin(self, username, password):
         # Use context manager to handle the connection
         with self.connect() as conn:
@@ -376,61 +1728,69 @@ class SeminarDB:
                 stored_hashed_password = result[0]
                 
                 # Verify the provided password against the stored hashed password
-                return bcrypt.checkpw(password.encode('utf-8'), stored_hashed_password.encode('utf-8'))
+                import bcrypt
+                with metrics.span('bcrypt.checkpw'):
+                    return bcrypt.checkpw(password.encode('utf-8'), stored_hashed_password.encode('utf-8'))
             
         return False
 
 
+    def _send(self, msg):
+        # One SMTP session per message; AsyncSeminarDB overrides this to hand off to its mailer thread
+        from mailer import Mailer
+        with Mailer(self.email_config) as mailer:
+            mailer.send_message(msg)
+
+
     def send_email_notification(self, submitter_name, submitter_email, topic, status):
         subject = f"Seminar Request Update: {topic}"
         body = f"Dear {submitter_name},\n\nYour seminar request '{topic}' has been {status}.\n\nBest regards,\nSeminar Organizer"
 
-        msg = MIMEMultipart()
-        msg['From'] = self.email_config['username']
-        msg['To'] = submitter_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
+        from mailer import build_message
+        msg = build_message(self.email_config['username'], submitter_email, subject, body)
 
         try:
-            with smtplib.SMTP(self.email_config['smtp_server'], self.email_config['smtp_port']) as server:
-                server.starttls()
-                server.login(self.email_config['username'], self.email_config['app_passwd'])
-                server.send_message(msg)
+            self._send(msg)
             print(f"Email notification sent to {submitter_email}")
         except Exception as e:
             print(f"Error sending email: {e}")
 
 
     def send_calendar_invitation(self, seminar_id, recipient_emails):
-        # Open a connection and use a cursor to retrieve the seminar data
+        msg = self.calendar_invitation(seminar_id, recipient_emails)
+        if msg is None:
+            return False, "Seminar not found."
+
+        try:
+            self._send(msg)
+            return True, f"Calendar invitations sent to {', '.join(recipient_emails)}"
+        except Exception as e:
+            return False, f"Error sending calendar invitations: {str(e)}"
+
+
+    def calendar_invitation(self, seminar_id, recipient_emails):
+        # Build the invitation email for a seminar, or return None if it does not exist
         with self.connect() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM seminars WHERE id = ?', (seminar_id,))
+            cursor.execute(f'SELECT {SEMINAR_COLUMNS}, sequence, timezone FROM seminars WHERE id = ?', (seminar_id,))
             seminar = cursor.fetchone()
 
             if not seminar:
-                return False, "Seminar not found."
+                return None
 
             # Extract relevant seminar details
             date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room = seminar[1:10]
+            sequence, timezone = seminar[11:13]
 
-            # Create the calendar event
-            cal = Calendar()
-            cal.add('prodid', '-//My Seminar Application//mxm.dk//')
-            cal.add('version', '2.0')
-
-            event = Event()
-            event.add('summary', topic)
-            event.add('description', abstract)
-            event.add('dtstart', datetime.strptime(f"{date} {start_time}", "%Y-%m-%d %H:%M:%S").replace(tzinfo=pytz.UTC))
-            event.add('dtend', datetime.strptime(f"{date} {end_time}", "%Y-%m-%d %H:%M:%S").replace(tzinfo=pytz.UTC))
-            event.add('location', room)
-            event.add('organizer', self.email_config['username'])
-            event.add('uid', f'{seminar_id}@myseminarapp.com')  # Unique event ID
-            event.add('priority', 5)
+            import ics
+            from email import encoders
+            from email.mime.base import MIMEBase
+            from email.mime.multipart import MIMEMultipart
+            from email.mime.text import MIMEText
 
-            # Add the event to the calendar
-            cal.add_component(event)
+            # Create the calendar event (serialised once per seminar version)
+            event = ics.render_event(seminar_id, sequence, date, start_time, end_time, topic, abstract, room,
+                                     self.email_config['username'], timezone)
 
             # Create the email message
             msg = MIMEMultipart()
@@ -441,7 +1801,7 @@ class SeminarDB:
             # Attach the calendar event
             filename = "invitation.ics"
             part = MIMEBase('text', 'calendar', method='REQUEST', name=filename)
-            part.set_payload(cal.to_ical())
+            part.set_payload(ics.invitation([event], timezone))
             encoders.encode_base64(part)
             part.add_header('Content-Disposition', f'attachment; filename="{filename}"')
             msg.attach(part)
@@ -460,19 +1820,12 @@ class SeminarDB:
             """
             msg.attach(MIMEText(body, 'plain'))
 
-            try:
-                with smtplib.SMTP(self.email_config['smtp_server'], self.email_config['smtp_port']) as server:
-                    server.starttls()
-                    server.login(self.email_config['username'], self.email_config['app_passwd'])
-                    server.send_message(msg)
-                return True, f"Calendar invitations sent to {', '.join(recipient_emails)}"
-            except Exception as e:
-                return False, f"Error sending calendar invitations: {str(e)}"
-
-
-    def send_email_to_coordinator(self, speaker_name, speaker_email, topic, date, start_time, end_time, room):
-        coordinator_email = "xiazhan@dtu.dk"  # Seminar coordinator's email
-        coordinator_name = "Xiaobing"  # Seminar coordinator's name
+        return msg
+
+
+    def _coordinator_email(self, speaker_name, speaker_email, topic, date, start_time, end_time, room):
+        # (subject, body) of the coordinator's notification of a new request
+        coordinator_name = COORDINATOR_NAME  # Seminar coordinator's name
         subject = "New Seminar Request for Approval"
         
         # Email body
@@ -493,23 +1846,83 @@ class SeminarDB:
         Best regards,
         Seminar Organizer
         """
-        
-        # Create the email
-        msg = MIMEMultipart()
-        msg['From'] = self.email_config['username']
-        msg['To'] = coordinator_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
+        return subject, body
+
+
+    def backup(self, dest, pages_per_step=256, sleep=0.005, max_restarts=10, on_step=None):
+        # Online snapshot of the database to dest via SQLite's backup API. Pages are copied
+        # pages_per_step at a time and the read lock is released between steps, so writers are
+        # never held up for more than one step. A write from another connection restarts the
+        # copy; after max_restarts the rest is copied in a single step. The snapshot is written
+        # next to dest and only moved into place once PRAGMA quick_check passes. on_step, if given,
+        # is called with (remaining, total) pages after every step, while no lock is held.
+        if self.backend.dialect != 'sqlite':
+            return False, "Online backups are only supported for SQLite; use pg_dump for PostgreSQL."
+        partial = f"{dest}.partial"
+        restarts = 0
+        remaining_before = None
+
+        def progress(status, remaining, total):
+            nonlocal restarts, remaining_before
+            if remaining_before is not None and remaining > remaining_before:
+                restarts += 1
+                if restarts > max_restarts:
+                    raise BackupRestarted()
+            remaining_before = remaining
+            if on_step is not None:
+                on_step(remaining, total)
 
         try:
-            # Send the email using SMTP
-            with smtplib.SMTP(self.email_config['smtp_server'], self.email_config['smtp_port']) as server:
-                server.starttls()
-                server.login(self.email_config['username'], self.email_config['app_passwd'])
-                server.send_message(msg)
-            print(f"Email sent to {coordinator_name} ({coordinator_email})")
-        except Exception as e:
-            print(f"Failed to send email: {e}")    
+            if os.path.exists(partial):
+                os.remove(partial)
+            # A connection of its own: connect() may hand out a shared one (AsyncSeminarDB's) that
+            # must outlive the backup
+            with closing(sqlite3.connect(self.backend.db_file)) as source, closing(sqlite3.connect(partial)) as target:
+                with metrics.span('backup.copy'):
+                    try:
+                        source.backup(target, pages=pages_per_step, progress=progress, sleep=sleep)
+                    except BackupRestarted:
+                        source.backup(target, pages=-1)
+                problems = quick_check(target)
+            if problems:
+                os.remove(partial)
+                return False, f"Backup failed integrity check: {'; '.join(problems[:5])}"
+            os.replace(partial, dest)
+        except (sqlite3.Error, OSError) as e:
+            return False, f"Error creating backup: {str(e)}"
+
+        return True, f"Backup written to {dest}" + (f" (restarted {restarts} times by concurrent writes)" if restarts else "")
+
+
+    def restore(self, source):
+        # Replace the live database with a snapshot, through the backup API so that other
+        # connections see either the old or the restored database, never a half-copied file
+        if self.backend.dialect != 'sqlite':
+            return False, "Restoring snapshots is only supported for SQLite; use pg_restore for PostgreSQL."
+        if not os.path.exists(source):
+            return False, f"Snapshot {source} not found."
+        with closing(sqlite3.connect(f"file:{source}?mode=ro", uri=True)) as snapshot:
+            problems = quick_check(snapshot)
+            if problems:
+                return False, f"Snapshot failed integrity check: {'; '.join(problems[:5])}"
+            with closing(sqlite3.connect(self.backend.db_file)) as target:
+                before = dict(target.execute('SELECT name, version FROM data_versions').fetchall())
+                snapshot.backup(target)
+
+        # Bring the restored schema up to date
+        self.initialize_database()
+
+        # Move every data version past its pre-restore value, so no cache keyed by a version
+        # number from before the restore is mistaken for the restored data
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('UPDATE data_versions SET version = MAX(version, ?) + 1 WHERE name = ?',
+                               [(version, name) for name, version in before.items()])
+            conn.commit()
+        self.versions.invalidate()
+        return True, f"Database restored from {source}"
+
 
     def close(self):
-        pass
\ No newline at end of file
+        self.versions.close()
+        self.backend.close()
\ No newline at end of file
@@ -0,0 +1,156 @@
+# ics.py
+#
+# iCalendar rendering for seminar invitations and calendar exports. Event times are localised in the seminar's zone and
+# written with a TZID, each zone's VTIMEZONE block is built once, and every VEVENT is serialised
+# once per seminar version (its SEQUENCE), so resending an invitation costs no rendering beyond
+# stamping the DTSTAMP line, which has to be the time of each send.
+
+import calendar
+import functools
+from datetime import datetime, timedelta
+
+import pytz
+from icalendar import Calendar, Event, Timezone, TimezoneDaylight, TimezoneStandard
+
+PRODID = '-//My Seminar Application//mxm.dk//'
+
+# Number of serialised VEVENT bodies kept in memory
+EVENT_CACHE_SIZE = 4096
+
+WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+
+def _nth_weekday(year, month, nth, weekday):
+    # Day of month of the nth (or, for -1, last) given weekday
+    first_weekday, days = calendar.monthrange(year, month)
+    first = 1 + (weekday - first_weekday) % 7
+    if nth == -1:
+        return first + (days - first) // 7 * 7
+    return first + (nth - 1) * 7
+
+
+def _transitions(tz, year):
+    # (UTC offset before, UTC offset after, local time in effect after) for each offset change in a year
+    moment = datetime(year, 1, 1, tzinfo=pytz.UTC)
+    offset = moment.astimezone(tz).utcoffset()
+    changes = []
+    for _ in range(366 * 24):
+        moment += timedelta(hours=1)
+        local = moment.astimezone(tz)
+        if local.utcoffset() != offset:
+            changes.append((offset, local.utcoffset(), local))
+            offset = local.utcoffset()
+    return changes
+
+
+@functools.lru_cache(maxsize=None)
+def vtimezone(timezone):
+    """Serialised VTIMEZONE for a zone, using the yearly rules in effect this year."""
+    tz = pytz.timezone(timezone)
+    component = Timezone()
+    component.add('tzid', timezone)
+
+    changes = _transitions(tz, datetime.now().year)
+    if not changes:
+        local = datetime(1970, 1, 1, tzinfo=pytz.UTC).astimezone(tz)
+        standard = TimezoneStandard()
+        standard.add('dtstart', datetime(1970, 1, 1))
+        standard.add('tzoffsetfrom', local.utcoffset())
+        standard.add('tzoffsetto', local.utcoffset())
+        standard.add('tzname', local.tzname())
+        component.add_component(standard)
+        return component.to_ical()
+
+    for offset_from, offset_to, local in changes:
+        # Clients expect the observance's start as wall-clock time under the offset being left
+        wall = (local - offset_to + offset_from).replace(tzinfo=None)
+        nth = -1 if wall.day + 7 > calendar.monthrange(wall.year, wall.month)[1] else (wall.day - 1) // 7 + 1
+        observance = TimezoneDaylight() if local.dst() else TimezoneStandard()
+        observance.add('dtstart', wall.replace(year=1970, day=_nth_weekday(1970, wall.month, nth, wall.weekday())))
+        observance.add('tzoffsetfrom', offset_from)
+        observance.add('tzoffsetto', offset_to)
+        observance.add('tzname', local.tzname())
+        observance.add('rrule', {'freq': 'yearly', 'bymonth': wall.month, 'byday': f'{nth}{WEEKDAYS[wall.weekday()]}'})
+        component.add_component(observance)
+    return component.to_ical()
+
+
+@functools.lru_cache(maxsize=None)
+def _header(method):
+    cal = Calendar()
+    cal.add('prodid', PRODID)
+    cal.add('version', '2.0')
+    if method:
+        cal.add('method', method)
+    # Calendar.to_ical() always emits END:VCALENDAR; invitation() writes it after the events
+    return cal.to_ical().rpartition(b'END:VCALENDAR')[0]
+
+
+def _dtstamp():
+    return datetime.now(pytz.UTC).strftime('DTSTAMP:%Y%m%dT%H%M%SZ\r\n').encode()
+
+
+def _stamped(body):
+    # DTSTAMP goes right after BEGIN:VEVENT
+    begin, _, rest = body.partition(b'\r\n')
+    return b''.join([begin, b'\r\n', _dtstamp(), rest])
+
+
+def _event(seminar_id, date, start_time, end_time, topic, abstract, room, timezone):
+    tz = pytz.timezone(timezone)
+    event = Event()
+    event.add('uid', f'{seminar_id}@myseminarapp.com')  # Stable, so clients update the event in place
+    event.add('summary', topic)
+    event.add('description', abstract or '')
+    event.add('dtstart', tz.localize(datetime.fromisoformat(f"{date}T{start_time}")))
+    event.add('dtend', tz.localize(datetime.fromisoformat(f"{date}T{end_time}")))
+    event.add('location', room)
+    return event
+
+
+@functools.lru_cache(maxsize=EVENT_CACHE_SIZE)
+def _event_body(seminar_id, sequence, date, start_time, end_time, topic, abstract, room, organizer, timezone):
+    # Everything of the VEVENT but its DTSTAMP, which render_event adds; memoised, since every
+    # argument is part of the key
+    event = _event(seminar_id, date, start_time, end_time, topic, abstract, room, timezone)
+    event.add('sequence', sequence)
+    event.add('organizer', f'mailto:{organizer}')
+    event.add('priority', 5)
+    return event.to_ical()
+
+
+def render_event(seminar_id, sequence, date, start_time, end_time, topic, abstract, room, organizer, timezone):
+    """Serialised VEVENT for one version of a seminar, stamped with the current time."""
+    return _stamped(_event_body(seminar_id, sequence, date, start_time, end_time, topic, abstract, room, organizer, timezone))
+
+
+def export_event(seminar_id, date, start_time, end_time, speaker_name, speaker_email, speaker_bio, topic, abstract, room,
+                 seminar_type, timezone):
+    """Serialised VEVENT for a calendar export, with the speaker and type as the X- properties bulk.read_ics reads."""
+    event = _event(seminar_id, date, start_time, end_time, topic, abstract, room, timezone)
+    event.add('x-speaker-name', speaker_name)
+    event.add('x-speaker-email', speaker_email)
+    event.add('x-speaker-bio', speaker_bio or '')
+    event.add('x-seminar-type', seminar_type)
+    return _stamped(event.to_ical())
+
+
+def invitation(events, timezone, method='REQUEST'):
+    """Assemble a VCALENDAR around serialised VEVENTs that all use the given zone."""
+    return b''.join([_header(method), vtimezone(timezone), *events, b'END:VCALENDAR\r\n'])
+
+
+def stream_calendar(events, method=None):
+    """Yield a VCALENDAR in pieces around (serialised VEVENT, zone) pairs.
+
+    Each zone's VTIMEZONE is written once, ahead of the first event that uses it, so the events
+    can come from a cursor without knowing every zone beforehand.
+    """
+    yield _header(method)
+    zones = set()
+    for event, timezone in events:
+        if timezone not in zones:
+            zones.add(timezone)
+            yield vtimezone(timezone)
+        yield event
+    yield b'END:VCALENDAR\r\n'
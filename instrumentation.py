@@ -0,0 +1,276 @@
+# instrumentation.py
+#
+# Opt-in latency metrics for SeminarDB. Enable with SEMINAR_METRICS=1; when disabled every hook
+# reduces to a single attribute check and connections are plain sqlite3 connections. Event
+# counters (count()) are cheap and are kept either way.
+
+import functools
+import inspect
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float('inf'))
+
+# The progress handler fires every this many SQLite VM instructions
+PROGRESS_STEP = 1000
+
+slow_query_log = logging.getLogger('seminar_organizer.slow_query')
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+
+    def observe(self, seconds, rows=0):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.rows += rows
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_seconds': self.total,
+            'mean_seconds': self.total / self.count if self.count else 0.0,
+            'max_seconds': self.max,
+            'rows': self.rows,
+            'buckets': {('+Inf' if bound == float('inf') else str(bound)): n for bound, n in zip(BUCKETS, self.counts)},
+        }
+
+
+def normalize_sql(sql):
+    return re.sub(r'\s+', ' ', sql).strip()[:200]
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    # Accumulates the time spent inside execute() and the fetch calls of each statement;
+    # the statement is recorded once its rows are exhausted or the next one starts
+
+    _pending = None
+
+    def _finish(self):
+        if self._pending is not None:
+            sql, elapsed, rows = self._pending
+            self._pending = None
+            self.connection.metrics.observe_statement(sql, elapsed, rows, self.connection.vm_steps)
+
+    def _timed(self, call, *args):
+        started = time.perf_counter()
+        try:
+            return call(*args)
+        finally:
+            if self._pending is not None:
+                self._pending[1] += time.perf_counter() - started
+
+    def _rows(self, rows, exhausted):
+        if self._pending is not None:
+            self._pending[2] += rows
+            if exhausted:
+                self._finish()
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        self._pending = [normalize_sql(sql), 0.0, 0]
+        self.connection.vm_steps = 0
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        self._pending = [normalize_sql(sql), 0.0, 0]
+        self.connection.vm_steps = 0
+        result = self._timed(super().executemany, sql, seq_of_parameters)
+        self._rows(max(self.rowcount, 0), True)
+        return result
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        self._rows(row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        self._rows(len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._rows(len(rows), True)
+        return rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    metrics = None
+    vm_steps = 0
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def _count_steps(self):
+        self.vm_steps += PROGRESS_STEP
+        return 0
+
+
+class Instrumentation:
+    def __init__(self, enabled=False, slow_query_ms=100.0):
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self.reset()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            enabled=os.environ.get('SEMINAR_METRICS', '').lower() in ('1', 'true', 'yes'),
+            slow_query_ms=float(os.environ.get('SEMINAR_SLOW_QUERY_MS', '100')),
+        )
+
+    def reset(self):
+        with self._lock:
+            self.methods = {}
+            self.statements = {}
+            self.spans = {}
+            self.counters = {}
+            self.connections_opened = 0
+            self.statements_traced = 0
+            self.vm_steps = 0
+
+    def _observe(self, table, key, seconds, rows=0):
+        with self._lock:
+            histogram = table.get(key)
+            if histogram is None:
+                histogram = table[key] = Histogram()
+            histogram.observe(seconds, rows)
+
+    def count(self, name, n=1):
+        # Event counter, such as submits turned away by the request form's rate limit
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def connect(self, db_file):
+        conn = sqlite3.connect(db_file, factory=InstrumentedConnection)
+        conn.metrics = self
+        conn.set_progress_handler(conn._count_steps, PROGRESS_STEP)
+        # The trace callback also sees statements we do not issue ourselves (BEGIN, COMMIT, triggers)
+        conn.set_trace_callback(self._trace)
+        with self._lock:
+            self.connections_opened += 1
+        return conn
+
+    def _trace(self, statement):
+        with self._lock:
+            self.statements_traced += 1
+
+    def observe_statement(self, sql, seconds, rows, vm_steps):
+        self._observe(self.statements, sql, seconds, rows)
+        with self._lock:
+            self.vm_steps += vm_steps
+        if seconds * 1000 >= self.slow_query_ms:
+            slow_query_log.warning("slow query (%.1f ms, %d rows, ~%d VM steps): %s", seconds * 1000, rows, vm_steps, sql)
+
+    @contextmanager
+    def span(self, name):
+        # Time a non-SQL phase such as bcrypt or SMTP
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._observe(self.spans, name, time.perf_counter() - started)
+
+    def timed(self, name):
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self._observe(self.methods, name, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    def instrument_class(self, cls):
+        # Class decorator: time every public method (generators are left alone)
+        for name, func in list(vars(cls).items()):
+            if not name.startswith('_') and inspect.isfunction(func) and not inspect.isgeneratorfunction(func):
+                setattr(cls, name, self.timed(f"{cls.__name__}.{name}")(func))
+        return cls
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'slow_query_ms': self.slow_query_ms,
+                'connections_opened': self.connections_opened,
+                'statements_traced': self.statements_traced,
+                'vm_steps': self.vm_steps,
+                'counters': dict(self.counters),
+                'methods': {k: v.to_dict() for k, v in self.methods.items()},
+                'spans': {k: v.to_dict() for k, v in self.spans.items()},
+                'statements': {k: v.to_dict() for k, v in self.statements.items()},
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        snapshot = self.snapshot()
+        lines = [
+            '# TYPE seminar_db_connections_opened_total counter',
+            f"seminar_db_connections_opened_total {snapshot['connections_opened']}",
+            '# TYPE seminar_db_statements_traced_total counter',
+            f"seminar_db_statements_traced_total {snapshot['statements_traced']}",
+            '# TYPE seminar_db_vm_steps_total counter',
+            f"seminar_db_vm_steps_total {snapshot['vm_steps']}",
+        ]
+        for name, value in sorted(snapshot['counters'].items()):
+            metric = 'seminar_' + re.sub(r'\W', '_', name) + '_total'
+            lines += [f'# TYPE {metric} counter', f'{metric} {value}']
+        for metric, label, table in (('seminar_method_seconds', 'method', 'methods'),
+                                     ('seminar_span_seconds', 'span', 'spans'),
+                                     ('seminar_sql_seconds', 'statement', 'statements')):
+            lines.append(f'# TYPE {metric} histogram')
+            for key, histogram in snapshot[table].items():
+                value = key.replace('\\', '\\\\').replace('"', '\\"')
+                cumulative = 0
+                for bound, n in histogram['buckets'].items():
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{{label}="{value}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{label}="{value}"}} {histogram["total_seconds"]}')
+                lines.append(f'{metric}_count{{{label}="{value}"}} {histogram["count"]}')
+                if table == 'statements':
+                    lines.append(f'seminar_sql_rows_total{{{label}="{value}"}} {histogram["rows"]}')
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide instance used by SeminarDB and the admin metrics panel
+metrics = Instrumentation.from_env()
@@ -0,0 +1,63 @@
+# lookup.py
+#
+# Normalisation keys for the rooms, speakers and speaker_bios lookup tables, and the in-memory
+# prefix index that backs room and speaker autocomplete in the forms.
+
+import bisect
+import hashlib
+import re
+
+
+def room_key(name):
+    # 'b-303', 'B 303' and 'B303' are the same room
+    return re.sub(r'[\W_]+', '', name or '').upper()
+
+
+def speaker_name_key(name):
+    return ' '.join((name or '').split()).casefold()
+
+
+def speaker_key(name, email=''):
+    # A speaker is identified by email when one is given, otherwise by name
+    email = (email or '').strip().lower()
+    return email if email else 'name:' + speaker_name_key(name)
+
+
+def bio_key(bio):
+    # Content hash; a bio is shared by every row with exactly the same text
+    return hashlib.sha256((bio or '').encode('utf-8')).hexdigest()
+
+
+class PrefixIndex:
+    """Sorted (key, name) pairs; a prefix query is one bisection plus a scan of the matches."""
+
+    def __init__(self, names, normalize=speaker_name_key, words=False):
+        self.normalize = normalize
+        entries = set()
+        for name in names:
+            key = normalize(name)
+            entries.add((key, name))
+            if words:
+                # Also complete on later words, so typing a surname finds the speaker
+                parts = key.split()
+                entries.update((' '.join(parts[i:]), name) for i in range(1, len(parts)))
+        self.entries = sorted(entries)
+        self.keys = [key for key, _ in self.entries]
+
+    def __len__(self):
+        return len({name for _, name in self.entries})
+
+    def complete(self, prefix, limit=10):
+        key = self.normalize(prefix)
+        if not key:
+            return []
+        matches = []
+        for i in range(bisect.bisect_left(self.keys, key), len(self.keys)):
+            if not self.keys[i].startswith(key):
+                break
+            name = self.entries[i][1]
+            if name not in matches:
+                matches.append(name)
+                if len(matches) == limit:
+                    break
+        return matches
@@ -0,0 +1,93 @@
+# mailer.py
+#
+# SMTP delivery shared by SeminarDB and the scheduler. A Mailer holds one SMTP session for as many
+# messages as are sent inside its with-block, so a batch pays for STARTTLS and login only once.
+
+import asyncio
+import smtplib
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from instrumentation import metrics
+
+
+def build_message(sender, recipients, subject, body):
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = recipients if isinstance(recipients, str) else ', '.join(recipients)
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+
+class Mailer:
+    def __init__(self, config):
+        self.config = config
+        self.server = None
+        self.sent = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _connect(self):
+        with metrics.span('smtp.connect'):
+            server = smtplib.SMTP(self.config['smtp_server'], self.config['smtp_port'])
+            try:
+                server.starttls()
+                server.login(self.config['username'], self.config['app_passwd'])
+            except Exception:
+                server.close()
+                raise
+        self.server = server
+
+    def send_message(self, msg):
+        if self.server is None:
+            self._connect()
+        try:
+            with metrics.span('smtp.send'):
+                self.server.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # The server dropped an idle session; reconnect once and retry
+            self.server = None
+            self._connect()
+            with metrics.span('smtp.send'):
+                self.server.send_message(msg)
+        self.sent += 1
+
+    def send(self, recipients, subject, body):
+        self.send_message(build_message(self.config['username'], recipients, subject, body))
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except smtplib.SMTPException:
+                self.server.close()
+            self.server = None
+
+
+class AsyncMailer:
+    """Mailer for asyncio code: messages are sent, in order, from one worker thread that keeps
+    its SMTP session open between them."""
+
+    def __init__(self, config):
+        self.mailer = Mailer(config)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='seminar-mail')
+
+    def submit(self, msg):
+        # Fire-and-forget from any thread; returns a concurrent.futures.Future
+        return self.executor.submit(self.mailer.send_message, msg)
+
+    async def send_message(self, msg):
+        return await asyncio.wrap_future(self.submit(msg))
+
+    async def send(self, recipients, subject, body):
+        return await self.send_message(build_message(self.mailer.config['username'], recipients, subject, body))
+
+    async def aclose(self):
+        await asyncio.wrap_future(self.executor.submit(self.mailer.close))
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,141 @@
+# markup.py
+#
+# Rendering of user-submitted speaker bios and abstracts. Text may be Markdown, HTML or a mix;
+# render() turns the Markdown subset below into HTML and then sanitises the result against an
+# allow-list of tags, so the fragment is safe to show with unsafe_allow_html. SeminarDB renders
+# each distinct text once, when it is written, and stores the fragment under fragment_key().
+#
+#     blank line        paragraph            **bold**, __bold__
+#     - item, * item    bulleted list        *italic*, _italic_
+#     1. item           numbered list        `code`
+#     # heading         heading              [text](https://example.org)
+
+import hashlib
+import html
+import re
+from html.parser import HTMLParser
+
+# Bumped whenever the output of render() changes, so stored fragments are rendered again
+RENDER_VERSION = 1
+
+ALLOWED_TAGS = {'a', 'b', 'blockquote', 'br', 'code', 'em', 'h5', 'h6', 'i', 'li', 'ol', 'p', 'pre', 'strong',
+                'sub', 'sup', 'u', 'ul'}
+VOID_TAGS = {'br'}
+# Tags dropped together with everything inside them
+DROPPED_TAGS = {'embed', 'iframe', 'noscript', 'object', 'script', 'style', 'template', 'textarea', 'title'}
+LINK_SCHEMES = ('http://', 'https://', 'mailto:')
+
+_BULLET = re.compile(r'\s*[-*+]\s+')
+_NUMBER = re.compile(r'\s*\d+[.)]\s+')
+_HEADING = re.compile(r'(#{1,6})\s+(.*)')
+_HTML_BLOCK = re.compile(r'\s*<(blockquote|div|h[1-6]|ol|p|pre|ul)\b', re.IGNORECASE)
+_CODE = re.compile(r'`([^`\n]+)`')
+_LINK = re.compile(r'\[([^\]\n]+)\]\(([^)\s]+)\)')
+_BOLD = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*|__(?=\S)(.+?)(?<=\S)__')
+_ITALIC = re.compile(r'(?<![\w*])\*(?=\S)(.+?)(?<=\S)\*(?![\w*])|(?<!\w)_(?=\S)(.+?)(?<=\S)_(?!\w)')
+_TAG = re.compile(r'(<[^>]*>)')
+_PLACEHOLDER = re.compile('\x00(\\d+)\x00')
+
+
+def fragment_key(text):
+    # Stored fragments are looked up by the hash of their source text and the renderer version
+    return hashlib.sha256(f'{RENDER_VERSION}\x00{text}'.encode('utf-8')).hexdigest()
+
+
+class _Sanitizer(HTMLParser):
+    """Re-emits allowed tags without attributes (links keep a checked href) and escapes all text."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.open = []
+        self.dropped = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            self.dropped += 1
+            return
+        if self.dropped or tag not in ALLOWED_TAGS:
+            return
+        if tag == 'a':
+            href = (dict(attrs).get('href') or '').strip()
+            if not href.lower().startswith(LINK_SCHEMES):
+                return  # The link text stays, as plain text
+            self.out.append(f'<a href="{html.escape(href)}" target="_blank" rel="noopener noreferrer">')
+        else:
+            self.out.append(f'<{tag}>')
+        if tag not in VOID_TAGS:
+            self.open.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag not in DROPPED_TAGS:
+            self.handle_starttag(tag, attrs)
+            if tag not in VOID_TAGS:
+                self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self.dropped = max(self.dropped - 1, 0)
+            return
+        if self.dropped or tag not in self.open:
+            return
+        # Close anything left open inside it, so the output is always well nested
+        while True:
+            inner = self.open.pop()
+            self.out.append(f'</{inner}>')
+            if inner == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.dropped:
+            self.out.append(html.escape(data, quote=False))
+
+    def result(self):
+        self.close()
+        return ''.join(self.out + [f'</{tag}>' for tag in reversed(self.open)])
+
+
+def sanitize(fragment):
+    sanitizer = _Sanitizer()
+    sanitizer.feed(fragment)
+    return sanitizer.result()
+
+
+def _inline(text):
+    # Code spans and links become placeholders first, so the emphasis rules cannot reach inside them
+    saved = []
+
+    def save(markup):
+        saved.append(markup)
+        return f'\x00{len(saved) - 1}\x00'
+
+    text = _CODE.sub(lambda m: save(f'<code>{html.escape(m.group(1))}</code>'), text)
+    text = _LINK.sub(lambda m: save(f'<a href="{html.escape(m.group(2))}">') + m.group(1) + save('</a>'), text)
+    # Only text between tags is Markdown; attributes of HTML written by hand are left alone
+    parts = _TAG.split(text)
+    for i in range(0, len(parts), 2):
+        parts[i] = _BOLD.sub(lambda m: f'<strong>{m.group(1) or m.group(2)}</strong>', parts[i])
+        parts[i] = _ITALIC.sub(lambda m: f'<em>{m.group(1) or m.group(2)}</em>', parts[i])
+    return _PLACEHOLDER.sub(lambda m: saved[int(m.group(1))], ''.join(parts))
+
+
+def _block(block):
+    lines = block.splitlines()
+    if _HTML_BLOCK.match(block):
+        return _inline(block)
+    if all(_BULLET.match(line) for line in lines):
+        return '<ul>' + ''.join(f'<li>{_inline(_BULLET.sub("", line, 1))}</li>' for line in lines) + '</ul>'
+    if all(_NUMBER.match(line) for line in lines):
+        return '<ol>' + ''.join(f'<li>{_inline(_NUMBER.sub("", line, 1))}</li>' for line in lines) + '</ol>'
+    heading = _HEADING.fullmatch(block.strip())
+    if heading:
+        # The detail panel's own headings are h4; anything written inside it ranks below
+        tag = 'h5' if len(heading.group(1)) <= 3 else 'h6'
+        return f'<{tag}>{_inline(heading.group(2))}</{tag}>'
+    return '<p>' + '<br>'.join(_inline(line) for line in lines) + '</p>'
+
+
+def render(text):
+    """Sanitised HTML fragment for a bio or abstract written in Markdown and/or HTML."""
+    blocks = re.split(r'\n[ \t]*\n', (text or '').replace('\r\n', '\n').strip())
+    return sanitize(''.join(_block(block) for block in blocks if block.strip()))
@@ -0,0 +1,481 @@
+# postgres_backend.py
+#
+# PostgreSQL storage backend, for deployments where several hosts write to one database. Needs
+# psycopg2 (pip install psycopg2-binary) and a role allowed to create the btree_gist extension.
+#
+# Connections come from a thread-safe pool and are returned to it when their `with` block ends.
+# SeminarDB's '?' placeholders are translated to psycopg2's '%s'. The history lists read through
+# named (server-side) cursors, so large result sets arrive in batches. Room double-booking is
+# also ruled out by the database itself: seminars carries a generated tstzrange of its start and
+# end, and an exclusion constraint over (room_id, during) rejects overlapping rows, whichever
+# host inserts them.
+
+import itertools
+import re
+import threading
+
+from database import BIO_TABLES, CHANGE_LOG_TABLES, DEFAULT_TIMEZONE, VERSIONED_TABLES
+
+# Pool bounds per process
+MIN_CONNECTIONS = 1
+MAX_CONNECTIONS = 10
+
+# Rows fetched per round trip by the server-side cursors
+STREAM_BATCH = 2000
+
+# SQLSTATE raised when a row violates an exclusion constraint
+EXCLUSION_VIOLATION = '23P01'
+
+# Single-quoted literals are copied unchanged; '?' outside them becomes '%s' and '%' becomes '%%'
+_LITERAL_OR_MARKER = re.compile(r"'(?:[^']|'')*'|\?|%")
+
+SCHEMA = [
+    'CREATE EXTENSION IF NOT EXISTS btree_gist',
+    '''
+    CREATE TABLE IF NOT EXISTS rooms (
+        id BIGSERIAL PRIMARY KEY,
+        name TEXT NOT NULL,
+        key TEXT NOT NULL UNIQUE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS speakers (
+        id BIGSERIAL PRIMARY KEY,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL DEFAULT '',
+        key TEXT NOT NULL UNIQUE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS speaker_bios (
+        id BIGSERIAL PRIMARY KEY,
+        hash TEXT NOT NULL UNIQUE,
+        bio TEXT NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS rendered_fragments (
+        hash TEXT PRIMARY KEY,
+        html TEXT NOT NULL
+    )
+    ''',
+    f'''
+    CREATE TABLE IF NOT EXISTS seminars (
+        id BIGSERIAL PRIMARY KEY,
+        date TEXT NOT NULL,
+        start_time TEXT NOT NULL,
+        end_time TEXT NOT NULL,
+        speaker_name TEXT NOT NULL,
+        speaker_email TEXT NOT NULL,
+        speaker_bio TEXT,
+        topic TEXT NOT NULL,
+        abstract TEXT,
+        room TEXT NOT NULL,
+        seminar_type TEXT NOT NULL DEFAULT 'Others',
+        start_min BIGINT NOT NULL,
+        end_min BIGINT NOT NULL,
+        timezone TEXT NOT NULL DEFAULT '{DEFAULT_TIMEZONE}',
+        sequence INTEGER NOT NULL DEFAULT 0,
+        room_id BIGINT REFERENCES rooms(id),
+        speaker_id BIGINT REFERENCES speakers(id),
+        bio_id BIGINT REFERENCES speaker_bios(id),
+        during TSTZRANGE GENERATED ALWAYS AS (tstzrange(to_timestamp(start_min * 60), to_timestamp(end_min * 60))) STORED,
+        CONSTRAINT seminars_no_double_booking EXCLUDE USING gist (room_id WITH =, during WITH &&)
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_seminars_start ON seminars (start_min)',
+    'CREATE INDEX IF NOT EXISTS idx_seminars_room_id_start ON seminars (room_id, start_min)',
+    '''
+    CREATE TABLE IF NOT EXISTS seminar_requests (
+        id BIGSERIAL PRIMARY KEY,
+        date TEXT NOT NULL,
+        start_time TEXT NOT NULL,
+        end_time TEXT NOT NULL,
+        speaker_name TEXT NOT NULL,
+        speaker_email TEXT NOT NULL,
+        speaker_bio TEXT,
+        topic TEXT NOT NULL,
+        abstract TEXT,
+        room TEXT NOT NULL,
+        submitter_name TEXT NOT NULL,
+        submitter_email TEXT NOT NULL,
+        status TEXT DEFAULT 'pending',
+        seminar_type TEXT NOT NULL DEFAULT 'Others',
+        room_id BIGINT REFERENCES rooms(id),
+        speaker_id BIGINT REFERENCES speakers(id),
+        bio_id BIGINT REFERENCES speaker_bios(id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS seminar_series (
+        id BIGSERIAL PRIMARY KEY,
+        rrule TEXT NOT NULL,
+        dtstart TEXT NOT NULL,
+        until_date TEXT,
+        start_time TEXT NOT NULL,
+        end_time TEXT NOT NULL,
+        speaker_name TEXT NOT NULL,
+        speaker_email TEXT NOT NULL,
+        speaker_bio TEXT,
+        topic TEXT NOT NULL,
+        abstract TEXT,
+        room TEXT NOT NULL,
+        seminar_type TEXT NOT NULL DEFAULT 'Others',
+        room_id BIGINT REFERENCES rooms(id),
+        speaker_id BIGINT REFERENCES speakers(id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS seminar_series_exceptions (
+        series_id BIGINT NOT NULL REFERENCES seminar_series(id) ON DELETE CASCADE,
+        occurrence_date TEXT NOT NULL,
+        cancelled INTEGER NOT NULL DEFAULT 0,
+        date TEXT,
+        start_time TEXT,
+        end_time TEXT,
+        speaker_name TEXT,
+        speaker_email TEXT,
+        speaker_bio TEXT,
+        topic TEXT,
+        abstract TEXT,
+        room TEXT,
+        PRIMARY KEY (series_id, occurrence_date)
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_series_exceptions_date ON seminar_series_exceptions (date)',
+    f'''
+    CREATE TABLE IF NOT EXISTS seminars_archive (
+        id BIGINT PRIMARY KEY,
+        date TEXT NOT NULL,
+        start_time TEXT NOT NULL,
+        end_time TEXT NOT NULL,
+        speaker_name TEXT NOT NULL,
+        speaker_email TEXT NOT NULL,
+        speaker_bio TEXT,
+        topic TEXT NOT NULL,
+        abstract TEXT,
+        room TEXT NOT NULL,
+        seminar_type TEXT NOT NULL DEFAULT 'Others',
+        start_min BIGINT NOT NULL,
+        end_min BIGINT NOT NULL,
+        timezone TEXT NOT NULL DEFAULT '{DEFAULT_TIMEZONE}',
+        sequence INTEGER NOT NULL DEFAULT 0,
+        room_id BIGINT REFERENCES rooms(id),
+        speaker_id BIGINT REFERENCES speakers(id),
+        bio_id BIGINT REFERENCES speaker_bios(id),
+        archived_at TEXT NOT NULL,
+        deleted_at TEXT
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_seminars_archive_start ON seminars_archive (start_min, id) WHERE deleted_at IS NULL',
+    # Databases created before bios moved to speaker_bios
+    *[f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS bio_id BIGINT REFERENCES speaker_bios(id)' for table in BIO_TABLES],
+    '''
+    CREATE TABLE IF NOT EXISTS data_versions (
+        name TEXT PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0
+    )
+    ''',
+    "INSERT INTO data_versions (name) VALUES ('seminars'), ('seminar_requests'), ('lookups') ON CONFLICT DO NOTHING",
+    '''
+    CREATE OR REPLACE FUNCTION bump_data_version() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        UPDATE data_versions SET version = version + 1 WHERE name = TG_ARGV[0];
+        RETURN NULL;
+    END
+    $$
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS seminar_stats (
+        month TEXT NOT NULL,
+        seminar_type TEXT NOT NULL,
+        room TEXT NOT NULL,
+        seminars INTEGER NOT NULL DEFAULT 0,
+        minutes INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (month, seminar_type, room)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS seminar_stats_speakers (
+        month TEXT NOT NULL,
+        seminar_type TEXT NOT NULL,
+        room TEXT NOT NULL,
+        speaker_name TEXT NOT NULL,
+        seminars INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (month, seminar_type, room, speaker_name)
+    )
+    ''',
+    # Same bookkeeping as database.STATS_TRIGGER_BODY, for one row r of seminars or
+    # seminars_archive counted with sign +1 or -1
+    '''
+    CREATE OR REPLACE FUNCTION seminar_stats_apply(r anyelement, sign INTEGER) RETURNS void LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO seminar_stats (month, seminar_type, room, seminars, minutes)
+        VALUES (substr(r.date, 1, 7), r.seminar_type, r.room, sign, sign * (r.end_min - r.start_min))
+        ON CONFLICT (month, seminar_type, room) DO UPDATE
+        SET seminars = seminar_stats.seminars + excluded.seminars, minutes = seminar_stats.minutes + excluded.minutes;
+        DELETE FROM seminar_stats
+        WHERE seminars <= 0 AND month = substr(r.date, 1, 7) AND seminar_type = r.seminar_type AND room = r.room;
+        INSERT INTO seminar_stats_speakers (month, seminar_type, room, speaker_name, seminars)
+        VALUES (substr(r.date, 1, 7), r.seminar_type, r.room, r.speaker_name, sign)
+        ON CONFLICT (month, seminar_type, room, speaker_name) DO UPDATE
+        SET seminars = seminar_stats_speakers.seminars + excluded.seminars;
+        DELETE FROM seminar_stats_speakers
+        WHERE seminars <= 0 AND month = substr(r.date, 1, 7) AND seminar_type = r.seminar_type
+        AND room = r.room AND speaker_name = r.speaker_name;
+    END
+    $$
+    ''',
+    '''
+    CREATE OR REPLACE FUNCTION seminar_stats_row() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM seminar_stats_apply(OLD, -1);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM seminar_stats_apply(NEW, 1);
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    ''',
+    'DROP TRIGGER IF EXISTS seminar_stats ON seminars',
+    '''
+    CREATE TRIGGER seminar_stats
+    AFTER INSERT OR DELETE OR UPDATE OF date, start_time, end_time, speaker_name, room, seminar_type ON seminars
+    FOR EACH ROW EXECUTE FUNCTION seminar_stats_row()
+    ''',
+    # Archived seminars keep counting; deleted ones do not
+    'DROP TRIGGER IF EXISTS seminar_stats_insert ON seminars_archive',
+    '''
+    CREATE TRIGGER seminar_stats_insert AFTER INSERT ON seminars_archive
+    FOR EACH ROW WHEN (NEW.deleted_at IS NULL) EXECUTE FUNCTION seminar_stats_row()
+    ''',
+    'DROP TRIGGER IF EXISTS seminar_stats_delete ON seminars_archive',
+    '''
+    CREATE TRIGGER seminar_stats_delete AFTER DELETE ON seminars_archive
+    FOR EACH ROW WHEN (OLD.deleted_at IS NULL) EXECUTE FUNCTION seminar_stats_row()
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS email_outbox (
+        id BIGSERIAL PRIMARY KEY,
+        dedup_key TEXT NOT NULL UNIQUE,
+        recipient TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        body TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        sent_at TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        claimed_by TEXT,
+        claimed_until TEXT
+    )
+    ''',
+    'ALTER TABLE email_outbox ADD COLUMN IF NOT EXISTS claimed_by TEXT',
+    'ALTER TABLE email_outbox ADD COLUMN IF NOT EXISTS claimed_until TEXT',
+    'CREATE INDEX IF NOT EXISTS idx_email_outbox_pending ON email_outbox (id) WHERE sent_at IS NULL',
+    '''
+    CREATE TABLE IF NOT EXISTS scheduled_jobs (
+        name TEXT PRIMARY KEY,
+        last_slot TEXT,
+        last_run_at TEXT,
+        queued INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS change_log (
+        seq BIGINT PRIMARY KEY,
+        table_name TEXT NOT NULL,
+        row_id BIGINT NOT NULL,
+        op TEXT NOT NULL,
+        changed_at TEXT NOT NULL,
+        data TEXT NOT NULL
+    )
+    ''',
+    # seq comes from a single counter row rather than a sequence: the row lock is held until
+    # commit, so entries become visible in seq order and a reader never skips a late commit
+    'CREATE TABLE IF NOT EXISTS change_log_counter (seq BIGINT NOT NULL)',
+    'INSERT INTO change_log_counter (seq) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM change_log_counter)',
+    '''
+    CREATE OR REPLACE FUNCTION log_change() RETURNS trigger LANGUAGE plpgsql AS $$
+    DECLARE
+        entry JSONB;
+        next_seq BIGINT;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            entry := to_jsonb(OLD);
+        ELSE
+            entry := to_jsonb(NEW);
+        END IF;
+        UPDATE change_log_counter SET seq = seq + 1 RETURNING seq INTO next_seq;
+        INSERT INTO change_log (seq, table_name, row_id, op, changed_at, data)
+        VALUES (next_seq, TG_TABLE_NAME, (entry ->> TG_ARGV[0])::BIGINT, lower(TG_OP),
+                to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.MS"Z"'), (entry - 'during')::TEXT);
+        RETURN NULL;
+    END
+    $$
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS admin_accounts (
+        username TEXT PRIMARY KEY,
+        password TEXT NOT NULL
+    )
+    ''',
+]
+
+# One statement-level trigger per versioned table
+for _table, _name in VERSIONED_TABLES.items():
+    SCHEMA += [
+        f'DROP TRIGGER IF EXISTS bump_version ON {_table}',
+        f'''
+        CREATE TRIGGER bump_version AFTER INSERT OR UPDATE OR DELETE ON {_table}
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version('{_name}')
+        ''',
+    ]
+
+for _table, _key in CHANGE_LOG_TABLES.items():
+    SCHEMA += [
+        f'DROP TRIGGER IF EXISTS log_change ON {_table}',
+        f'''
+        CREATE TRIGGER log_change AFTER INSERT OR UPDATE OR DELETE ON {_table}
+        FOR EACH ROW EXECUTE FUNCTION log_change('{_key}')
+        ''',
+    ]
+
+
+def translate(sql):
+    return _LITERAL_OR_MARKER.sub(lambda m: {'?': '%s', '%': '%%'}.get(m.group(0), m.group(0)), sql)
+
+
+class _Cursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(translate(sql), tuple(params))
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(translate(sql), [tuple(params) for params in seq_of_params])
+        return self
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+
+class _Connection:
+    # A pooled connection with sqlite3's `with conn:` behaviour, except that leaving the block
+    # also hands the connection back to the pool
+    def __init__(self, backend):
+        self._backend = backend
+        self._conn = backend.pool.getconn()
+
+    def cursor(self):
+        return _Cursor(self._conn.cursor())
+
+    def named_cursor(self):
+        cursor = self._conn.cursor(name=f'seminar_stream_{next(self._backend.cursor_ids)}')
+        cursor.itersize = STREAM_BATCH
+        return _Cursor(cursor)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.rollback()
+            self._backend.pool.putconn(self._conn)
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self._conn.commit()
+        self.close()
+
+
+class PostgresVersions:
+    # Same interface as coherence.VersionWatcher; the counters are read on every call, which is
+    # one indexed query against the shared server
+    def __init__(self, backend):
+        self.backend = backend
+        self.checks = 0
+        self.refreshes = 0
+
+    def versions(self):
+        with self.backend.connect() as conn:
+            self.checks += 1
+            self.refreshes += 1
+            return dict(conn.execute('SELECT name, version FROM data_versions').fetchall())
+
+    def version(self, name):
+        return self.versions().get(name, 0)
+
+    def invalidate(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class PostgresBackend:
+    dialect = 'postgresql'
+
+    def __init__(self, url, min_connections=MIN_CONNECTIONS, max_connections=MAX_CONNECTIONS):
+        try:
+            import psycopg2
+            from psycopg2.pool import ThreadedConnectionPool
+        except ImportError as e:
+            raise ImportError("The PostgreSQL backend needs psycopg2: pip install psycopg2-binary") from e
+        self.url = url
+        self.IntegrityError = psycopg2.IntegrityError
+        self.pool = ThreadedConnectionPool(min_connections, max_connections, url)
+        self.cursor_ids = itertools.count()
+        self._schema_lock = threading.Lock()
+
+    def connect(self):
+        return _Connection(self)
+
+    def stream_cursor(self, conn):
+        return conn.named_cursor()
+
+    def version_watcher(self):
+        return PostgresVersions(self)
+
+    def is_booking_conflict(self, error):
+        return getattr(error, 'pgcode', None) == EXCLUSION_VIOLATION
+
+    def create_schema(self):
+        # A transaction-scoped advisory lock keeps replicas starting together from racing on DDL
+        with self._schema_lock, self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext('seminar_organizer.schema'))")
+            for statement in SCHEMA:
+                cursor.execute(statement)
+
+    def close(self):
+        self.pool.closeall()
@@ -0,0 +1,92 @@
+# profiler.py
+#
+# Opt-in rerun profiler for the Streamlit pages. Start the app with SEMINAR_PROFILE=1 to time each
+# phase of a rerun (DB access, DataFrame preparation, grid build, detail render, ...). Timings are
+# kept per session in st.session_state and shown in the admin panel's Profiler tab.
+
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+import streamlit as st
+
+from instrumentation import Histogram
+
+ENABLED = os.environ.get('SEMINAR_PROFILE', '').lower() in ('1', 'true', 'yes')
+
+# Number of per-rerun traces kept per session
+MAX_TRACES = 200
+
+
+def enabled():
+    return ENABLED
+
+
+def start_rerun():
+    if not ENABLED:
+        return
+    st.session_state['_profiler_current'] = {
+        'started_at': datetime.now().isoformat(timespec='milliseconds'),
+        'page': None,
+        'phases': [],
+        '_t0': time.perf_counter(),
+    }
+
+
+def phase(name):
+    """Context manager timing one phase of the current rerun; a no-op when profiling is off."""
+    if not ENABLED or '_profiler_current' not in st.session_state:
+        return nullcontext()
+    return _phase(name)
+
+
+@contextmanager
+def _phase(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        current = st.session_state.get('_profiler_current')
+        if current is not None:
+            current['phases'].append({'name': name, 'ms': (time.perf_counter() - started) * 1000})
+
+
+def end_rerun(page):
+    if not ENABLED:
+        return
+    current = st.session_state.pop('_profiler_current', None)
+    if current is None:
+        return
+    current['page'] = page
+    current['total_ms'] = (time.perf_counter() - current.pop('_t0')) * 1000
+
+    traces = st.session_state.setdefault('_profiler_traces', [])
+    traces.append(current)
+    del traces[:-MAX_TRACES]
+
+    totals = st.session_state.setdefault('_profiler_totals', {})
+    for name, ms in [(f"{page} (total)", current['total_ms'])] + [(p['name'], p['ms']) for p in current['phases']]:
+        totals.setdefault(name, Histogram()).observe(ms / 1000)
+
+
+def traces():
+    return list(st.session_state.get('_profiler_traces', []))
+
+
+def summary():
+    return [
+        {'phase': name, 'count': h.count, 'mean_ms': h.total / h.count * 1000, 'max_ms': h.max * 1000,
+         'total_ms': h.total * 1000}
+        for name, h in sorted(st.session_state.get('_profiler_totals', {}).items(), key=lambda item: -item[1].total)
+    ]
+
+
+def export_json():
+    return json.dumps(traces(), indent=2)
+
+
+def reset():
+    for key in ('_profiler_traces', '_profiler_totals'):
+        st.session_state.pop(key, None)
@@ -0,0 +1,128 @@
+# ratelimit.py
+#
+# Token buckets for the public "Request a Seminar" form, which writes a request and emails the
+# coordinator on every submit. Each key (the browser session, the submitter's email address) has a
+# bucket of up to BURST tokens that refills at PER_HOUR tokens an hour; a submit takes one token
+# from each of its keys, and only when every one of them has a token left.
+#
+# Buckets are kept in process memory. With SEMINAR_RATE_LIMIT_DB set they are kept in that SQLite
+# file instead, so several server processes share one set of limits. The form also backs off while
+# more than OUTBOX_HIGH_WATER emails wait in the outbox.
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+
+BURST = int(os.environ.get('SEMINAR_REQUEST_BURST', '3'))
+PER_HOUR = float(os.environ.get('SEMINAR_REQUEST_PER_HOUR', '6'))
+
+# Pending outbox emails above which the form stops taking requests for a while
+OUTBOX_HIGH_WATER = int(os.environ.get('SEMINAR_OUTBOX_HIGH_WATER', '200'))
+
+# Buckets kept in memory; the least recently used are dropped first (a dropped bucket is a full one)
+MAX_KEYS = 10000
+
+
+class MemoryBuckets:
+    def __init__(self, max_keys=MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            yield self
+
+    def get(self, key):
+        return self._buckets.get(key)
+
+    def put(self, key, tokens, updated_at):
+        self._buckets[key] = (tokens, updated_at)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+
+class SqliteBuckets:
+    # One short connection per transaction; BEGIN IMMEDIATE serialises the read-modify-write of
+    # every process and thread using the file
+    def __init__(self, path, max_idle_seconds):
+        self.path = path
+        self.max_idle_seconds = max_idle_seconds
+        self._writes = 0
+        with closing(sqlite3.connect(path, timeout=5)) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS rate_limits (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+
+    @contextmanager
+    def transaction(self):
+        with closing(sqlite3.connect(self.path, timeout=5, isolation_level=None)) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield _SqliteRows(conn)
+                self._writes += 1
+                if self._writes % 100 == 0:
+                    # Buckets idle this long are full again, just like a missing row
+                    conn.execute('DELETE FROM rate_limits WHERE updated_at < ?', (time.time() - self.max_idle_seconds,))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+
+
+class _SqliteRows:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def get(self, key):
+        return self.conn.execute('SELECT tokens, updated_at FROM rate_limits WHERE key = ?', (key,)).fetchone()
+
+    def put(self, key, tokens, updated_at):
+        self.conn.execute('''
+            INSERT INTO rate_limits (key, tokens, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at
+        ''', (key, tokens, updated_at))
+
+
+class RateLimiter:
+    def __init__(self, burst=BURST, per_hour=PER_HOUR, store=None, clock=time.time):
+        self.burst = burst
+        self.rate = per_hour / 3600
+        self.store = store if store is not None else MemoryBuckets()
+        self.clock = clock
+
+    def acquire(self, *keys):
+        """Take a token from each key's bucket, or from none of them.
+
+        Returns (seconds until a retry can succeed, keys whose bucket was empty); the submit may go
+        ahead when the list is empty.
+        """
+        now = self.clock()
+        with self.store.transaction() as buckets:
+            levels = {}
+            for key in keys:
+                tokens, updated_at = buckets.get(key) or (self.burst, now)
+                levels[key] = min(self.burst, tokens + (now - updated_at) * self.rate)
+            empty = [key for key, tokens in levels.items() if tokens < 1]
+            if empty:
+                return max((1 - levels[key]) / self.rate for key in empty), empty
+            for key, tokens in levels.items():
+                buckets.put(key, tokens - 1, now)
+        return 0.0, []
+
+
+def from_env():
+    path = os.environ.get('SEMINAR_RATE_LIMIT_DB')
+    # A bucket untouched for this long has refilled completely
+    store = SqliteBuckets(path, BURST / PER_HOUR * 3600) if path else None
+    return RateLimiter(BURST, PER_HOUR, store)
@@ -0,0 +1,55 @@
+# recurrence.py
+#
+# RRULE helpers for seminar series. Dates are 'YYYY-MM-DD' strings, like the date column of the
+# seminars table; occurrences are only ever expanded lazily, within a window.
+
+from datetime import datetime, timedelta
+from dateutil.rrule import rrulestr
+
+# How far ahead an open-ended series (no COUNT/UNTIL) is expanded
+SERIES_HORIZON_DAYS = 365
+
+FREQUENCIES = {
+    "Weekly": "FREQ=WEEKLY;INTERVAL=1",
+    "Every two weeks": "FREQ=WEEKLY;INTERVAL=2",
+    "Monthly": "FREQ=MONTHLY;INTERVAL=1",
+}
+
+
+def build_rrule(frequency, count=None, until=None):
+    # RRULE string from one of FREQUENCIES and an optional COUNT or UNTIL date
+    rule = FREQUENCIES[frequency]
+    if count:
+        rule += f";COUNT={int(count)}"
+    elif until:
+        rule += f";UNTIL={until.strftime('%Y%m%d')}T235959"
+    return rule
+
+
+def _parse(rule, dtstart):
+    return rrulestr(rule, dtstart=datetime.strptime(dtstart, "%Y-%m-%d"))
+
+
+def iter_occurrences(rule, dtstart, window_start, window_end):
+    # Lazily yield the occurrence dates of rule within [window_start, window_end]
+    start = datetime.strptime(window_start, "%Y-%m-%d")
+    end = datetime.strptime(window_end, "%Y-%m-%d")
+    for occurrence in _parse(rule, dtstart).xafter(start, inc=True):
+        if occurrence > end:
+            break
+        yield occurrence.strftime("%Y-%m-%d")
+
+
+def last_occurrence(rule, dtstart):
+    # Date of the final occurrence, or None for an open-ended series
+    if "COUNT=" not in rule.upper() and "UNTIL=" not in rule.upper():
+        return None
+    last = None
+    for occurrence in _parse(rule, dtstart):
+        last = occurrence
+    return last.strftime("%Y-%m-%d") if last else dtstart
+
+
+def horizon_end(today=None):
+    today = today or datetime.now().date()
+    return (today + timedelta(days=SERIES_HORIZON_DAYS)).strftime("%Y-%m-%d")
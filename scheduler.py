@@ -0,0 +1,232 @@
+# scheduler.py
+#
+# Background jobs that email "seminar tomorrow" reminders and a weekly digest. Run it as a sidecar
+#
+#     python scheduler.py [--db seminars.db] [--once]
+#
+# or in-process with start_background(db) (the app does this when SEMINAR_SCHEDULER=1). When
+# SEMINAR_BACKUP_DIR is set it also takes a rotating daily snapshot of the database. Every day it
+# moves seminars older than SEMINAR_ARCHIVE_AFTER_DAYS into the archive table.
+#
+# Each job has fixed slots (daily / Monday at SEND_AT). A run claims the latest due slot in the
+# scheduled_jobs table and queues its emails in the outbox in the same transaction, so a slot runs
+# once even with several schedulers, and a slot missed while nothing was running is picked up
+# after a restart. Queued emails are keyed per seminar (or week) and recipient, so overlapping
+# runs never queue the same email twice. Delivery drains the outbox through one SMTP session per
+# batch; a deliverer first leases its batch in the outbox, so concurrent schedulers never send the
+# same email twice either. The request form queues its notifications in the outbox too; a
+# Deliverer sends them as soon as it is woken, whether or not this process runs the jobs.
+
+import argparse
+import logging
+import os
+import sys
+import threading
+from datetime import datetime, time, timedelta
+
+import backup
+from database import COORDINATOR_EMAIL, SeminarDB
+from storage import backend_from_url
+
+log = logging.getLogger('seminar_organizer.scheduler')
+
+# Local time the jobs' slots start at
+SEND_AT = time(8, 0)
+
+# How often the background loop checks for due slots and pending emails
+POLL_SECONDS = 60
+
+# Outbox rows delivered per SMTP session
+DELIVERY_BATCH = 100
+
+
+def daily_slot(now):
+    slot = datetime.combine(now.date(), SEND_AT)
+    return slot if slot <= now else slot - timedelta(days=1)
+
+
+def weekly_slot(now):
+    slot = datetime.combine(now.date() - timedelta(days=now.weekday()), SEND_AT)
+    return slot if slot <= now else slot - timedelta(weeks=1)
+
+
+def _describe(seminar):
+    _, date, start_time, end_time, speaker_name, _, _, topic, _, room, _ = seminar
+    return f"{topic}\n  {date} {start_time[:5]}-{end_time[:5]}, room {room}" + (f", speaker {speaker_name}" if speaker_name else "")
+
+
+def reminder_messages(db, slot, now):
+    # Seminars from now until the end of the day after the slot; after a missed slot this also
+    # covers today's remaining seminars, whose reminders the dedup keys keep from being repeated
+    end = datetime.combine(slot.date() + timedelta(days=2), time(0, 0))
+    messages = []
+    for seminar in db.fetch_seminars_between(max(now, slot), end):
+        _, date, start_time, _, speaker_name, speaker_email, _, topic, _, room, _ = seminar
+        subject = f"Reminder: {topic} on {date} at {start_time[:5]}"
+        body = f"This is a reminder of the upcoming seminar:\n\n{_describe(seminar)}\n\nBest regards,\nSeminar Organizer"
+        for recipient in {COORDINATOR_EMAIL, speaker_email} - {''}:
+            messages.append((f"reminder:{date}:{start_time}:{room}:{recipient}", recipient, subject, body))
+    return messages
+
+
+def digest_messages(db, slot, now):
+    seminars = db.fetch_seminars_between(max(now, slot), slot + timedelta(weeks=1))
+    if not seminars:
+        return []
+    week = slot.strftime("%G-W%V")
+    body = "Seminars this week:\n\n" + "\n\n".join(_describe(s) for s in seminars) + "\n\nBest regards,\nSeminar Organizer"
+    return [(f"digest:{week}:{COORDINATOR_EMAIL}", COORDINATOR_EMAIL, f"Seminar digest for {week}", body)]
+
+
+def backup_job(db):
+    if backup.backup_dir():
+        success, message = backup.snapshot(db, backup.backup_dir())
+        (log.info if success else log.error)("backup: %s", message)
+
+
+def archive_job(db):
+    moved = db.archive_past_seminars()
+    if moved:
+        log.info("archive: moved %d past seminars to the archive", moved)
+
+
+# name -> (latest due slot for a given time, message builder)
+JOBS = {
+    'reminders': (daily_slot, reminder_messages),
+    'digest': (weekly_slot, digest_messages),
+}
+
+# name -> (latest due slot, action); the action runs once its slot has been claimed
+MAINTENANCE = {
+    'backup': (daily_slot, backup_job),
+    'archive': (daily_slot, archive_job),
+}
+
+
+def run_due_jobs(db, now=None):
+    """Run every job whose latest slot has not run yet; returns {job: emails queued}."""
+    now = now or datetime.now()
+    results = {}
+    for name, (slot_for, build) in JOBS.items():
+        slot = slot_for(now)
+        queued = db.run_scheduled_job(name, slot.isoformat(timespec='minutes'), build(db, slot, now))
+        if queued is not None:
+            log.info("job %s ran for slot %s, queued %d emails", name, slot, queued)
+            results[name] = queued
+    for name, (slot_for, action) in MAINTENANCE.items():
+        slot = slot_for(now)
+        if db.run_scheduled_job(name, slot.isoformat(timespec='minutes'), []) is not None:
+            action(db)
+            results[name] = 0
+    return results
+
+
+def deliver_pending(db):
+    """Send queued emails in batches, one SMTP session per batch; returns the number sent."""
+    # Imported here, so the app only loads SMTP support once the scheduler actually delivers
+    import smtplib
+    from mailer import Mailer
+
+    sent = 0
+    while True:
+        claim, emails = db.claim_emails(DELIVERY_BATCH)
+        if not emails:
+            return sent
+        current = None
+        try:
+            with Mailer(db.email_config) as mailer:
+                for email_id, recipient, subject, body in emails:
+                    current = email_id
+                    try:
+                        mailer.send(recipient, subject, body)
+                    except smtplib.SMTPRecipientsRefused as e:
+                        # A bad address only fails its own email
+                        db.mark_email_failed(email_id, claim, str(e))
+                        continue
+                    if db.mark_email_sent(email_id, claim):
+                        sent += 1
+        except Exception as e:
+            # Count the attempt against the email that failed and retry the rest on the next poll
+            if current is not None:
+                db.mark_email_failed(current, claim, str(e))
+            db.release_emails(claim)
+            log.warning("email delivery failed: %s", e)
+            return sent
+
+
+def run_once(db, now=None):
+    return run_due_jobs(db, now), deliver_pending(db)
+
+
+def run_forever(db, stop=None, poll_seconds=POLL_SECONDS):
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        try:
+            run_once(db)
+        except Exception:
+            log.exception("scheduler run failed")
+        stop.wait(poll_seconds)
+
+
+def start_background(db, poll_seconds=POLL_SECONDS):
+    """Run the scheduler in a daemon thread; set the returned event to stop it."""
+    stop = threading.Event()
+    thread = threading.Thread(target=run_forever, args=(db, stop, poll_seconds), name='seminar-scheduler', daemon=True)
+    thread.start()
+    return stop
+
+
+class Deliverer:
+    """A daemon thread that drains the outbox when woken, and every poll_seconds anyway."""
+
+    def __init__(self, db, poll_seconds=POLL_SECONDS):
+        self.db = db
+        self.poll_seconds = poll_seconds
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self.thread = threading.Thread(target=self._run, name='seminar-deliverer', daemon=True)
+        self.thread.start()
+
+    def wake(self):
+        self._wakeup.set()
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.poll_seconds)
+            self._wakeup.clear()
+            if self._stopped:
+                break
+            try:
+                deliver_pending(self.db)
+            except Exception:
+                log.exception("email delivery failed")
+
+
+def enabled():
+    return os.environ.get('SEMINAR_SCHEDULER', '').lower() in ('1', 'true', 'yes')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Send seminar reminders and weekly digests.")
+    parser.add_argument("--db", default="seminars.db", help="SQLite database file")
+    parser.add_argument("--url", default=os.environ.get("SEMINAR_DATABASE_URL"),
+                        help="database URL (sqlite:///file or postgresql://...), instead of --db")
+    parser.add_argument("--once", action="store_true", help="run due jobs and deliver once, then exit")
+    parser.add_argument("--poll", type=float, default=POLL_SECONDS, help="seconds between checks")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    db = SeminarDB(args.db, backend=backend_from_url(args.url) if args.url else None)
+    if args.once:
+        results, sent = run_once(db)
+        log.info("queued %s, sent %d", results, sent)
+    else:
+        run_forever(db, poll_seconds=args.poll)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+# seminar_organizer.py
+#
+# Command line for the administrative work otherwise done one click at a time in the admin pages.
+# Each run opens one SeminarDB and does the whole batch with it:
+#
+#     python -m seminar_organizer list requests --json
+#     python -m seminar_organizer approve --all-matching --room "B303" --from 2025-09-01
+#     python -m seminar_organizer reject 12 15
+#     python -m seminar_organizer import seminars.csv
+#     python -m seminar_organizer export --format ics --output seminars.ics
+#     python -m seminar_organizer ics 42 --send alice@example.org
+#     python -m seminar_organizer backup backups/manual.db
+#     python -m seminar_organizer reindex
+#     python -m seminar_organizer bench --size 100k
+#
+# Records are written as they are produced, tab-separated, or as JSON lines with --json. Messages
+# SeminarDB prints while sending email go to stderr, so stdout stays machine-readable. The exit
+# status is 1 when any record reports a failure.
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+
+from database import SeminarDB
+from storage import backend_from_url
+
+SEMINAR_FIELDS = ('id', 'date', 'start_time', 'end_time', 'speaker_name', 'speaker_email', 'speaker_bio', 'topic', 'abstract',
+                  'room', 'seminar_type')
+REQUEST_FIELDS = SEMINAR_FIELDS[:10] + ('submitter_name', 'submitter_email', 'status', 'seminar_type')
+SERIES_FIELDS = ('id', 'rrule', 'dtstart', 'until_date', 'start_time', 'end_time', 'speaker_name', 'speaker_email', 'speaker_bio',
+                 'topic', 'abstract', 'room', 'seminar_type')
+
+# Fields shown in the tab-separated output; --json always has all of them
+TEXT_FIELDS = ('id', 'status', 'rrule', 'date', 'start_time', 'end_time', 'room', 'speaker_name', 'topic')
+
+
+class Output:
+    def __init__(self, stream, as_json):
+        self.stream = stream
+        self.as_json = as_json
+        self.failed = False
+
+    def emit(self, record):
+        if record.get('ok') is False:
+            self.failed = True
+        if self.as_json:
+            line = json.dumps(record, default=str)
+        elif 'id' in record and 'topic' in record:
+            line = '\t'.join(str(record[field]) for field in TEXT_FIELDS if field in record)
+        else:
+            line = '\t'.join(f'{key}={value}' for key, value in record.items())
+        self.stream.write(line + '\n')
+        self.stream.flush()
+
+
+def _seminars(db, which):
+    if which == 'seminars':
+        return db.iter_seminars()
+    if which == 'future':
+        return db.fetch_future_seminars()
+    return _past(db)
+
+
+def _past(db):
+    # Page through the history, so the first rows are written before the oldest are read
+    cursor = None
+    while True:
+        rows, cursor = db.fetch_past_seminars_page(cursor)
+        yield from rows
+        if cursor is None:
+            break
+
+
+def list_records(db, out, which, limit=None):
+    if which == 'requests':
+        rows, fields = db.read_seminar_requests(), REQUEST_FIELDS
+    elif which == 'series':
+        rows, fields = db.read_seminar_series(), SERIES_FIELDS
+    else:
+        rows, fields = _seminars(db, which), SEMINAR_FIELDS
+    for count, row in enumerate(rows, start=1):
+        out.emit(dict(zip(fields, row)))
+        if count == limit:
+            break
+
+
+def matching_requests(db, args):
+    # Requests named by id, or with --all-matching every request passing the filters given
+    requests = [dict(zip(REQUEST_FIELDS, row)) for row in db.read_seminar_requests()]
+    if not args.all_matching:
+        ids = set(args.ids)
+        return [request for request in requests if request['id'] in ids]
+
+    def matches(request):
+        return ((args.room is None or request['room'].casefold() == args.room.casefold())
+                and (args.speaker is None or args.speaker.casefold() in request['speaker_name'].casefold())
+                and (args.topic is None or args.topic.casefold() in request['topic'].casefold())
+                and (args.type is None or request['seminar_type'] == args.type)
+                and (args.status is None or request['status'] == args.status)
+                and (args.date_from is None or request['date'] >= args.date_from)
+                and (args.date_to is None or request['date'] <= args.date_to))
+    return [request for request in requests if matches(request)]
+
+
+def decide(db, out, args, approve):
+    requests = matching_requests(db, args)
+    if not args.all_matching:
+        missing = set(args.ids) - {request['id'] for request in requests}
+        for request_id in sorted(missing):
+            out.emit({'id': request_id, 'ok': False, 'message': 'Seminar request not found.'})
+    for request in requests:
+        if args.dry_run:
+            out.emit({'id': request['id'], 'ok': True, 'message': 'would be ' + ('approved' if approve else 'rejected'),
+                      'date': request['date'], 'topic': request['topic']})
+            continue
+        if approve:
+            ok, message = db.approve_seminar_request(request['id'])
+        else:
+            values = [request[field] for field in REQUEST_FIELDS[1:10]]
+            ok, message = db.update_seminar_request(request['id'], *values, 'rejected', request['seminar_type'])
+        out.emit({'id': request['id'], 'ok': ok, 'message': message})
+
+
+def import_file(db, out, path, file_format=None):
+    import bulk
+
+    file_format = file_format or ('ics' if path.lower().endswith('.ics') else 'csv')
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = bulk.read_ics(f) if file_format == 'ics' else bulk.read_csv(f)
+        imported, errors = db.import_seminars(rows)
+    for line_number, error in errors:
+        out.emit({'line': line_number, 'ok': False, 'error': error})
+    out.emit({'imported': imported, 'errors': len(errors)})
+
+
+def export_file(db, out, file_format, path=None):
+    import bulk
+
+    with (open(path, 'w', newline='', encoding='utf-8') if path else contextlib.nullcontext(out.stream)) as f:
+        if file_format == 'ics':
+            bulk.write_ics(db.iter_seminars(with_timezone=True, with_series=True), f)
+        else:
+            bulk.write_csv((row[1:] for row in db.iter_seminars(with_series=True)), f)
+    if path:
+        out.emit({'exported': path, 'format': file_format})
+
+
+def invitation(db, out, seminar_id, recipients, path=None):
+    if recipients:
+        ok, message = db.send_calendar_invitation(seminar_id, recipients)
+        out.emit({'id': seminar_id, 'ok': ok, 'message': message})
+        return
+    msg = db.calendar_invitation(seminar_id, [])
+    if msg is None:
+        out.emit({'id': seminar_id, 'ok': False, 'message': 'Seminar not found.'})
+        return
+    calendar = next(part for part in msg.walk() if part.get_content_type() == 'text/calendar').get_payload(decode=True)
+    if path:
+        with open(path, 'wb') as f:
+            f.write(calendar)
+        out.emit({'id': seminar_id, 'ok': True, 'message': f'written to {path}'})
+    else:
+        out.stream.write(calendar.decode('utf-8'))
+        out.stream.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m seminar_organizer', description="Administer seminars from the command line.")
+    parser.add_argument("--db", default="seminars.db", help="SQLite database file")
+    parser.add_argument("--url", default=os.environ.get("SEMINAR_DATABASE_URL"),
+                        help="database URL (sqlite:///file or postgresql://...), instead of --db")
+    commands = parser.add_subparsers(dest="command", required=True)
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--json", action="store_true", help="write records as JSON lines")
+
+    listing = commands.add_parser("list", parents=[output], help="list seminars, requests or series")
+    listing.add_argument("what", nargs="?", default="seminars", choices=("seminars", "future", "past", "requests", "series"),
+                         help="seminars (all, oldest first), future, past (newest first), requests or series")
+    listing.add_argument("--limit", type=int)
+
+    for name, verb in (("approve", "approve"), ("reject", "reject")):
+        decision = commands.add_parser(name, parents=[output], help=f"{verb} seminar requests")
+        decision.add_argument("ids", nargs="*", type=int, help="request ids")
+        decision.add_argument("--all-matching", action="store_true", help=f"{verb} every request that passes the filters below")
+        decision.add_argument("--room")
+        decision.add_argument("--speaker", help="substring of the speaker name")
+        decision.add_argument("--topic", help="substring of the topic")
+        decision.add_argument("--type", help="seminar type")
+        decision.add_argument("--status", help="request status, e.g. pending")
+        decision.add_argument("--from", dest="date_from", help="first date, YYYY-MM-DD")
+        decision.add_argument("--to", dest="date_to", help="last date, YYYY-MM-DD")
+        decision.add_argument("--dry-run", action="store_true", help="only list the requests that would be affected")
+
+    importing = commands.add_parser("import", parents=[output], help="import seminars from a CSV or ICS file")
+    importing.add_argument("path")
+    importing.add_argument("--format", choices=("csv", "ics"), help="default: from the file extension")
+
+    exporting = commands.add_parser("export", parents=[output], help="export all seminars as CSV or ICS")
+    exporting.add_argument("--format", choices=("csv", "ics"), default="csv")
+    exporting.add_argument("--output", help="file to write instead of stdout")
+
+    invite = commands.add_parser("ics", parents=[output], help="write a seminar's calendar invitation, or email it")
+    invite.add_argument("seminar_id", type=int)
+    invite.add_argument("--send", nargs="+", metavar="EMAIL", help="email the invitation to these addresses")
+    invite.add_argument("--output", help="file to write instead of stdout")
+
+    snapshot = commands.add_parser("backup", parents=[output], help="copy the database to a file (see backup.py for rotation)")
+    snapshot.add_argument("dest")
+
+    commands.add_parser("reindex", parents=[output], help="rebuild the statistics tables and indexes and refresh planner statistics")
+
+    commands.add_parser("bench", help="run benchmarks.run; any further arguments are passed on to it")
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command != "bench":
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    if args.command == "approve" or args.command == "reject":
+        if bool(args.ids) == args.all_matching:
+            parser.error(f"{args.command}: give either request ids or --all-matching")
+
+    if args.command == "bench":
+        from benchmarks import run
+        return run.main(extra)
+
+    out = Output(sys.stdout, args.json)
+    with contextlib.redirect_stdout(sys.stderr):
+        db = SeminarDB(args.db, backend=backend_from_url(args.url) if args.url else None)
+        try:
+            if args.command == "list":
+                list_records(db, out, args.what, args.limit)
+            elif args.command in ("approve", "reject"):
+                decide(db, out, args, approve=args.command == "approve")
+            elif args.command == "import":
+                import_file(db, out, args.path, args.format)
+            elif args.command == "export":
+                export_file(db, out, args.format, args.output)
+            elif args.command == "ics":
+                invitation(db, out, args.seminar_id, args.send, args.output)
+            elif args.command == "backup":
+                ok, message = db.backup(args.dest)
+                out.emit({'ok': ok, 'message': message})
+            elif args.command == "reindex":
+                db.reindex()
+                out.emit({'ok': True, 'message': 'statistics and indexes rebuilt'})
+        finally:
+            db.close()
+    return 1 if out.failed else 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        # Output piped into head or similar, which stopped reading; exit without a traceback
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
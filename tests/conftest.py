@@ -0,0 +1,81 @@
+# tests/conftest.py
+#
+# Shared fixtures: a fresh SeminarDB in a temporary directory, and SMTP stubbed out for every test
+# so the notification emails SeminarDB sends on writes cost nothing and touch no network. Tests of
+# the pages take `app_dir`, the working directory the app finds seminars.db in.
+#
+# Tests taking `any_db` run once per storage backend. SQLite always runs; PostgreSQL runs when
+# SEMINAR_TEST_DATABASE_URL names a throwaway database, whose public schema every such test drops
+# and recreates (a local `createdb`, or a disposable container).
+
+import os
+import sys
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.run import NullSMTP  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def null_smtp():
+    with mock.patch("smtplib.SMTP", NullSMTP):
+        yield
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    return str(tmp_path / "seminars.db")
+
+
+@pytest.fixture
+def db(db_file):
+    from database import SeminarDB
+
+    db = SeminarDB(db_file)
+    yield db
+    db.close()
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def any_db(request, tmp_path):
+    from database import SeminarDB
+
+    if request.param == "sqlite":
+        db = SeminarDB(str(tmp_path / "seminars.db"))
+    else:
+        url = os.environ.get("SEMINAR_TEST_DATABASE_URL")
+        if not url:
+            pytest.skip("set SEMINAR_TEST_DATABASE_URL to a throwaway PostgreSQL database")
+        from storage import backend_from_url
+
+        backend = backend_from_url(url)
+        with backend.connect() as conn:
+            conn.execute("DROP SCHEMA public CASCADE")
+            conn.execute("CREATE SCHEMA public")
+            conn.commit()
+        db = SeminarDB(backend=backend)
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def app_dir(tmp_path, monkeypatch):
+    # The app opens seminars.db in the working directory; a DB or frame cached by an earlier
+    # test would point at another test's file
+    import streamlit as st
+
+    monkeypatch.chdir(tmp_path)
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    yield tmp_path
+    # A request submit starts a delivery thread; stop it before it outlives the directory
+    from views import data
+    data.deliverer().stop()
+
+
+def future_date(days=30):
+    return (datetime.now().date() + timedelta(days=days)).strftime("%Y-%m-%d")
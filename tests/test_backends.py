@@ -0,0 +1,189 @@
+import threading
+
+from conftest import future_date
+
+
+def _add(db, topic, date, start="10:00:00", end="11:00:00", room="Room 1", speaker="Ada Lovelace"):
+    return db.create_seminar(date, start, end, speaker, "ada@example.org", "", topic, "", room, "Others")
+
+
+def test_create_read_and_update(any_db):
+    date = future_date()
+    assert _add(any_db, "Engines", date)[0]
+    (row,) = any_db.read_seminars()
+    assert row[1:4] == (date, "10:00:00", "11:00:00")
+    assert (row[7], row[9]) == ("Engines", "Room 1")
+    assert any_db.update_seminar(row[0], date, "12:00:00", "13:00:00", "Ada Lovelace", "ada@example.org", "", "Engines", "",
+                                 "Room 1", "Others")[0]
+    assert any_db.read_seminars()[0][2] == "12:00:00"
+
+
+def test_seminar_times_follow_their_timezone(any_db):
+    # In January New York is six hours behind Copenhagen
+    date = "2030-01-15"
+    assert any_db.create_seminar(date, "10:00:00", "11:00:00", "Grace Hopper", "", "", "Compilers", "", "Room 1", "Others",
+                                 "America/New_York")[0]
+    assert any_db.check_time_conflict(date, "16:30:00", "17:00:00", "Room 1")
+    assert not any_db.check_time_conflict(date, "10:00:00", "11:00:00", "Room 1")
+    assert not _add(any_db, "Engines", date, "16:00:00", "17:00:00")[0]
+
+    # An update without a timezone keeps the seminar's own
+    seminar_id = any_db.read_seminars()[0][0]
+    assert any_db.update_seminar(seminar_id, date, "11:00:00", "12:00:00", "Grace Hopper", "", "", "Compilers", "", "Room 1",
+                                 "Others")[0]
+    assert any_db.check_time_conflict(date, "17:30:00", "18:00:00", "Room 1")
+    assert any_db.update_seminar(seminar_id, date, "11:00:00", "12:00:00", "Grace Hopper", "", "", "Compilers", "", "Room 1",
+                                 "Others", "Europe/Copenhagen")[0]
+    assert not any_db.check_time_conflict(date, "17:30:00", "18:00:00", "Room 1")
+    assert not any_db.create_seminar(date, "08:00:00", "09:00:00", "Ada Lovelace", "", "", "Engines", "", "Room 2", "Others",
+                                     "Mars/Olympus_Mons")[0]
+
+
+def test_room_spellings_share_one_room(any_db):
+    date = future_date()
+    assert _add(any_db, "Engines", date)[0]
+    assert not _add(any_db, "Machines", date, "10:30:00", "11:30:00", room=" room  1 ")[0]
+    assert _add(any_db, "Machines", date, "10:30:00", "11:30:00", room="Room 2")[0]
+    assert len(any_db.read_rooms()) == 2
+
+
+def test_writes_bump_the_data_version(any_db):
+    version = any_db.data_version("seminars")
+    assert _add(any_db, "Engines", future_date())[0]
+    assert any_db.data_version("seminars") > version
+
+
+def test_series_occurrence_override_replaces_the_previous_one(any_db):
+    start = future_date(31)
+    assert any_db.create_seminar_series("FREQ=WEEKLY;COUNT=4", start, "14:00:00", "15:00:00", "Reading group", "", "",
+                                        "Papers", "", "Room 3", "Others")[0]
+    series_id = any_db.read_seminar_series()[0][0]
+    for start_time, end_time in (("16:00:00", "17:00:00"), ("15:00:00", "16:00:00")):
+        assert any_db.update_series_occurrence(series_id, start, start, start_time, end_time, "Reading group", "", "", "Papers",
+                                               "", "Room 3")[0]
+    (occurrence,) = any_db.fetch_series_occurrences(start, start)
+    assert occurrence[2] == "15:00:00"
+
+
+def test_scheduled_job_runs_each_slot_once(any_db):
+    messages = [("k1", "a@example.org", "s", "b"), ("k2", "b@example.org", "s", "b")]
+    assert any_db.run_scheduled_job("check", "slot-1", messages) == 2
+    assert any_db.run_scheduled_job("check", "slot-1", messages) is None
+    # Keys already queued are not queued again
+    assert any_db.run_scheduled_job("check", "slot-2", messages[1:] + [("k3", "c@example.org", "s", "b")]) == 1
+
+
+def test_statistics_follow_writes_and_soft_deletes(any_db):
+    assert _add(any_db, "Engines", future_date())[0]
+    assert _add(any_db, "Machines", future_date(), "12:00:00", "13:30:00")[0]
+    statistics = any_db.read_statistics("month")
+    assert sum(row[3] for row in statistics) == 2
+    assert sum(row[4] for row in statistics) == 150
+    any_db.delete_seminar(next(row[0] for row in any_db.read_seminars() if row[7] == "Machines"))
+    assert sum(row[3] for row in any_db.read_statistics("month")) == 1
+
+
+def test_archived_seminars_stay_in_the_history(any_db):
+    past = future_date(-60)
+    assert _add(any_db, "Compilers", past, speaker="Grace Hopper")[0]
+    assert _add(any_db, "Engines", future_date())[0]
+    assert any_db.archive_past_seminars(after_days=7) == 1
+    assert any_db.archive_past_seminars(after_days=7) == 0
+    rows, cursor = any_db.fetch_past_seminars_page(None, limit=1)
+    assert [row[7] for row in rows] == ["Compilers"]
+    assert cursor is None or any_db.fetch_past_seminars_page(cursor, limit=1)[0] == []
+    assert [row[7] for row in any_db.fetch_future_seminars()] == ["Engines"]
+
+
+def test_change_feed_records_an_approval(any_db):
+    seq = any_db.last_change_seq()
+    any_db.create_seminar_request(future_date(90), "10:00:00", "11:00:00", "Barbara Liskov", "barbara@example.org", "",
+                                  "Abstraction", "", "Room 4", "Submitter", "submitter@example.org", "Others")
+    assert any_db.approve_seminar_request(any_db.read_seminar_requests()[0][0])[0]
+    changes = [(table, op) for _, table, _, op, _, _ in any_db.changes_since(seq)]
+    assert changes == [("seminar_requests", "insert"), ("seminar_requests", "update"), ("seminars", "insert"),
+                       ("seminar_requests", "delete")]
+
+
+def _request(db, topic, date, room="Room 4"):
+    db.create_seminar_request(date, "10:00:00", "11:00:00", "Barbara Liskov", "barbara@example.org", "", topic, "", room,
+                              "Submitter", "submitter@example.org", "Others")
+    return next(row[0] for row in db.read_seminar_requests() if row[7] == topic)
+
+
+class _Tracked:
+    # A connection that records how many connections its SeminarDB holds at once
+    def __init__(self, conn, held):
+        self._conn, self._held = conn, held
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        self._held.append(self)
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self._held.remove(self)
+        return self._conn.__exit__(*exc)
+
+
+def test_approval_holds_one_connection(any_db, monkeypatch):
+    request_id = _request(any_db, "Abstraction", future_date(90))
+    held, most = [], []
+    connect = any_db.connect
+
+    def tracked():
+        most.append(len(held) + 1)
+        return _Tracked(connect(), held)
+
+    monkeypatch.setattr(any_db, "connect", tracked)
+    assert any_db.approve_seminar_request(request_id)[0]
+    assert max(most) == 1
+
+
+def test_conflicting_approval_keeps_the_request_pending(any_db):
+    date = future_date(90)
+    request_id = _request(any_db, "Abstraction", date)
+    assert _add(any_db, "Engines", date, room="Room 4")[0]
+    assert not any_db.approve_seminar_request(request_id)[0]
+    (request,) = any_db.read_seminar_requests()
+    assert request[12] == "pending"
+    assert [row[7] for row in any_db.read_seminars()] == ["Engines"]
+
+
+def test_simultaneous_approvals_of_one_request(any_db):
+    request_id, racers = _request(any_db, "Abstraction", future_date(90)), 6
+    barrier = threading.Barrier(racers)
+    outcomes = []
+
+    def approve():
+        barrier.wait()
+        outcomes.append(any_db.approve_seminar_request(request_id)[0])
+
+    threads = [threading.Thread(target=approve) for _ in range(racers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(outcomes) == [False] * (racers - 1) + [True]
+    assert [row[7] for row in any_db.read_seminars()] == ["Abstraction"]
+    assert any_db.read_seminar_requests() == []
+
+
+def test_simultaneous_bookings_of_one_slot(any_db):
+    date, racers = future_date(120), 8
+    barrier = threading.Barrier(racers)
+    outcomes = []
+
+    def book(i):
+        barrier.wait()
+        outcomes.append(_add(any_db, f"Race {i}", date, room="Race room")[0])
+
+    threads = [threading.Thread(target=book, args=(i,)) for i in range(racers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(outcomes) == [False] * (racers - 1) + [True]
@@ -0,0 +1,77 @@
+import asyncio
+import os
+import sqlite3
+
+from conftest import future_date
+
+
+def _add(db, topic, days=30, start="10:00:00", end="11:00:00", room="Room 1"):
+    return db.create_seminar(future_date(days), start, end, "Speaker", "speaker@example.org", "", topic, "", room, "Others")
+
+
+def _topics(db):
+    return sorted(row[7] for row in db.read_seminars())
+
+
+def test_restore_round_trip(db, tmp_path):
+    assert _add(db, "Kept")[0]
+    snapshot = str(tmp_path / "snapshot.db")
+    assert db.backup(snapshot)[0]
+    version = db.data_version("seminars")
+
+    assert _add(db, "Added after the backup", days=31)[0]
+    db.delete_seminar(next(row[0] for row in db.read_seminars() if row[7] == "Kept"))
+
+    ok, message = db.restore(snapshot)
+    assert ok, message
+    assert _topics(db) == ["Kept"]
+    # Caches keyed by a version from before the restore must not match the restored data
+    assert db.data_version("seminars") > version
+
+
+def test_restore_rejects_missing_snapshot(db, tmp_path):
+    ok, _ = db.restore(str(tmp_path / "missing.db"))
+    assert not ok
+
+
+def test_writes_between_backup_steps_restart_the_copy(db, tmp_path):
+    for i in range(50):
+        assert _add(db, f"Seminar {i}", days=30 + i)[0]
+    written = []
+
+    def write_once(remaining, total):
+        # Between steps no lock is held, so a writer on another connection gets through at once
+        if not written and remaining:
+            written.append(_add(db, "Written during the backup", days=200)[0])
+
+    dest = str(tmp_path / "snapshot.db")
+    ok, message = db.backup(dest, pages_per_step=1, on_step=write_once)
+    assert ok, message
+    assert written == [True]
+    assert "restarted" in message
+    # The restarted copy includes the write
+    with sqlite3.connect(dest) as conn:
+        topics = {row[0] for row in conn.execute("SELECT topic FROM seminars")}
+    assert "Written during the backup" in topics
+
+
+def test_async_db_usable_after_backup_and_restore(db_file, tmp_path):
+    from async_db import AsyncSeminarDB
+
+    snapshot = str(tmp_path / "snapshot.db")
+
+    async def scenario():
+        async with AsyncSeminarDB(db_file) as adb:
+            ok, message = await adb.create_seminar(future_date(), "10:00:00", "11:00:00", "Speaker", "", "", "Async", "",
+                                                   "Room 1", "Others")
+            assert ok, message
+            assert (await adb.backup(snapshot))[0]
+            # The backup must not close the connection AsyncSeminarDB keeps open on its DB thread
+            conflicts = await asyncio.gather(*(adb.check_time_conflict(future_date(), "10:30:00", "11:30:00", "Room 1")
+                                               for _ in range(20)))
+            assert all(conflicts)
+            assert (await adb.restore(snapshot))[0]
+            assert [row[7] for row in await adb.read_seminars()] == ["Async"]
+
+    asyncio.run(scenario())
+    assert os.path.exists(snapshot)
@@ -0,0 +1,65 @@
+import io
+
+from icalendar import Calendar
+
+import bulk
+from conftest import future_date
+
+
+def _export(db):
+    out = io.StringIO()
+    bulk.write_ics(db.iter_seminars(with_timezone=True), out)
+    return out.getvalue()
+
+
+def test_ics_export_writes_zoned_times(db):
+    date = future_date()
+    assert db.create_seminar(date, "10:00:00", "11:00:00", "Ada Lovelace", "ada@example.org", "", "Engines", "", "Room 1",
+                             "Others")[0]
+    assert db.create_seminar(date, "14:00:00", "15:00:00", "Grace Hopper", "grace@example.org", "", "Compilers", "", "Room 1",
+                             "Others", "America/New_York")[0]
+
+    calendar = Calendar.from_ical(_export(db))
+    zones = {str(event["SUMMARY"]): event["DTSTART"].params["TZID"] for event in calendar.walk("VEVENT")}
+    assert zones == {"Engines": "Europe/Copenhagen", "Compilers": "America/New_York"}
+    assert sorted(str(zone["TZID"]) for zone in calendar.walk("VTIMEZONE")) == ["America/New_York", "Europe/Copenhagen"]
+    assert all("DTSTAMP" in event for event in calendar.walk("VEVENT"))
+
+
+def test_ics_export_imports_back(db, tmp_path):
+    from database import SeminarDB
+
+    date = future_date()
+    assert db.create_seminar(date, "10:00:00", "11:00:00", "Ada Lovelace", "ada@example.org", "Analyst", "Engines", "Notes",
+                             "Room 1", "Lecture")[0]
+    rows = list(bulk.read_ics(io.StringIO(_export(db))))
+    assert [row for _, row in rows] == [{
+        "date": date, "start_time": "10:00:00", "end_time": "11:00:00", "speaker_name": "Ada Lovelace",
+        "speaker_email": "ada@example.org", "speaker_bio": "Analyst", "topic": "Engines", "abstract": "Notes",
+        "room": "Room 1", "seminar_type": "Lecture",
+    }]
+
+    copy = SeminarDB(str(tmp_path / "copy.db"))
+    try:
+        copy.import_seminars(rows)
+        assert [row[1:] for row in copy.read_seminars()] == [row[1:] for row in db.read_seminars()]
+    finally:
+        copy.close()
+
+
+def test_exports_include_series_occurrences(db):
+    assert db.create_seminar_series("FREQ=WEEKLY;COUNT=3", future_date(7), "14:00:00", "15:00:00", "Reading group", "", "",
+                                    "Papers", "", "Room 3", "Others")[0]
+    assert db.create_seminar(future_date(10), "10:00:00", "11:00:00", "Ada Lovelace", "ada@example.org", "", "Engines", "",
+                             "Room 1", "Others")[0]
+
+    out = io.StringIO()
+    bulk.write_csv((row[1:] for row in db.iter_seminars(with_series=True)), out)
+    topics = [line.split(",")[6] for line in out.getvalue().splitlines()[1:]]
+    assert topics == ["Papers", "Engines", "Papers", "Papers"]
+
+    out = io.StringIO()
+    bulk.write_ics(db.iter_seminars(with_timezone=True, with_series=True), out)
+    events = Calendar.from_ical(out.getvalue()).walk("VEVENT")
+    assert len({str(event["UID"]) for event in events}) == 4
+    assert f"series-1-{future_date(14)}@myseminarapp.com" in {str(event["UID"]) for event in events}
@@ -0,0 +1,64 @@
+import sqlite3
+import subprocess
+import sys
+
+from coherence import VersionWatcher
+from conftest import future_date
+
+
+def _add(db, topic):
+    assert db.create_seminar(future_date(), "10:00:00", "11:00:00", "Ada Lovelace", "", "", topic, "", "Room 1", "Others")[0]
+
+
+def test_write_from_another_process_bumps_the_version(db, db_file):
+    _add(db, "Engines")
+    version = db.data_version("seminars")
+    subprocess.run([sys.executable, "-c", f"""
+import sqlite3
+with sqlite3.connect({db_file!r}) as conn:
+    conn.execute("UPDATE seminars SET topic = 'Renamed elsewhere'")
+"""], check=True)
+    assert db.data_version("seminars") > version
+
+
+def test_unrelated_writes_leave_other_versions_alone(db):
+    version = db.data_version("seminars")
+    db.create_seminar_request(future_date(), "10:00:00", "11:00:00", "Ada Lovelace", "", "", "Engines", "", "Room 1",
+                              "Submitter", "submitter@example.org", "Others")
+    assert db.data_version("seminars") == version
+
+
+def test_poll_interval_bounds_staleness(db, db_file, monkeypatch):
+    import coherence
+
+    now = [1000.0]
+    monkeypatch.setattr(coherence.time, "monotonic", lambda: now[0])
+    _add(db, "Engines")
+    watcher = VersionWatcher(db_file, poll_interval=60)
+    version = watcher.version("seminars")
+
+    with sqlite3.connect(db_file) as conn:
+        conn.execute("UPDATE seminars SET topic = 'Renamed elsewhere'")
+    # Within the interval the last counters are reused
+    now[0] += 59
+    assert watcher.version("seminars") == version
+    now[0] += 1
+    assert watcher.version("seminars") > version
+    assert watcher.checks == 2
+    watcher.close()
+
+
+def test_cached_page_data_refreshes_after_a_write_elsewhere(db, db_file, app_dir):
+    from views import data
+
+    # get_db() opens seminars.db in app_dir, the directory db_file is in
+    _add(db, "Engines")
+    version, frame = data.future_seminars_frame()
+    assert list(frame["topic"]) == ["Engines"]
+    assert data.future_seminars_frame()[0] == version
+
+    with sqlite3.connect(db_file) as conn:
+        conn.execute("UPDATE seminars SET topic = 'Renamed elsewhere'")
+    new_version, frame = data.future_seminars_frame()
+    assert new_version > version
+    assert list(frame["topic"]) == ["Renamed elsewhere"]
@@ -0,0 +1,29 @@
+from icalendar import Calendar
+
+import ics
+
+EVENT = (7, 2, '2026-11-02', '10:00:00', '11:00:00', 'Topic', 'Abstract', 'Room 1', 'org@example.org', 'Europe/Copenhagen')
+
+
+def test_dtstamp_is_fresh_on_every_render(monkeypatch):
+    monkeypatch.setattr(ics, '_dtstamp', lambda: b'DTSTAMP:20261019T080000Z\r\n')
+    first = ics.render_event(*EVENT)
+    monkeypatch.setattr(ics, '_dtstamp', lambda: b'DTSTAMP:20261020T090000Z\r\n')
+    hits = ics._event_body.cache_info().hits
+    second = ics.render_event(*EVENT)
+
+    # The body came from the cache, the stamp did not
+    assert ics._event_body.cache_info().hits == hits + 1
+    assert b'DTSTAMP:20261019T080000Z' in first
+    assert b'DTSTAMP:20261020T090000Z' in second
+    assert first.replace(b'20261019T080000Z', b'20261020T090000Z') == second
+
+
+def test_invitation_parses_with_timezone():
+    calendar = Calendar.from_ical(ics.invitation([ics.render_event(*EVENT)], 'Europe/Copenhagen'))
+    event = calendar.walk('VEVENT')[0]
+    assert event['DTSTAMP'].dt.utcoffset().total_seconds() == 0
+    assert event['DTSTART'].params['TZID'] == 'Europe/Copenhagen'
+    assert event['DTSTART'].dt.utcoffset().total_seconds() == 3600
+    assert str(event['UID']) == '7@myseminarapp.com'
+    assert calendar.walk('VTIMEZONE')[0]['TZID'] == 'Europe/Copenhagen'
@@ -0,0 +1,22 @@
+import os
+from unittest import mock
+
+from database import SeminarDB
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def test_pages_leave_the_shared_db_open(app_dir):
+    from streamlit.testing.v1 import AppTest
+
+    with mock.patch.object(SeminarDB, "close") as close:
+        at = AppTest.from_file(APP, default_timeout=60).run()
+        at.sidebar.radio[0].set_value("Admin").run()
+        assert not at.exception
+        next(w for w in at.text_input if w.label == "Username").input("admin")
+        next(w for w in at.text_input if w.label == "Password").input("nimda1234")
+        next(b for b in at.button if b.label == "Login").click().run()
+        assert at.session_state["admin_logged_in"] and not at.exception
+        at.sidebar.radio[0].set_value("Calendar").run()
+        assert not at.exception
+    close.assert_not_called()
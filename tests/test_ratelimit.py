@@ -0,0 +1,69 @@
+import pytest
+
+from ratelimit import MemoryBuckets, RateLimiter, SqliteBuckets
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_burst_then_limited(clock):
+    limiter = RateLimiter(burst=3, per_hour=6, clock=clock)
+    assert [limiter.acquire("a") for _ in range(3)] == [(0.0, [])] * 3
+    retry_after, limited = limiter.acquire("a")
+    assert limited == ["a"]
+    # One token takes 3600 / 6 seconds to refill
+    assert retry_after == pytest.approx(600)
+    # Other keys have buckets of their own
+    assert limiter.acquire("b") == (0.0, [])
+
+
+def test_refill_is_gradual_and_capped(clock):
+    limiter = RateLimiter(burst=2, per_hour=6, clock=clock)
+    limiter.acquire("a")
+    limiter.acquire("a")
+    clock.now += 300
+    retry_after, limited = limiter.acquire("a")
+    assert limited == ["a"] and retry_after == pytest.approx(300)
+    clock.now += 300
+    assert limiter.acquire("a") == (0.0, [])
+    # A long idle spell refills no more than the burst
+    clock.now += 86400
+    assert [limiter.acquire("a")[1] for _ in range(3)] == [[], [], ["a"]]
+
+
+def test_all_keys_or_none(clock):
+    limiter = RateLimiter(burst=1, per_hour=6, clock=clock)
+    assert limiter.acquire("email:x") == (0.0, [])
+    assert limiter.acquire("session:s", "email:x")[1] == ["email:x"]
+    # The session's token was not taken by the refused submit
+    assert limiter.acquire("session:s") == (0.0, [])
+
+
+def test_memory_buckets_drop_the_least_recently_used(clock):
+    limiter = RateLimiter(burst=1, per_hour=6, store=MemoryBuckets(max_keys=2), clock=clock)
+    for key in ("a", "b", "c"):
+        limiter.acquire(key)
+    # "a" was dropped, which leaves it a full bucket
+    assert limiter.acquire("a") == (0.0, [])
+    assert limiter.acquire("c")[1] == ["c"]
+
+
+def test_sqlite_buckets_are_shared(tmp_path, clock):
+    path = str(tmp_path / "limits.db")
+    first = RateLimiter(burst=2, per_hour=6, store=SqliteBuckets(path, 1200), clock=clock)
+    second = RateLimiter(burst=2, per_hour=6, store=SqliteBuckets(path, 1200), clock=clock)
+    assert first.acquire("a") == (0.0, [])
+    assert second.acquire("a") == (0.0, [])
+    assert first.acquire("a")[1] == ["a"]
+    clock.now += 600
+    assert second.acquire("a") == (0.0, [])
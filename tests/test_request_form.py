@@ -0,0 +1,58 @@
+import os
+import time
+from datetime import date, timedelta
+from unittest import mock
+
+import ratelimit
+from database import COORDINATOR_EMAIL
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def _submit(topic, email="visitor@example.org"):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    at.radio(key="calendar_view").set_value("Request Seminar").run()
+    at.text_input(key="request_room").input("Room 1").run()
+    next(w for w in at.date_input).set_value(date.today() + timedelta(days=30))
+    next(w for w in at.text_input if w.label == "Topic *").input(topic)
+    next(w for w in at.text_input if w.label == "Your Name *").input("Visitor")
+    next(w for w in at.text_input if w.label == "Your Email *").input(email)
+    next(b for b in at.button if b.label == "Submit Request").click().run()
+    assert not at.exception
+    return at
+
+
+def _db():
+    from views import data
+
+    return data.get_db()
+
+
+def test_request_queues_the_coordinator_email(app_dir):
+    sent = []
+    with mock.patch("mailer.Mailer.send", lambda self, recipient, subject, body: sent.append((recipient, subject))):
+        at = _submit("Engines")
+        assert [s.value for s in at.success] == ["Seminar request submitted successfully."]
+        assert [row[7] for row in _db().read_seminar_requests()] == ["Engines"]
+        # The form only woke the deliverer; it sends from its own thread
+        deadline = time.monotonic() + 10
+        while _db().outbox_depth() and time.monotonic() < deadline:
+            time.sleep(0.05)
+    assert sent == [(COORDINATOR_EMAIL, "New Seminar Request for Approval")]
+
+
+def test_deep_outbox_turns_requests_away(app_dir):
+    with mock.patch.object(ratelimit, "OUTBOX_HIGH_WATER", -1):
+        at = _submit("Engines")
+    assert "try again in a few minutes" in at.warning[0].value
+    assert _db().read_seminar_requests() == []
+
+
+def test_rate_limit_turns_requests_away(app_dir):
+    with mock.patch.object(ratelimit, "BURST", 1):
+        assert _submit("Engines", "same@example.org").success
+        at = _submit("Machines", "same@example.org")
+    assert "several requests in a short time" in at.warning[0].value
+    assert [row[7] for row in _db().read_seminar_requests()] == ["Engines"]
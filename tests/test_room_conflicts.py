@@ -0,0 +1,66 @@
+import pytest
+
+from conftest import future_date
+from database import epoch_minutes
+
+# Candidate intervals against a 12:00-13:00 booking in Room 1; touching is not overlapping
+CASES = [
+    ("adjacent_before", "11:00:00", "12:00:00", True),
+    ("adjacent_after", "13:00:00", "14:00:00", True),
+    ("nested", "12:15:00", "12:45:00", False),
+    ("enclosing", "11:30:00", "13:30:00", False),
+    ("equal", "12:00:00", "13:00:00", False),
+    ("overlap_start", "11:30:00", "12:30:00", False),
+    ("overlap_end", "12:30:00", "13:30:00", False),
+]
+
+
+@pytest.fixture
+def booked(any_db):
+    date = future_date()
+    assert any_db.create_seminar(date, "12:00:00", "13:00:00", "Ada Lovelace", "", "", "Booked", "", "Room 1", "Others")[0]
+    return any_db, date
+
+
+def _direct_insert(db, date, start, end, topic):
+    # Bypasses SeminarDB's methods entirely, as a script or a manual fix-up would
+    with db.connect() as conn:
+        try:
+            conn.execute('''
+                INSERT INTO seminars (date, start_time, end_time, speaker_name, speaker_email, topic, room, start_min, end_min, room_id)
+                SELECT date, ?, ?, 'Direct', '', ?, room, ?, ?, room_id FROM seminars WHERE topic = 'Booked'
+            ''', (start, end, topic, epoch_minutes(date, start), epoch_minutes(date, end)))
+            conn.commit()
+            return True
+        except db.backend.IntegrityError:
+            conn.rollback()
+            return False
+
+
+@pytest.mark.parametrize("name, start, end, allowed", CASES, ids=[case[0] for case in CASES])
+def test_direct_insert(booked, name, start, end, allowed):
+    db, date = booked
+    assert _direct_insert(db, date, start, end, f"Direct {name}") is allowed
+
+
+@pytest.mark.parametrize("name, start, end, allowed", CASES, ids=[case[0] for case in CASES])
+def test_create_seminar(booked, name, start, end, allowed):
+    db, date = booked
+    ok, message = db.create_seminar(date, start, end, "Alan Turing", "", "", f"Created {name}", "", "Room 1", "Others")
+    assert ok is allowed, message
+
+
+def test_other_room_and_other_day_are_free(booked):
+    db, date = booked
+    assert db.create_seminar(date, "12:00:00", "13:00:00", "Alan Turing", "", "", "Other room", "", "Room 2", "Others")[0]
+    assert db.create_seminar(future_date(31), "12:00:00", "13:00:00", "Alan Turing", "", "", "Other day", "", "Room 1",
+                             "Others")[0]
+
+
+def test_update_onto_a_booking_is_rejected(booked):
+    db, date = booked
+    assert db.create_seminar(date, "13:00:00", "14:00:00", "Alan Turing", "", "", "Later", "", "Room 1", "Others")[0]
+    later = next(row[0] for row in db.read_seminars() if row[7] == "Later")
+    assert not db.update_seminar(later, date, "12:30:00", "13:30:00", "Alan Turing", "", "", "Later", "", "Room 1", "Others")[0]
+    # Moving within its own slot does not conflict with itself
+    assert db.update_seminar(later, date, "13:00:00", "13:45:00", "Alan Turing", "", "", "Later", "", "Room 1", "Others")[0]
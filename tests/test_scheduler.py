@@ -0,0 +1,74 @@
+import threading
+import time
+from unittest import mock
+
+import scheduler
+from benchmarks.run import NullSMTP
+
+
+class RecordingSMTP(NullSMTP):
+    sent = []
+    lock = threading.Lock()
+
+    def send_message(self, msg):
+        # Slow enough for two deliverers to interleave
+        time.sleep(0.001)
+        with self.lock:
+            self.sent.append(msg["Subject"])
+
+
+def _queue(db, count):
+    messages = [(f"key-{i}", f"r{i}@example.org", f"Email {i}", "body") for i in range(count)]
+    assert db.run_scheduled_job("test", "slot-1", messages) == count
+
+
+def test_two_deliverers_send_each_email_once(db, monkeypatch):
+    _queue(db, 60)
+    RecordingSMTP.sent = []
+    monkeypatch.setattr(scheduler, "DELIVERY_BATCH", 7)
+    barrier = threading.Barrier(2)
+    counts = []
+
+    def deliver():
+        barrier.wait()
+        counts.append(scheduler.deliver_pending(db))
+
+    with mock.patch("smtplib.SMTP", RecordingSMTP):
+        threads = [threading.Thread(target=deliver) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert sorted(RecordingSMTP.sent) == sorted(f"Email {i}" for i in range(60))
+    assert sum(counts) == 60
+    assert db.outbox_depth() == 0
+
+
+def test_claimed_emails_are_not_claimed_again(db):
+    _queue(db, 5)
+    claim, emails = db.claim_emails(3)
+    assert len(emails) == 3
+    other, rest = db.claim_emails(10)
+    assert {row[0] for row in rest}.isdisjoint(row[0] for row in emails) and len(rest) == 2
+    # Only the claim's holder marks its emails
+    assert not db.mark_email_sent(emails[0][0], other)
+    assert db.mark_email_sent(emails[0][0], claim)
+
+
+def test_lapsed_claim_is_taken_over(db):
+    _queue(db, 1)
+    claim, emails = db.claim_emails(1, lease_seconds=-1)
+    other, again = db.claim_emails(1)
+    assert again == emails
+    assert not db.mark_email_sent(emails[0][0], claim)
+    assert db.mark_email_sent(emails[0][0], other)
+
+
+def test_failed_delivery_releases_the_batch(db):
+    _queue(db, 3)
+    claim, emails = db.claim_emails(3)
+    db.mark_email_failed(emails[0][0], claim, "refused")
+    db.release_emails(claim)
+    _, again = db.claim_emails(3)
+    assert again == emails
@@ -0,0 +1,110 @@
+from conftest import future_date
+
+
+def _series(db, start, room="Room 3"):
+    assert db.create_seminar_series("FREQ=WEEKLY;COUNT=4", start, "14:00:00", "15:00:00", "Reading group", "", "", "Papers", "",
+                                    room, "Others")[0]
+    return db.read_seminar_series()[0][0]
+
+
+def test_series_expands_within_the_window(db):
+    start = future_date(31)
+    _series(db, start)
+    assert len(db.fetch_series_occurrences(start, future_date(31 + 28))) == 4
+
+
+def test_conflicting_occurrence_move_writes_nothing(db):
+    start = future_date(31)
+    series_id = _series(db, start)
+    assert db.create_seminar(start, "16:00:00", "17:00:00", "Ada Lovelace", "", "", "Booked", "", "Room 9", "Others")[0]
+    speakers, version = db.read_speakers(), db.data_version("lookups")
+
+    ok, _ = db.update_series_occurrence(series_id, start, start, "16:30:00", "17:30:00", "Guest speaker", "guest@example.org",
+                                        "", "Papers", "", "Room 9")
+    assert not ok
+    # The speaker named by the rejected move is not registered, and no lookup write is committed
+    assert db.read_speakers() == speakers
+    assert db.data_version("lookups") == version
+    assert db.fetch_series_occurrences(start, start)[0][2] == "14:00:00"
+
+
+def _walk_history(db, limit):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = db.fetch_past_seminars_page(cursor, limit)
+        pages.append(rows)
+        if cursor is None:
+            return pages
+
+
+def test_history_pages_expand_only_their_own_span(db, monkeypatch):
+    # Four years of weekly talks and no one-off seminars: every page is a short page
+    assert db.create_seminar_series("FREQ=WEEKLY;COUNT=200", future_date(-7 * 200), "14:00:00", "15:00:00", "Reading group",
+                                    "", "", "Papers", "", "Room 3", "Others")[0]
+    windows = []
+    expand = db._expand_series
+    monkeypatch.setattr(db, "_expand_series", lambda cursor, start, end, exclude=None: windows.append((start, end))
+                        or expand(cursor, start, end, exclude))
+
+    rows, _ = db.fetch_past_seminars_page(None, limit=10)
+    assert len(rows) == 10
+    assert [row[1] for row in rows] == sorted((row[1] for row in rows), reverse=True)
+    # The newest page did not expand the whole history
+    assert min(start for start, _ in windows) > future_date(-366)
+
+    dates = [row[1] for page in _walk_history(db, 10) for row in page]
+    assert len(dates) == len(set(dates)) == 200
+    assert dates == sorted(dates, reverse=True)
+
+
+def test_history_merges_seminars_and_occurrences_once(db):
+    assert db.create_seminar_series("FREQ=WEEKLY;COUNT=30", future_date(-7 * 30), "14:00:00", "15:00:00", "Reading group",
+                                    "", "", "Papers", "", "Room 3", "Others")[0]
+    for days in range(3, 7 * 30, 11):
+        assert db.create_seminar(future_date(-days), "10:00:00", "11:00:00", "Ada Lovelace", "", "", f"Talk {days}", "",
+                                 "Room 1", "Others")[0]
+    seminars = 30 + len(range(3, 7 * 30, 11))
+    for limit in (1, 4, 7, 50):
+        pages = _walk_history(db, limit)
+        items = [(row[1], row[2], row[7]) for page in pages for row in page]
+        assert len(items) == len(set(items)) == seminars
+        assert items == sorted(items, key=lambda item: item[:2], reverse=True)
+        assert all(len(page) <= limit for page in pages)
+
+
+def test_occurrence_moved_outside_the_series_span_is_still_shown(db):
+    start = future_date(31)
+    series_id = _series(db, start)
+    last, later, earlier = future_date(31 + 21), future_date(31 + 60), future_date(20)
+    assert db.update_series_occurrence(series_id, last, later, "14:00:00", "15:00:00", "Reading group", "", "", "Papers", "",
+                                       "Room 3")[0]
+    assert db.update_series_occurrence(series_id, start, earlier, "14:00:00", "15:00:00", "Reading group", "", "", "Papers", "",
+                                       "Room 3")[0]
+    assert [row[1] for row in db.fetch_series_occurrences(later, later)] == [later]
+    assert [row[1] for row in db.fetch_series_occurrences(earlier, earlier)] == [earlier]
+    assert len(db.fetch_series_occurrences(earlier, later)) == 4
+    # The moved occurrence still books its room
+    assert not db.create_seminar(later, "14:30:00", "15:30:00", "Ada Lovelace", "", "", "Clash", "", "Room 3", "Others")[0]
+
+
+def test_statistics_count_series_occurrences(db):
+    _series(db, future_date(31))
+    assert db.create_seminar(future_date(31), "10:00:00", "11:30:00", "Ada Lovelace", "", "", "Engines", "", "Room 1",
+                             "Others")[0]
+    for period in ("month", "term"):
+        statistics = db.read_statistics(period)
+        assert sum(row[3] for row in statistics) == 5
+        assert sum(row[4] for row in statistics) == 4 * 60 + 90
+    assert db.read_speaker_frequency() == [("Reading group", 4), ("Ada Lovelace", 1)]
+
+
+def test_series_blocks_seminars_held_in_another_timezone(db):
+    # 14:00 in Copenhagen is 08:00 in New York in January
+    _series(db, "2030-01-14")
+    assert not db.create_seminar("2030-01-21", "08:30:00", "09:30:00", "Grace Hopper", "", "", "Compilers", "", "Room 3",
+                                 "Others", "America/New_York")[0]
+    assert db.create_seminar("2030-01-21", "14:00:00", "15:00:00", "Grace Hopper", "", "", "Compilers", "", "Room 3",
+                             "Others", "America/New_York")[0]
+    # ... and the seminar, 20:00 here, now blocks a series over that evening
+    assert not db.create_seminar_series("FREQ=DAILY;COUNT=3", "2030-01-20", "19:30:00", "20:30:00", "Evening group", "", "",
+                                        "Papers", "", "Room 3", "Others")[0]
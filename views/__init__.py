@@ -1,4 +1,15 @@
 # views/__init__.py
+#
+# Page registry. A page's module, and everything it imports, is loaded when the page is first
+# shown, so a visitor who only opens the calendar never loads the admin page.
 
-from . import calendar
-from . import admin
\ No newline at end of file
+import importlib
+
+PAGES = {
+    "Calendar": "views.calendar",
+    "Admin": "views.admin",
+}
+
+
+def page(name):
+    return importlib.import_module(PAGES[name])
@@ -1,5 +1,14 @@
+import io
+import tempfile
 import streamlit as st
-from database import SeminarDB
+import pandas as pd
+import pytz
+from views import data
+from database import DEFAULT_TIMEZONE
+from instrumentation import metrics
+import ratelimit
+import profiler
+from recurrence import FREQUENCIES, build_rrule, iter_occurrences, horizon_end
 from datetime import datetime, time
 
 def time_picker(label, default_time=time(9, 0)):
@@ -10,7 +19,8 @@ def time_picker(label, default_time=time(9, 0)):
 
 def show():
     st.title("Admin Panel")
-    db = SeminarDB()
+    with profiler.phase("admin: db connect"):
+        db = data.get_db()
     SEMINAR_TYPES = [
         "Economics of Green Transition Seminar",
         "CEP Division Seminar",
@@ -24,25 +34,35 @@ def show():
         username = st.text_input("Username")
         password = st.text_input("Password", type="password")
         if st.button("Login"):
-            if db.verify_admin(username, password):
+            with profiler.phase("admin: verify login"):
+                verified = db.verify_admin(username, password)
+            if verified:
                 st.session_state.admin_logged_in = True
                 st.rerun()
             else:
                 st.error("Invalid username or password")
     else:
-        tab1, tab2 = st.tabs(["Admin Seminar", "Pending Seminar Requests"])
+        view_names = ["Admin Seminar", "Pending Seminar Requests", "Statistics", "Activity", "Import / Export", "Metrics"]
+        # The profiler panel only exists while profiling is switched on
+        if profiler.enabled():
+            view_names.append("Profiler")
+        # Only the selected view runs, so each one loads its data on demand
+        view = st.radio("View", view_names, horizontal=True, label_visibility="collapsed", key="admin_view")
 
-        with tab1:
+        if view == "Admin Seminar":
             st.header("Manage Seminars")
-            seminar_action = st.selectbox("Choose an action", ["Add Seminar", "Update Seminar", "Delete Seminar"])
+            seminar_action = st.selectbox("Choose an action", ["Add Seminar", "Add Seminar Series", "Manage Seminar Series", "Update Seminar", "Delete Seminar"])
             
             if seminar_action == "Add Seminar":
+                # Outside the form so suggestions follow what is typed
+                room = data.autocomplete_input("Meeting Room", data.room_index(), key="add_seminar_room")
+                speaker_name = data.autocomplete_input("Speaker Name", data.speaker_index(), key="add_seminar_speaker")
                 with st.form("add_seminar_form"):
                     date = st.date_input("Seminar Date")
                     start_time = time_picker("Start Time", default_time=time(12, 0))
                     end_time = time_picker("End Time", default_time=time(13, 0))
-                    room = st.text_input("Meeting Room")
-                    speaker_name = st.text_input("Speaker Name")
+                    timezone = st.selectbox("Time Zone", pytz.common_timezones,
+                                            index=pytz.common_timezones.index(DEFAULT_TIMEZONE))
                     speaker_email = st.text_input("Speaker Email")
                     speaker_bio = st.text_area("Speaker Bio")
                     seminar_type = st.selectbox(
@@ -56,14 +76,92 @@ def show():
 
                 if submit_button:
                     success, message = db.create_seminar(str(date), start_time.strftime("%H:%M:%S"), end_time.strftime("%H:%M:%S"), 
-                                                        speaker_name, speaker_email, speaker_bio, topic, abstract, room, seminar_type)
+                                                        speaker_name, speaker_email, speaker_bio, topic, abstract, room, seminar_type,
+                                                        timezone)
                     if success:
                         st.success(message)
                     else:
                         st.warning(message)
 
+            elif seminar_action == "Add Seminar Series":
+                room = data.autocomplete_input("Meeting Room", data.room_index(), key="add_series_room")
+                speaker_name = data.autocomplete_input("Speaker Name", data.speaker_index(), key="add_series_speaker")
+                with st.form("add_series_form"):
+                    date = st.date_input("First Seminar Date")
+                    start_time = time_picker("Start Time", default_time=time(12, 0))
+                    end_time = time_picker("End Time", default_time=time(13, 0))
+                    frequency = st.selectbox("Repeats", list(FREQUENCIES))
+                    end_mode = st.radio("Ends", ["After a number of occurrences", "On a date"], horizontal=True)
+                    count = st.number_input("Number of occurrences", min_value=1, max_value=260, value=52)
+                    until = st.date_input("Last Seminar Date")
+                    speaker_email = st.text_input("Speaker Email")
+                    speaker_bio = st.text_area("Speaker Bio")
+                    seminar_type = st.selectbox(
+                        "Seminar Type *",
+                        options=SEMINAR_TYPES,
+                        index=0
+                    )
+                    topic = st.text_input("Topic")
+                    abstract = st.text_area("Abstract")
+                    submit_button = st.form_submit_button("Add Seminar Series")
+
+                if submit_button:
+                    if end_mode == "After a number of occurrences":
+                        rrule = build_rrule(frequency, count=count)
+                    else:
+                        rrule = build_rrule(frequency, until=until)
+                    success, message = db.create_seminar_series(rrule, str(date), start_time.strftime("%H:%M:%S"), end_time.strftime("%H:%M:%S"),
+                                                                speaker_name, speaker_email, speaker_bio, topic, abstract, room, seminar_type)
+                    if success:
+                        st.success(message)
+                    else:
+                        st.warning(message)
+
+            elif seminar_action == "Manage Seminar Series":
+                series_list = db.read_seminar_series()
+                if not series_list:
+                    st.warning("No seminar series available.")
+                else:
+                    series_options = [f"{s[9]} ({s[1]}, from {s[2]})" for s in series_list]  # topic (rule, from dtstart)
+                    selected_series = st.selectbox("Select seminar series", series_options)
+                    series = series_list[series_options.index(selected_series)]
+                    today = datetime.now().strftime("%Y-%m-%d")
+                    occurrence_dates = list(iter_occurrences(series[1], series[2], max(today, series[2]), series[3] or horizon_end()))
+                    if not occurrence_dates:
+                        st.warning("This series has no upcoming occurrences.")
+                    else:
+                        occurrence_date = st.selectbox("Select occurrence", occurrence_dates)
+                        with st.form("edit_occurrence_form"):
+                            date = st.date_input("Seminar Date", value=datetime.strptime(occurrence_date, "%Y-%m-%d").date())
+                            start_time = time_picker("Start Time", default_time=datetime.strptime(series[4], "%H:%M:%S").time())
+                            end_time = time_picker("End Time", default_time=datetime.strptime(series[5], "%H:%M:%S").time())
+                            room = st.text_input("Meeting Room", value=series[11])
+                            speaker_name = st.text_input("Speaker Name", value=series[6])
+                            speaker_email = st.text_input("Speaker Email", value=series[7])
+                            speaker_bio = st.text_area("Speaker Bio", value=series[8])
+                            topic = st.text_input("Topic", value=series[9])
+                            abstract = st.text_area("Abstract", value=series[10])
+                            submit_button = st.form_submit_button("Update Occurrence")
+
+                        if submit_button:
+                            success, message = db.update_series_occurrence(series[0], occurrence_date, str(date), start_time.strftime("%H:%M:%S"), end_time.strftime("%H:%M:%S"),
+                                                                           speaker_name, speaker_email, speaker_bio, topic, abstract, room)
+                            if success:
+                                st.success(message)
+                            else:
+                                st.warning(message)
+
+                        if st.button("Cancel Occurrence"):
+                            db.cancel_series_occurrence(series[0], occurrence_date)
+                            st.success(f"Occurrence on {occurrence_date} cancelled.")
+
+                    if st.button("Delete Series"):
+                        db.delete_seminar_series(series[0])
+                        st.success("Seminar series deleted successfully!")
+
             elif seminar_action == "Update Seminar":
-                seminars = db.read_seminars()
+                with profiler.phase("admin: seminars db"):
+                    seminars = data.all_seminars()
                 if not seminars:
                     st.warning("No seminars available to update.")
                 else:
@@ -114,7 +212,8 @@ def show():
 
 
             elif seminar_action == "Delete Seminar":
-                seminars = db.read_seminars()
+                with profiler.phase("admin: seminars db"):
+                    seminars = data.all_seminars()
                 if not seminars:
                     st.warning("No seminars available to delete.")
                 else:
@@ -126,9 +225,10 @@ def show():
                             db.delete_seminar(seminar[0])
                             st.success("Seminar deleted successfully!")
 
-        with tab2:
+        elif view == "Pending Seminar Requests":
             st.header("Pending Seminar Requests")
-            requests = db.read_seminar_requests()
+            with profiler.phase("admin: requests db"):
+                requests = data.seminar_requests()
             if not requests:
                 st.warning("No pending seminar requests.")
             else:
@@ -156,10 +256,13 @@ def show():
                         col1, col2, col3 = st.columns(3)
                         with col1:
                             if st.button("Approve", key=f"approve_{request[0]}"):
-                                for r in similar_requests:
-                                    db.approve_seminar_request(r[0])
-                                st.success(f"Approved {len(similar_requests)} similar seminar requests and added to schedule.")
-                                st.rerun()
+                                results = [db.approve_seminar_request(r[0]) for r in similar_requests]
+                                failures = [message for success, message in results if not success]
+                                if failures:
+                                    st.error(f"{len(failures)} of {len(results)} requests could not be approved: {failures[0]}")
+                                else:
+                                    st.success(f"Approved {len(similar_requests)} similar seminar requests and added to schedule.")
+                                    st.rerun()
                         with col2:
                             if st.button("Reject", key=f"reject_{request[0]}"):
                                 for r in similar_requests:
@@ -210,8 +313,123 @@ def show():
                         del st.session_state.editing_request
                         st.rerun()
 
+        elif view == "Statistics":
+            st.header("Seminar Statistics")
+            period = st.radio("Group by", ["Month", "Term"], horizontal=True)
+            with profiler.phase("admin: statistics db"):
+                stats = pd.DataFrame(data.statistics(period.lower()),
+                                     columns=[period, "Seminar Type", "Room", "Seminars", "Minutes", "Distinct Speakers"])
+            if stats.empty:
+                st.warning("No seminars to summarise yet.")
+            else:
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Seminars", int(stats["Seminars"].sum()))
+                col2.metric("Room hours", round(stats["Minutes"].sum() / 60, 1))
+                col3.metric("Rooms", stats["Room"].nunique())
+                st.caption("Each occurrence of a seminar series counts as a seminar.")
+
+                st.subheader(f"Seminars per {period.lower()} by type")
+                st.bar_chart(stats.pivot_table(index=period, columns="Seminar Type", values="Seminars", aggfunc="sum", fill_value=0))
+                st.subheader("Room usage (hours)")
+                st.bar_chart(stats.groupby("Room")["Minutes"].sum() / 60)
+                st.subheader("Most frequent speakers")
+                st.dataframe(pd.DataFrame(data.speaker_frequency(), columns=["Speaker", "Seminars"]))
+                st.subheader("Details")
+                st.dataframe(stats)
+
+        elif view == "Activity":
+            st.header("Recent Activity")
+            changes = data.recent_changes()
+            if not changes:
+                st.info("No changes recorded yet.")
+            else:
+                st.dataframe([
+                    {'when': changed_at, 'what': table.replace('_', ' '), 'id': row_id, 'change': op,
+                     'topic': row.get('topic'), 'date': row.get('date') or row.get('occurrence_date'),
+                     'status': row.get('status')}
+                    for _, table, row_id, op, changed_at, row in reversed(changes)
+                ])
+
+        elif view == "Import / Export":
+            # CSV and ICS support (icalendar) is only loaded for this view
+            import bulk
+
+            st.header("Import Seminars")
+            uploaded_file = st.file_uploader("Upload a CSV or ICS file", type=["csv", "ics"])
+            if uploaded_file is not None and st.button("Import"):
+                # Decode the upload lazily so large files are read line by line
+                stream = io.TextIOWrapper(uploaded_file, encoding="utf-8", newline="")
+                rows = bulk.read_ics(stream) if uploaded_file.name.lower().endswith(".ics") else bulk.read_csv(stream)
+                imported, errors = db.import_seminars(rows)
+                st.success(f"Imported {imported} seminars.")
+                if errors:
+                    st.warning(f"{len(errors)} rows were skipped.")
+                    st.dataframe([{"line": line, "error": error} for line, error in errors])
+
+            st.header("Export Seminars")
+            st.caption("Recurring series are exported as their individual occurrences; open-ended ones up to a year ahead.")
+            export_format = st.radio("Format", ["CSV", "ICS"], horizontal=True)
+            if st.button("Prepare Export"):
+                # Spool to a temporary file instead of building the export in memory
+                export_file = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode="w+", newline="")
+                if export_format == "CSV":
+                    bulk.write_csv((row[1:] for row in db.iter_seminars(with_series=True)), export_file)
+                else:
+                    bulk.write_ics(db.iter_seminars(with_timezone=True, with_series=True), export_file)
+                export_file.seek(0)
+                st.download_button("Download", export_file, file_name=f"seminars.{export_format.lower()}")
+
+        elif view == "Metrics":
+            st.header("Database Metrics")
+            # The request form's counters are kept whether or not timing metrics are switched on
+            st.subheader("Request form")
+            counters = metrics.snapshot()['counters']
+            col1, col2, col3, col4, col5 = st.columns(5)
+            col1.metric("Accepted", counters.get('request_form.accepted', 0))
+            col2.metric("Limited (session)", counters.get('request_form.limited.session', 0))
+            col3.metric("Limited (email)", counters.get('request_form.limited.email', 0))
+            col4.metric("Backed off", counters.get('request_form.backed_off', 0))
+            col5.metric(f"Outbox (backs off above {ratelimit.OUTBOX_HIGH_WATER})", db.outbox_depth())
+            if not metrics.enabled:
+                st.info("Metrics are disabled. Start the app with SEMINAR_METRICS=1 to record them.")
+            else:
+                snapshot = metrics.snapshot()
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Connections opened", snapshot['connections_opened'])
+                col2.metric("SQL statements", snapshot['statements_traced'])
+                col3.metric("Slow query threshold (ms)", snapshot['slow_query_ms'])
+                for table in ('methods', 'spans', 'statements'):
+                    st.subheader(table.capitalize())
+                    st.dataframe([
+                        {'name': name, 'count': h['count'], 'mean_ms': h['mean_seconds'] * 1000,
+                         'max_ms': h['max_seconds'] * 1000, 'rows': h['rows']}
+                        for name, h in sorted(snapshot[table].items(), key=lambda item: -item[1]['total_seconds'])
+                    ])
+                col1, col2, col3 = st.columns(3)
+                col1.download_button("Download JSON", metrics.to_json(), file_name="metrics.json")
+                col2.download_button("Download Prometheus", metrics.to_prometheus(), file_name="metrics.prom")
+                if col3.button("Reset Metrics"):
+                    metrics.reset()
+                    st.rerun()
+
+        elif view == "Profiler":
+            st.header("Rerun Profiler")
+            st.caption("Phase timings of this session's reruns, slowest phases first.")
+            st.dataframe(profiler.summary())
+            recent = profiler.traces()[-20:]
+            if recent:
+                st.subheader("Recent reruns")
+                st.dataframe([
+                    {'started_at': t['started_at'], 'page': t['page'], 'total_ms': t['total_ms'],
+                     'phases': ', '.join(f"{p['name']} {p['ms']:.1f}ms" for p in t['phases'])}
+                    for t in reversed(recent)
+                ])
+            col1, col2 = st.columns(2)
+            col1.download_button("Export traces (JSON)", profiler.export_json(), file_name="rerun_traces.json")
+            if col2.button("Reset Profiler"):
+                profiler.reset()
+                st.rerun()
+
         if st.button("Logout"):
             st.session_state.admin_logged_in = False
             st.rerun()
-
-    db.close()
\ No newline at end of file
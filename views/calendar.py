@@ -1,9 +1,16 @@
 import streamlit as st
 import pandas as pd
 from st_aggrid import AgGrid, GridOptionsBuilder
-from database import SeminarDB
+import profiler
+import ratelimit
+from instrumentation import metrics
+from views import data
+from views.data import prepare_seminars_dataframe
 from datetime import datetime, time
+import html
+import json
 import logging
+import math
 import re
 
 # Set up logging
@@ -33,55 +40,17 @@ def display_seminar_details(seminar):
     seminar_start_time = seminar.get('start_time', 'N/A')
     seminar_end_time = seminar.get('end_time', 'N/A')
     
-    # Use st.container to group the details inside a visual frame
+    # Use st.container to group the details inside a visual frame; its CSS is part of the
+    # app-wide stylesheet, and bio and abstract arrive sanitised and rendered (markup.py)
     with st.container():
         st.markdown(f"""
-            <style>
-                /* Ensure explicit background and text color for all themes */
-                .seminar-details {{
-                    background-color: #f0f2f6; /* Light grey background */
-                    color: #000000; /* Ensure black text for contrast */
-                    border-radius: 10px;
-                    padding: 20px;
-                    margin-bottom: 20px;
-                    border: 1px solid #ccc;
-                }}
-                .seminar-details h4 {{
-                    color: #1f77b4;
-                    margin-bottom: 15px;
-                }}
-                .seminar-details .label {{
-                    font-weight: bold;
-                    color: #2c3e50;
-                }}
-                .seminar-info {{
-                    display: flex;
-                    flex-wrap: wrap;
-                    justify-content: space-between;
-                }}
-                .seminar-info div {{
-                    width: 45%;
-                    margin-bottom: 10px;
-                    color: #000000; /* Ensure black text color */
-                }}
-                .speaker-abstract-container {{
-                    display: flex;
-                    justify-content: space-between;
-                    gap: 10px;
-                }}
-                .speaker-abstract-container div {{
-                    width: 48%;
-                    background-color: #ffffff; /* Explicit white background for speaker bio and abstract */
-                    color: #000000; /* Black text for readability */
-                }}
-            </style>
             <div class="seminar-details">
-                <h4>{seminar.get('topic', 'N/A')}</h4>
+                <h4>{html.escape(str(seminar.get('topic', 'N/A')))}</h4>
                 <div class="seminar-info">
                     <div><span class="label">Time:</span> {seminar_date} {seminar_start_time} - {seminar_end_time}</div>
-                    <div><span class="label">Room:</span> {seminar.get('room', 'N/A')}</div>
-                    <div><span class="label">Speaker:</span> {seminar.get('speaker_name', 'N/A')}</div>
-                    <div><span class="label">Email:</span> {seminar.get('speaker_email', 'N/A')}</div>
+                    <div><span class="label">Room:</span> {html.escape(str(seminar.get('room', 'N/A')))}</div>
+                    <div><span class="label">Speaker:</span> {html.escape(str(seminar.get('speaker_name', 'N/A')))}</div>
+                    <div><span class="label">Email:</span> {html.escape(str(seminar.get('speaker_email', 'N/A')))}</div>
                 </div>
             </div>
         """, unsafe_allow_html=True)
@@ -94,7 +63,7 @@ def display_seminar_details(seminar):
                 st.markdown(f"""
                 <div style='background-color: white; padding: 0px; border-radius: 5px; color: #000000;'>
                     <h4 style='color: #1f77b4; margin-bottom: 10px;'>Speaker Bio</h4>
-                    {seminar.get('speaker_bio', 'No bio available.')}
+                    {data.speaker_bio_html(seminar.get('speaker_bio'))}
                 </div>
                 """, unsafe_allow_html=True)
 
@@ -103,7 +72,7 @@ def display_seminar_details(seminar):
                 st.markdown(f"""
                 <div style='background-color: white; padding: 0px; border-radius: 5px; color: #000000;'>
                     <h4 style='color: #1f77b4; margin-bottom: 10px;'>Abstract</h4>
-                    {seminar.get('abstract', 'No abstract available.')}
+                    {data.abstract_html(seminar.get('abstract'))}
                 </div>
                 """, unsafe_allow_html=True)
 
@@ -150,27 +119,29 @@ def display_seminars_table_orig(seminars, title):
         display_seminar_details(st.session_state.selected_seminar)
 
 
-def display_seminars_table(seminars, title):
-    """Helper function to display seminars table using AgGrid."""
-    df = pd.DataFrame(seminars, columns=['id', 'date', 'start_time', 'end_time', 'speaker_name', 'speaker_email', 'speaker_bio', 'topic', 'abstract', 'room', 'seminar_type'])
-    df['date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
-    df['start_time'] = pd.to_datetime(df['start_time'], format='%H:%M:%S').dt.strftime('%H:%M')
-    df['end_time'] = pd.to_datetime(df['end_time'], format='%H:%M:%S').dt.strftime('%H:%M')
-    df['datetime'] = pd.to_datetime(df['date'].astype(str) + ' ' + df['start_time'].astype(str))
-    df = df.sort_values('datetime')
+# Columns sent to the browser and their widths; bio and abstract stay server-side for the detail panel
+GRID_COLUMNS = (
+    ("id", 60),
+    ("date", 100),
+    ("start_time", 90),
+    ("end_time", 90),
+    ("seminar_type", 200),
+    ("topic", 400),
+    ("speaker_name", 150),
+    ("room", 100),
+)
 
-    display_columns = ['id', 'date', 'start_time', 'end_time', 'seminar_type', 'topic', 'speaker_name', 'room']
-    gb = GridOptionsBuilder.from_dataframe(df[display_columns])
+
+@st.cache_data(show_spinner=False)
+def build_grid_options(columns, _prototype):
+    """Helper function to build the AgGrid options once per column layout."""
+    gb = GridOptionsBuilder.from_dataframe(_prototype)
     
     # Only change the column widths to prevent truncation
-    gb.configure_column("id", width=60)
-    gb.configure_column("date", width=100)
-    gb.configure_column("start_time", width=90)
-    gb.configure_column("end_time", width=90)
-    gb.configure_column("seminar_type", width=200)
-    gb.configure_column("topic", width=400, wrapText=True, autoHeight=True)
-    gb.configure_column("speaker_name", width=150)
-    gb.configure_column("room", width=100)
+    for column, width in columns:
+        gb.configure_column(column, width=width)
+    # Fixed-height rows are much cheaper to lay out than autoHeight; the full topic is in the tooltip
+    gb.configure_column("topic", tooltipField="topic")
     
     gb.configure_selection('single', use_checkbox=False, groupSelectsChildren=True, groupSelectsFiltered=True)
     grid_options = gb.build()
@@ -178,16 +149,31 @@ def display_seminars_table(seminars, title):
     # Add suppressColumnVirtualisation to prevent column truncation
     grid_options['suppressColumnVirtualisation'] = True
 
-    grid_response = AgGrid(
-        df[display_columns],
-        gridOptions=grid_options,
-        height=300,
-        data_return_mode='AS_INPUT',
-        update_mode='SELECTION_CHANGED',
-        fit_columns_on_grid_load=True,
-        allow_unsafe_jscode=True
-    )
+    # GridOptionsBuilder returns nested defaultdicts; a plain dict can be cached
+    return json.loads(json.dumps(grid_options))
 
+
+def display_seminars_table(df, title, data_version):
+    """Helper function to display a prepared seminars DataFrame using AgGrid."""
+    display_columns = [column for column, _ in GRID_COLUMNS]
+    with profiler.phase(f"{title}: grid build"):
+        grid_options = build_grid_options(GRID_COLUMNS, df[display_columns].head(0))
+
+    with profiler.phase(f"{title}: grid render"):
+        # Keying the grid by data version keeps the browser-side grid (and its rows) across
+        # selection reruns; it is only rebuilt when the seminars change
+        grid_response = AgGrid(
+            df[display_columns],
+            gridOptions=grid_options,
+            height=300,
+            data_return_mode='AS_INPUT',
+            update_mode='SELECTION_CHANGED',
+            fit_columns_on_grid_load=True,
+            allow_unsafe_jscode=True,
+            key=f"{title}-grid-{data_version}"
+        )
+
+    # Details come from the cached server-side frame, looked up by the selected id
     selected_rows = pd.DataFrame(grid_response['selected_rows'])
     if not selected_rows.empty and 'id' in selected_rows.columns:
         selected_seminar_id = selected_rows.iloc[0]['id']
@@ -198,7 +184,8 @@ def display_seminars_table(seminars, title):
         st.session_state.selected_seminar = None
 
     if st.session_state.selected_seminar:
-        display_seminar_details(st.session_state.selected_seminar)
+        with profiler.phase(f"{title}: detail render"):
+            display_seminar_details(st.session_state.selected_seminar)
 
     return grid_response
 
@@ -209,13 +196,31 @@ def validate_and_submit_request(db, date, start_time, end_time, room, speaker_na
         st.error("Please enter a valid email address for the speaker.")
     elif start_time >= end_time:
         st.error("End time must be after start time.")
+    elif data.outbox_depth() > ratelimit.OUTBOX_HIGH_WATER:
+        # Email delivery is behind; nothing is written or sent until it catches up
+        metrics.count('request_form.backed_off')
+        st.warning("We are receiving a lot of requests right now. Your request has not been sent; "
+                   "please try again in a few minutes.")
     else:
+        # Only complete submits take a token, so fixing a typo costs nothing
+        retry_after, limited = data.request_limiter().acquire(
+            f"session:{data.session_key()}", f"email:{submitter_email.strip().casefold()}")
+        if limited:
+            for key in limited:
+                metrics.count(f"request_form.limited.{key.split(':')[0]}")
+            minutes = math.ceil(retry_after / 60)
+            st.warning(f"You have sent several requests in a short time. Your request has not been sent; "
+                       f"please try again in {minutes} minute{'s' if minutes != 1 else ''}.")
+            return
+        metrics.count('request_form.accepted')
         success, message = db.create_seminar_request(
             str(date), start_time.strftime("%H:%M:%S"), end_time.strftime("%H:%M:%S"),
             speaker_name, speaker_email, speaker_bio, topic, abstract, room,
             submitter_name, submitter_email, seminar_type
         )
         if success:
+            # The coordinator's email was queued with the request; send it now, off this rerun
+            data.deliverer().wake()
             st.success(message)
         else:
             st.warning(message)
@@ -223,9 +228,11 @@ def validate_and_submit_request(db, date, start_time, end_time, room, speaker_na
 
 def show():
     st.title("Seminar Calendar")
-    db = SeminarDB()
 
-    tab1, tab2, tab3 = st.tabs(["Upcoming Seminar", "Past Seminar", "Request Seminar"])
+    # Only the selected view runs, so each one queries its own data on demand
+    # (st.tabs would render, and query, every tab on every rerun)
+    view = st.radio("View", ["Upcoming Seminar", "Past Seminar", "Request Seminar"],
+                    horizontal=True, label_visibility="collapsed", key="calendar_view")
      # Define seminar types
     SEMINAR_TYPES = [
         "Economics of Green Transition Seminar",
@@ -233,25 +240,42 @@ def show():
         "Others"
     ]
 
-    # Upcoming Seminars Tab
-    with tab1:
-        seminars = db.fetch_future_seminars()
-        if not seminars:
+    # Upcoming Seminars View
+    if view == "Upcoming Seminar":
+        with profiler.phase("Upcoming Seminar: db + dataframe"):
+            version, seminars = data.future_seminars_frame()
+        if seminars.empty:
             st.warning("No upcoming seminars found.")
         else:
-            display_seminars_table(seminars, "Upcoming Seminar")
+            display_seminars_table(seminars, "Upcoming Seminar", version)
 
-    # Past Seminars Tab
-    with tab2:
-        past_seminars = db.fetch_past_seminars()
-        if not past_seminars:
+    # Past Seminars View
+    elif view == "Past Seminar":
+        # The history is read a page at a time, newest first
+        page = st.session_state.get("past_page", 0)
+        with profiler.phase("Past Seminar: db + dataframe"):
+            version, past_seminars, has_older = data.past_seminars_page(page)
+        if past_seminars.empty and page == 0:
             st.warning("No past seminars found.")
         else:
-            display_seminars_table(past_seminars, "Past Seminar")
+            display_seminars_table(past_seminars, "Past Seminar", f"{version}-{page}")
+            col1, col2, col3 = st.columns([1, 2, 1])
+            if col1.button("Newer", disabled=page == 0, key="past_newer"):
+                st.session_state.past_page = page - 1
+                st.rerun()
+            col2.caption(f"Page {page + 1}")
+            if col3.button("Older", disabled=not has_older, key="past_older"):
+                st.session_state.past_page = page + 1
+                st.rerun()
     
-    # Request Seminar Tab
-    with tab3:
+    # Request Seminar View
+    else:
         st.subheader("Request a Seminar")
+        if data.outbox_depth() > ratelimit.OUTBOX_HIGH_WATER:
+            st.info("We are receiving a lot of requests right now, so new ones may be turned away for a few minutes.")
+        # Outside the form so suggestions follow what is typed
+        room = data.autocomplete_input("Preferred Meeting Room *", data.room_index(), key="request_room")  # Mandatory field
+        speaker_name = data.autocomplete_input("Speaker Name", data.speaker_index(), key="request_speaker")  # Optional
         with st.form("request_seminar_form"):
             date = st.date_input("Seminar Date *")  # Seminar date is mandatory
             start_time = time_picker("Start Time *", default_time=time(12, 0))  # Start time is mandatory
@@ -261,8 +285,6 @@ def show():
                 options=SEMINAR_TYPES,
                 index=0
             )
-            room = st.text_input("Preferred Meeting Room *")  # Mandatory field
-            speaker_name = st.text_input("Speaker Name")  # Optional
             speaker_email = st.text_input("Speaker Email")  # Optional
             speaker_bio = st.text_area("Speaker Bio")  # Optional
             topic = st.text_input("Topic *")  # Mandatory field
@@ -273,9 +295,8 @@ def show():
             submit_button = st.form_submit_button("Submit Request")
 
         if submit_button:
-            validate_and_submit_request(
-                db, date, start_time, end_time, room, speaker_name, speaker_email,
-                speaker_bio, topic, abstract, submitter_name, submitter_email, seminar_type
-            )
-
-    db.close()
+            with profiler.phase("Request Seminar: submit"):
+                validate_and_submit_request(
+                    data.get_db(), date, start_time, end_time, room, speaker_name, speaker_email,
+                    speaker_bio, topic, abstract, submitter_name, submitter_email, seminar_type
+                )
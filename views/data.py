@@ -0,0 +1,247 @@
+# views/data.py
+#
+# Shared, cached data access for the pages. Each view asks for the data it shows when it is
+# rendered; results are cached per data version, so a rerun only queries SQLite after a write.
+
+import secrets
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+import ratelimit
+import scheduler
+from database import SeminarDB
+from storage import backend_from_env
+from lookup import PrefixIndex, room_key
+from markup import fragment_key, render
+
+# Seminars per page of the past-seminars view
+PAST_PAGE_SIZE = 50
+
+# Rendered bios and abstracts kept per process, keyed by markup.fragment_key, so a frequent
+# speaker's bio is fetched once however many seminars show it
+FRAGMENT_CACHE_SIZE = 512
+
+# How long the outbox depth the request form checks is reused for
+OUTBOX_CHECK_SECONDS = 10
+
+_fragments = OrderedDict()
+_fragments_lock = threading.Lock()
+
+
+def prepare_seminars_dataframe(seminars):
+    """Helper function to turn seminar rows into the DataFrame shown in the seminars table."""
+    df = pd.DataFrame(seminars, columns=['id', 'date', 'start_time', 'end_time', 'speaker_name', 'speaker_email', 'speaker_bio', 'topic', 'abstract', 'room', 'seminar_type'])
+    df['date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
+    df['start_time'] = pd.to_datetime(df['start_time'], format='%H:%M:%S').dt.strftime('%H:%M')
+    df['end_time'] = pd.to_datetime(df['end_time'], format='%H:%M:%S').dt.strftime('%H:%M')
+    df['datetime'] = pd.to_datetime(df['date'].astype(str) + ' ' + df['start_time'].astype(str))
+    return df.sort_values('datetime')
+
+
+@st.cache_resource(show_spinner=False)
+def get_db():
+    # SeminarDB keeps no connection open, so a single instance can serve every session;
+    # SEMINAR_DATABASE_URL selects another backend than seminars.db. Pages must not close it:
+    # with PostgreSQL that would close the pool every session shares
+    return SeminarDB(backend=backend_from_env())
+
+
+@st.cache_resource(show_spinner=False)
+def start_scheduler():
+    # One background scheduler thread per server process, shared by all sessions
+    return scheduler.start_background(get_db())
+
+
+@st.cache_resource(show_spinner=False)
+def deliverer():
+    # Sends the request form's queued notifications; one thread per server process
+    return scheduler.Deliverer(get_db())
+
+
+@st.cache_resource(show_spinner=False)
+def request_limiter():
+    # The request form's token buckets, shared by every session of this server process
+    return ratelimit.from_env()
+
+
+@st.cache_data(show_spinner=False, ttl=OUTBOX_CHECK_SECONDS)
+def outbox_depth():
+    # Counted at most once per OUTBOX_CHECK_SECONDS, however many visitors have the form open
+    return get_db().outbox_depth()
+
+
+def session_key():
+    # Random per browser session; the request form's rate limit is keyed by it
+    if 'request_session' not in st.session_state:
+        st.session_state.request_session = secrets.token_hex(8)
+    return st.session_state.request_session
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _future_seminars(version, today):
+    return get_db().fetch_future_seminars()
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _past_seminars(version, today):
+    return get_db().fetch_past_seminars()
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _future_frame(version, today):
+    return prepare_seminars_dataframe(_future_seminars(version, today))
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _past_page(version, today, page, page_size):
+    # Returns (rows, cursor of the next page, number of the first row). A page's cursor is only
+    # known from the page before it, so this walks from the newest page; every page is cached,
+    # so paging on costs one keyset query per newly visited page.
+    if page == 0:
+        before, first = None, 1
+    else:
+        previous, before, first = _past_page(version, today, page - 1, page_size)
+        first += len(previous)
+        if before is None:
+            return [], None, first
+    rows, cursor = get_db().fetch_past_seminars_page(before, page_size)
+    # Number rows across pages, as the full list did, instead of showing database ids
+    return [(first + i, *row[1:]) for i, row in enumerate(rows)], cursor, first
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _past_page_frame(version, today, page, page_size):
+    rows, cursor, _ = _past_page(version, today, page, page_size)
+    return prepare_seminars_dataframe(rows), cursor is not None
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _all_seminars(version):
+    return get_db().read_seminars()
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _seminar_requests(version):
+    return get_db().read_seminar_requests()
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _statistics(version, period):
+    return get_db().read_statistics(period)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _speaker_frequency(version, limit):
+    return get_db().read_speaker_frequency(limit)
+
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _room_index(version):
+    return PrefixIndex([name for _, name in get_db().read_rooms()], normalize=room_key)
+
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _speaker_index(version):
+    return PrefixIndex({name for _, name, _ in get_db().read_speakers()}, words=True)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _recent_changes(versions, limit):
+    db = get_db()
+    return db.changes_since(max(db.last_change_seq() - limit, 0), limit)
+
+
+def _fragment(text, missing):
+    # Bounded LRU shared by all sessions; the lock guards it against concurrent script runs
+    if not isinstance(text, str) or not text.strip():
+        return missing
+    key = fragment_key(text)
+    with _fragments_lock:
+        if key in _fragments:
+            _fragments.move_to_end(key)
+            return _fragments[key]
+    # Rendered when written; texts that never went through SeminarDB's writes are rendered here
+    rendered = get_db().read_rendered_fragment(key)
+    if rendered is None:
+        rendered = render(text)
+    with _fragments_lock:
+        _fragments[key] = rendered
+        while len(_fragments) > FRAGMENT_CACHE_SIZE:
+            _fragments.popitem(last=False)
+    return rendered
+
+
+def speaker_bio_html(bio):
+    return _fragment(bio, 'No bio available.')
+
+
+def abstract_html(abstract):
+    return _fragment(abstract, 'No abstract available.')
+
+
+def future_seminars():
+    return _future_seminars(get_db().data_version('seminars'), datetime.now().date())
+
+
+def past_seminars():
+    return _past_seminars(get_db().data_version('seminars'), datetime.now().date())
+
+
+def future_seminars_frame():
+    # Returns (data_version, prepared DataFrame) so the grid can be keyed by version
+    version = get_db().data_version('seminars')
+    return version, _future_frame(version, datetime.now().date())
+
+
+def past_seminars_page(page, page_size=PAST_PAGE_SIZE):
+    # Returns (data_version, prepared DataFrame of the page, whether older pages exist)
+    version = get_db().data_version('seminars')
+    frame, has_older = _past_page_frame(version, datetime.now().date(), page, page_size)
+    return version, frame, has_older
+
+
+def all_seminars():
+    return _all_seminars(get_db().data_version('seminars'))
+
+
+def seminar_requests():
+    return _seminar_requests(get_db().data_version('seminar_requests'))
+
+
+def statistics(period='month'):
+    return _statistics(get_db().data_version('seminars'), period)
+
+
+def speaker_frequency(limit=20):
+    return _speaker_frequency(get_db().data_version('seminars'), limit)
+
+
+def recent_changes(limit=100):
+    # The change log only grows with writes to seminars or requests, which bump these versions
+    db = get_db()
+    return _recent_changes((db.data_version('seminars'), db.data_version('seminar_requests')), limit)
+
+
+def room_index():
+    return _room_index(get_db().data_version('lookups'))
+
+
+def speaker_index():
+    return _speaker_index(get_db().data_version('lookups'))
+
+
+def autocomplete_input(label, index, key):
+    """Text input completed from a PrefixIndex of known rooms or speakers.
+
+    Suggestions refresh when the page reruns, so this has to be rendered outside st.form.
+    """
+    text = st.text_input(label, key=key)
+    suggestions = [name for name in index.complete(text) if name != text]
+    if not suggestions:
+        return text
+    return st.selectbox(f"Matching {label.rstrip(' *').lower()}", [text] + suggestions, key=f"{key}_match",
+                        format_func=lambda name: f"{name} (as typed)" if name == text else name)